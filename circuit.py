@@ -6,7 +6,12 @@ Author: Toby Mallon
 Created: 4-28-2025
 """
 
-from collections import defaultdict, deque
+import heapq
+import sys
+from collections import defaultdict
+
+from model.component import ComponentType
+from utils.topo_order import TopologicalOrder
 
 
 class Component:
@@ -15,10 +20,11 @@ class Component:
 
     Attributs:
         id (str): string representing component id
-        type (str): string representing component type
+        type (ComponentType): component type, compares equal to its name
         inputs (str[]): logic inputs into the component
         outputs (str[]): logic outputs into the component
         connections (str[]): list of connections to other components
+        stamps (dict): circuit generation each input value was written in
     """
 
     def __init__(
@@ -26,18 +32,19 @@ class Component:
     ):  # pylint: disable=too-many-arguments, too-many-positional-arguments
         self.id = comp_id
         self.pos = pos
-        self.type = comp_type  # AND, OR, NOT
-        self.inputs = {name: False for name in inputs}
-        self.outputs = {name: False for name in outputs}
+        self.type = ComponentType(comp_type)  # AND, OR, NOT
+        self.inputs = {sys.intern(name): False for name in inputs}
+        self.outputs = {sys.intern(name): False for name in outputs}
         self.connections = {name: [] for name in outputs}
         self.connected_wires = []
+        self.stamps = dict.fromkeys(self.inputs, 0)
 
     def to_dict(self):
         """Turns object into json serializable format"""
         return {
             "id": self.id,
             "pos": self.pos,
-            "type": self.type,
+            "type": self.type.value,
             "inputs": list(self.inputs.keys()),
             "outputs": list(self.outputs.keys()),
             "connections": list(self.connections.keys()),
@@ -48,19 +55,19 @@ class Component:
         """
         TODO Implement computing circuit logic
         """
-        if self.type == "AND":
+        if self.type is ComponentType.AND:
             self.outputs["OUT"] = self.inputs["A"] and self.inputs["B"]
 
-        elif self.type == "OR":
+        elif self.type is ComponentType.OR:
             self.outputs["OUT"] = self.inputs["A"] or self.inputs["B"]
 
-        elif self.type == "NOT":
+        elif self.type is ComponentType.NOT:
             self.outputs["OUT"] = not self.inputs["IN"]
 
-        elif self.type == "INPUT":
+        elif self.type is ComponentType.INPUT:
             pass
 
-        elif self.type == "OUTPUT":
+        elif self.type is ComponentType.OUTPUT:
             pass
 
     def __str__(self):
@@ -135,6 +142,46 @@ class Circuit:
         self.window = window
         self.components = {}
         self.wires = []
+        self.order = TopologicalOrder()
+        self.cyclic_wires = []
+        self.drivers = defaultdict(list)
+        self.evaluated = False
+        self.generation = 0
+        self.listeners = []
+
+    def add_listener(self, listener):
+        """
+        Registers an object to be told about edits, the same events the
+        model circuit sends: component_added, component_deleted and
+        wire_added
+
+        Args:
+            listener: object implementing the events
+
+        Returns:
+            None
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stops telling a listener about edits"""
+        self.listeners.remove(listener)
+
+    def notify(self, event, *args):
+        """Calls event on every listener"""
+        for listener in list(self.listeners):
+            getattr(listener, event)(*args)
+
+    def begin_generation(self):
+        """
+        Starts a new evaluation. Input values stamped with an older
+        generation are stale, the first write in this one replaces them
+
+        Returns:
+            int: generation of the new evaluation
+        """
+        self.generation += 1
+        return self.generation
 
     def __str__(self):
         print_out = ""
@@ -146,7 +193,6 @@ class Circuit:
 
     def to_dict(self):
         """Turns object into json serializable format"""
-        print(self.wires)
         return {
             "components": [comp.to_dict() for comp in self.components.values()],
             "wires": [wire.to_dict() for wire in self.wires],
@@ -163,6 +209,9 @@ class Circuit:
             None
         """
         self.components[component.id] = component
+        self.order.add_node(component.id)
+        self.evaluated = False
+        self.notify("component_added", component)
 
     def delete_component(self, component):
         """Deletes component from circuit logic and removes gui"""
@@ -184,12 +233,33 @@ class Circuit:
                 self.window.remove_gui_wire(other_id, component.id)
 
         del self.components[component.id]
+        self.order.remove_node(component.id)
+        self.evaluated = False
 
-        self.wires = [
+        for key, sources in list(self.drivers.items()):
+            if key[0] == component.id:
+                del self.drivers[key]
+            else:
+                sources[:] = [src for src in sources if src[0] != component.id]
+
+        self.cyclic_wires = [
             wire
-            for wire in self.wires
+            for wire in self.cyclic_wires
             if wire.src_comp_id != component.id and wire.dst_comp_id != component.id
         ]
+        self.cyclic_wires = [
+            wire
+            for wire in self.cyclic_wires
+            if not self.order.add_edge(wire.src_comp_id, wire.dst_comp_id)
+        ]
+
+        removed = [
+            wire
+            for wire in self.wires
+            if component.id in (wire.src_comp_id, wire.dst_comp_id)
+        ]
+        self.wires = [wire for wire in self.wires if wire not in removed]
+        self.notify("component_deleted", component, removed)
 
     def connect(self, wire):
         """
@@ -199,7 +269,8 @@ class Circuit:
             wire (Wire): wire object storing start and end point ids and pins
 
         Returns:
-            None
+            bool: False if the wire closes a combinational loop, it is then
+            ignored when ordering evaluation
         """
         self.wires.append(wire)
         src = self.components[wire.src_comp_id]
@@ -207,6 +278,14 @@ class Circuit:
         dst = self.components[wire.dst_comp_id]
         print(dst)
         src.connections[wire.src_pin].append((dst.id, wire.dst_pin))
+        self.drivers[(dst.id, wire.dst_pin)].append((src.id, wire.src_pin))
+        self.evaluated = False
+
+        acyclic = self.order.add_edge(src.id, dst.id)
+        if not acyclic:
+            self.cyclic_wires.append(wire)
+        self.notify("wire_added", wire)
+        return acyclic
 
     def print_topological_order(self):
         """
@@ -219,33 +298,9 @@ class Circuit:
             None
         """
 
-        # Build the adjacency list and in-degree count
-        graph = defaultdict(list)
-        in_degree = defaultdict(int)
-
-        # Initialize in-degrees to 0 for all components
-        for comp_id in self.components:
-            in_degree[comp_id] = 0
-
-        # Populate graph and in-degree based on wires
-        for wire in self.wires:
-            graph[wire.src_comp_id].append(wire.dst_comp_id)
-            in_degree[wire.dst_comp_id] += 1
-
-        # Kahn's algorithm: start with nodes with in-degree 0
-        queue = deque([cid for cid, deg in in_degree.items() if deg == 0])
-        sorted_order = []
-
-        while queue:
-            cid = queue.popleft()
-            sorted_order.append(cid)
-
-            for neighbor in graph[cid]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
+        sorted_order = self.topological_sort()
 
-        if len(sorted_order) < len(self.components):
+        if self.cyclic_wires:
             print("Circuit contains a cycle (not a valid DAG).")
             return
 
@@ -257,60 +312,98 @@ class Circuit:
                     outputs: [{comp.outputs}], connections: [{comp.connections}]"
             )
 
-    # TODO figure out better way to calculate logic order
     def topological_sort(self):
-        """Basic topological sort to calculate logic order"""
-        # Build the adjacency list and in-degree count
-        graph = defaultdict(list)
-        in_degree = defaultdict(int)
-
-        # Initialize in-degrees to 0 for all components
-        for comp_id in self.components:
-            in_degree[comp_id] = 0
-
-        # Populate graph and in-degree based on wires
-        for wire in self.wires:
-            graph[wire.src_comp_id].append(wire.dst_comp_id)
-            in_degree[wire.dst_comp_id] += 1
-
-        # Kahn's algorithm: start with nodes with in-degree 0
-        queue = deque([cid for cid, deg in in_degree.items() if deg == 0])
-        sorted_order = []
-
-        while queue:
-            cid = queue.popleft()
-            sorted_order.append(cid)
-
-            for neighbor in graph[cid]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
+        """
+        Logic order, maintained incrementally as components and wires are
+        added so repeated evaluations do not re-sort the circuit
 
-        return sorted_order
+        Returns:
+            list of component ids in evaluation order
+        """
+        return self.order.order()
 
     def evaluate(self):
-        for comp in self.components.values():
-            for pin in comp.inputs:
-                comp.inputs[pin] = False
+        """
+        Evaluates the whole circuit in topological order. Input pins are not
+        cleared up front, the first value written to a pin in this
+        generation replaces the old one and later ones are OR-ed in. Pins
+        no wire drives keep False, delete_component clears the pins it
+        leaves undriven
+        """
+        generation = self.begin_generation()
 
         for cid in self.topological_sort():
             component = self.components[cid]
             component.compute()
-            print(component)
 
             for pin, output_value in component.outputs.items():
                 for dst_id, dst_pin in component.connections[pin]:
-                    current = self.components[dst_id].inputs.get(dst_pin, False)
-                    self.components[dst_id].inputs[dst_pin] = current or output_value
-
-                    if self.window.wire_lookup is not None:
-                        key = (component.id, dst_id)
-                        gui_wires = self.window.wire_lookup.get(key)
-                        if gui_wires:
-                            for wire in gui_wires:
-                                wire.update_color(output_value)
+                    dst = self.components[dst_id]
+                    if dst.stamps.get(dst_pin) == generation:
+                        dst.inputs[dst_pin] = dst.inputs[dst_pin] or output_value
+                    else:
+                        dst.inputs[dst_pin] = output_value
+                        dst.stamps[dst_pin] = generation
+
+                    self.update_gui_wires(component.id, dst_id, output_value)
         self.window.refresh_gui_from_logic()
-        print("------------------------------------------------------------------- \n")
+        self.evaluated = True
+
+    def propagate(self, comp_id):
+        """
+        Event driven update after the outputs of one component changed. Only
+        components downstream of it are recomputed, and propagation stops at
+        any component whose outputs stay the same
+
+        Args:
+            comp_id (str): id of the component whose outputs changed
+
+        Returns:
+            None
+        """
+        if not self.evaluated:
+            self.evaluate()
+            return
+
+        position = self.order.position
+        queue = [(position(comp_id), comp_id)]
+        queued = {comp_id}
+
+        while queue:
+            pos, cid = heapq.heappop(queue)
+            component = self.components[cid]
+
+            if cid != comp_id:
+                before = dict(component.outputs)
+                for pin in component.inputs:
+                    component.inputs[pin] = any(
+                        self.components[src_id].outputs[src_pin]
+                        for src_id, src_pin in self.drivers[(cid, pin)]
+                    )
+                component.compute()
+
+                if component.type is ComponentType.INPUT:
+                    gui_pin = self.window.pin_lookup.get((cid, "IN"))
+                    if gui_pin is not None:
+                        gui_pin.set_state_color(component.inputs["IN"])
+
+                if component.outputs == before:
+                    continue
+
+            for pin, output_value in component.outputs.items():
+                for dst_id, _ in component.connections[pin]:
+                    self.update_gui_wires(cid, dst_id, output_value)
+                    if dst_id not in queued and position(dst_id) > pos:
+                        queued.add(dst_id)
+                        heapq.heappush(queue, (position(dst_id), dst_id))
+
+    def update_gui_wires(self, src_id, dst_id, value):
+        """Recolors the gui wires running between two components"""
+        if self.window.wire_lookup is not None:
+            gui_wires = self.window.wire_lookup.get((src_id, dst_id))
+            if gui_wires:
+                for wire in gui_wires:
+                    wire.update_color(value)
 
 
 class ComponentIDGenerator:
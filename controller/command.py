@@ -3,6 +3,7 @@ Command.py
 """
 
 from typing import Tuple, List
+from controller.journal import EditJournal
 from model.circuit import Circuit
 from model.component import Component
 from model.pin import Pin
@@ -35,19 +36,24 @@ class Command:
 
 class AddGateCommand(Command):
   """
-  Adds a gate to the canvas and add its to the logical circuit
+  Adds a gate to the canvas and add its to the logical circuit. The circuit
+  does not hold positions, so the placement goes to the journal if there is one
   """
 
-  def __init__(self, gate_type: str, position: Tuple[int, int], gate_id: str, circuit: Circuit):
+  def __init__(self, gate_type: str, position: Tuple[int, int], gate_id: str, circuit: Circuit,
+               journal: EditJournal | None = None):
     self.gate_type: str = gate_type
     self.position: Tuple[int, int] = position
     self.gate_id: str = gate_id
     self.circuit: Circuit = circuit
     self.component: Component | None = None
+    self.journal: EditJournal | None = journal
 
   def execute(self) -> None:
     self.component = build_component(self.gate_type, self.position, self.gate_id)
     self.circuit.add_component(self.component)
+    if self.journal is not None:
+      self.journal.move(self.gate_id, self.position)
     # TODO add gui component as well, tie it to logic component
 
   def undo(self):
@@ -56,6 +62,8 @@ class AddGateCommand(Command):
 
   def redo(self):
     self.circuit.add_component(self.component)
+    if self.journal is not None:
+      self.journal.move(self.gate_id, self.position)
     # TODO add gui component
 
 
@@ -64,10 +72,12 @@ class MoveCommand(Command):
   Moves a gate to a new position
   """
 
-  def __init__(self, gate_id: str):
+  def __init__(self, gate_id: str, old_position: Tuple[int, int] | None = None,
+               new_position: Tuple[int, int] | None = None, journal: EditJournal | None = None):
     self.gate_id: str = gate_id
-    self.old_position: Tuple[int, int] | None = None
-    self.new_position: Tuple[int, int] | None = None
+    self.old_position: Tuple[int, int] | None = old_position
+    self.new_position: Tuple[int, int] | None = new_position
+    self.journal: EditJournal | None = journal
 
   def execute(self):
     """
@@ -75,7 +85,7 @@ class MoveCommand(Command):
     """
 
     # TODO implement gui logic
-    print("moved")
+    self._record(self.new_position)
 
   def undo(self):
     """
@@ -83,7 +93,7 @@ class MoveCommand(Command):
     """
 
     # TODO implement gui logic
-    print("undid move")
+    self._record(self.old_position)
 
   def redo(self):
     """
@@ -91,7 +101,11 @@ class MoveCommand(Command):
     """
 
     # TODO implement gui logic
-    print("redid move")
+    self._record(self.new_position)
+
+  def _record(self, position: Tuple[int, int] | None) -> None:
+    if self.journal is not None and position is not None:
+      self.journal.move(self.gate_id, position)
 
 
 class DeleteCommand(Command):
@@ -100,7 +114,7 @@ class DeleteCommand(Command):
   """
   def __init__(self, component: Component, circuit: Circuit):
     self.component: Component = component
-    self.connections: List | None = None # TODO implement find wire connections to the component
+    self.connections: List[Wire] | None = None
     self.circuit: Circuit = circuit
 
   def execute(self):
@@ -108,8 +122,8 @@ class DeleteCommand(Command):
     Delete a component
     """
     # TODO add gui component as well, tie it to logic component
-    # TODO delete connected wires gui and logic
-    self.circuit.delete_component(self.component)
+    # TODO delete connected wires gui
+    self.connections = self.circuit.delete_component(self.component)
 
   def undo(self):
     """
@@ -117,6 +131,8 @@ class DeleteCommand(Command):
     """
     # TODO add gui component as well, tie it to logic component
     self.circuit.add_component(self.component)
+    for wire in self.connections or []:
+      self.circuit.add_wire(wire)
 
   def redo(self):
     """
@@ -144,20 +160,19 @@ class AddWireCommand(Command):
     Add wire to circuit and draw
     """
     # TODO implement wire drawing
-    # TODO implement adding wires to src pin and dst pin components
-    self.circuit.wires.append(self.wire)
+    self.circuit.add_wire(self.wire)
 
   def undo(self):
     """
     Remove wire from circuit and canvas
     """
-    # TODO remove wire from components
-    print("undid wire drawing/connection")
+    # TODO remove gui wire
+    self.circuit.delete_wire(self.wire)
 
   def redo(self):
     """
     Redo removing wire
     """
 
-    # TODO all this bullshit
-    print("redid wire connection")
+    # TODO redraw gui wire
+    self.circuit.add_wire(self.wire)
@@ -0,0 +1,422 @@
+"""
+journal.py
+
+Append-only journal of edits made to a circuit, for autosave and crash
+recovery. Every edit is appended to <path>.journal as one short JSON line,
+so saving costs as much as the edit rather than the whole design. Now and
+then the journal is folded into a full snapshot at <path> on a background
+thread. Recovery loads the snapshot and replays the journal on top of it.
+
+Journal lines are [sequence, op, ...]:
+
+  [n, "add", component data]        component added, see Component.to_dict
+  [n, "delete", cid]                component and its wires deleted
+  [n, "wire", wire data]            wire added, see Wire.to_dict
+  [n, "unwire", wire data]          wire deleted
+  [n, "move", cid, x, y]            component placed or moved
+  [n, "reset"]                      every wire dropped, the wires that are
+                                    left follow as "wire" lines
+
+The snapshot is the serializer format plus the component positions and the
+sequence number of the last line it contains, so lines already in it are
+skipped on replay. Compacting renames the journal to <path>.journal.old
+before the snapshot is written and deletes it after, a crash at any point
+leaves files that recover to the same circuit.
+
+The gui's circuit (circuit.Circuit) sends the same edit events. Journaling
+it makes the snapshot a save file in the gui format, so the app journals the
+file it opened or saved and recover_file folds leftover lines into it the
+next time it is opened. Snapshots are written with write_circuit_file, a
+path ending in .lgb gets the binary format.
+"""
+
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Tuple
+from model.circuit import Circuit
+from model.component import Component
+from model.serializer import circuit_from_records, component_from_json
+from model.wire import Wire
+from utils.circuit_file import (BINARY_EXTENSION, read_circuit_file, stream_circuit_file,
+                                write_circuit_file)
+
+JOURNAL_EXTENSION = ".journal"
+
+Position = Tuple[int, int]
+
+
+class EditJournal:  # pylint: disable=too-many-instance-attributes
+  """
+  Circuit listener appending every edit to the journal. Positions are not
+  part of the model circuit, commands report them through move. circuit can
+  also be the gui's circuit, name is then saved with the snapshot
+  """
+
+  path: str
+  circuit: Circuit
+  positions: Dict[str, Position]
+  sequence: int
+  compact_every: int
+
+  def __init__(self, path: str, circuit: Circuit, positions: Dict[str, Position] | None = None,
+               sequence: int = 0, compact_every: int = 10_000, sync: bool = False,
+               name: str | None = None):  # pylint: disable=too-many-arguments
+    if path.endswith(BINARY_EXTENSION) and isinstance(circuit, Circuit):
+      raise ValueError(f"{path}: binary files hold gui circuits, journal a model circuit to .json")
+    self.path = path
+    self.circuit = circuit
+    self.name = name
+    self.positions = dict(positions or {})
+    self.sequence = sequence
+    # records written since the last compaction
+    self.pending = 0
+    self.compact_every = compact_every
+    # fsync every record, survives power loss and not only a crash
+    self.sync = sync
+
+    # pylint: disable-next=consider-using-with
+    self._file = open(self.journal_path, "a", encoding="utf-8")
+    self._compactor: threading.Thread | None = None
+    self._error: BaseException | None = None
+
+    # wires appended to circuit.wires before this point are not edits
+    self._sync()
+    circuit.add_listener(self)
+
+  @property
+  def journal_path(self) -> str:
+    """
+    File the edits are appended to
+    """
+    return self.path + JOURNAL_EXTENSION
+
+  def move(self, cid: str, position: Position) -> None:
+    """
+    Record where a component is placed
+    """
+    self.positions[cid] = tuple(position)
+    self._append("move", cid, *position)
+
+  def flush(self) -> None:
+    """
+    Make sure every edit so far is in the file, including wires appended
+    straight onto circuit.wires that the circuit has not picked up yet
+    """
+    self._sync()
+    self._flush()
+
+  def wait(self) -> None:
+    """
+    Wait for a background compaction to finish writing
+    """
+    if self._compactor is not None:
+      self._compactor.join()
+      self._compactor = None
+    self._raise_error()
+
+  def compact(self, background: bool = True) -> None:
+    """
+    Fold the journal into a new snapshot. The snapshot data is taken right
+    away, writing it happens on a background thread unless asked not to.
+    Does nothing while an earlier compaction is still being written
+    """
+    if background and self._compactor is not None and self._compactor.is_alive():
+      return
+    self.wait()
+
+    self._sync()
+    data = {
+        **({"name": self.name} if self.name is not None else {}),
+        **self.circuit.to_dict(),
+        "positions": {cid: list(position) for cid, position in self.positions.items()},
+        "sequence": self.sequence,
+    }
+    # gui components carry their position, moves only reach the journal
+    for comp in data["components"]:
+      if "pos" in comp and comp["id"] in self.positions:
+        comp["pos"] = list(self.positions[comp["id"]])
+    self._rotate()
+    self.pending = 0
+
+    if background:
+      self._compactor = threading.Thread(target=self._write_snapshot, args=(data,), daemon=True)
+      self._compactor.start()
+    else:
+      self._write_snapshot(data)
+      self._raise_error()
+
+  def close(self, compact: bool = True) -> None:
+    """
+    Write a final snapshot and stop listening to the circuit. Without
+    compact the journal is left for recovery to replay
+    """
+    self.circuit.remove_listener(self)
+    if compact:
+      self.compact(background=False)
+    else:
+      self.wait()
+    self._file.close()
+
+  # -----------------------------------------------------------------------
+  # circuit listener
+  # -----------------------------------------------------------------------
+
+  def component_added(self, component: Component) -> None:
+    """
+    Record an added component
+    """
+    self._append("add", component.to_dict())
+
+  # pylint: disable-next=unused-argument
+  def component_deleted(self, component: Component, removed: List[Wire]) -> None:
+    """
+    Record a deleted component, its wires go with it on replay
+    """
+    self.positions.pop(component.id, None)
+    self._append("delete", component.id)
+
+  def wire_added(self, wire: Wire) -> None:
+    """
+    Record an added wire
+    """
+    self._append("wire", wire.to_dict())
+
+  def wire_deleted(self, wire: Wire) -> None:
+    """
+    Record a deleted wire
+    """
+    self._append("unwire", wire.to_dict())
+
+  def circuit_reset(self) -> None:
+    """
+    Record the wire index being rebuilt
+    """
+    self._append("reset")
+
+  # -----------------------------------------------------------------------
+  # files
+  # -----------------------------------------------------------------------
+
+  def _append(self, op: str, *args: Any) -> None:
+    self.sequence += 1
+    self._file.write(json.dumps([self.sequence, op, *args], separators=(",", ":")) + "\n")
+    self._flush()
+
+    self.pending += 1
+    # wires appended straight onto circuit.wires are reported one by one
+    # while the model circuit indexes them, a snapshot taken in between
+    # would already hold the ones still to come
+    circuit = self.circuit
+    # pylint: disable-next=protected-access
+    settled = not isinstance(circuit, Circuit) or len(circuit.wires) == circuit._indexed_wires
+    if self.pending >= self.compact_every and settled:
+      self.compact()
+
+  def _sync(self) -> None:
+    # reading the revision makes the model circuit pick up wires appended
+    # to circuit.wires, the gui circuit has none
+    if isinstance(self.circuit, Circuit):
+      self.circuit.revision  # pylint: disable=pointless-statement
+
+  def _flush(self) -> None:
+    self._file.flush()
+    if self.sync:
+      os.fsync(self._file.fileno())
+
+  def _rotate(self) -> None:
+    """
+    Move the journal aside for the compaction and start a new one. An old
+    journal a failed compaction left behind is kept and appended to
+    """
+    self._file.close()
+    old = self.journal_path + ".old"
+    if os.path.exists(old):
+      with open(old, "a", encoding="utf-8") as out:
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+          shutil.copyfileobj(f, out)
+      os.remove(self.journal_path)
+    else:
+      os.replace(self.journal_path, old)
+    # pylint: disable-next=consider-using-with
+    self._file = open(self.journal_path, "a", encoding="utf-8")
+
+  def _write_snapshot(self, data: Dict[str, Any]) -> None:
+    try:
+      write_circuit_file(self.path, data, sync=True)
+      os.remove(self.journal_path + ".old")
+    except OSError as e:
+      self._error = e
+
+  def _raise_error(self) -> None:
+    error, self._error = self._error, None
+    if error is not None:
+      raise error
+
+
+def open_journal(path: str, **options) -> EditJournal:
+  """
+  Recover the circuit saved at path, if there is one, and keep journaling
+  edits to it. options are passed on to EditJournal
+  """
+  circuit, positions, sequence = recover(path)
+  journal = EditJournal(path, circuit, positions, sequence, **options)
+  journal.compact(background=False)
+  return journal
+
+
+def attach_journal(path: str, circuit, **options) -> EditJournal:
+  """
+  Journal edits to a circuit just loaded from or saved to path. Journals an
+  earlier session left next to the file are out of date and dropped.
+  Sequence numbers go on from the one the file was last compacted at, so
+  recover_file does not take the new records for ones already in it.
+  options are passed on to EditJournal
+  """
+  for stale in _journal_paths(path):
+    if os.path.exists(stale):
+      os.remove(stale)
+  if "sequence" not in options and os.path.exists(path):
+    saved = (record for key, record in stream_circuit_file(path) if key == "sequence")
+    options["sequence"] = next(saved, 0)
+  return EditJournal(path, circuit, **options)
+
+
+def recover_file(path: str) -> bool:
+  """
+  Fold the journals left next to a saved file into it, so it can be read
+  like any other. Works on the saved data and needs no circuit, which
+  suits the gui format. Returns False if there was nothing to fold
+  """
+  journal_paths = [journal_path for journal_path in _journal_paths(path)
+                   if os.path.exists(journal_path)]
+  if not any(os.path.getsize(journal_path) for journal_path in journal_paths):
+    return False
+
+  data = read_circuit_file(path) if os.path.exists(path) else {"components": [], "wires": []}
+  data.setdefault("positions", {})
+  sequence = data.get("sequence", 0)
+  for journal_path in journal_paths:
+    for record in _read_journal(journal_path):
+      if record[0] > sequence:
+        sequence = record[0]
+        _replay_data(data, record[1], record[2:])
+  data["sequence"] = sequence
+
+  write_circuit_file(path, data, sync=True)
+  for journal_path in journal_paths:
+    os.remove(journal_path)
+  return True
+
+
+def recover(path: str) -> Tuple[Circuit, Dict[str, Position], int]:
+  """
+  Circuit, component positions and last sequence number from the snapshot
+  at path with the journal replayed on top. Missing files count as empty
+  """
+  positions: Dict[str, Position] = {}
+  sequence = 0
+
+  def snapshot_records():
+    nonlocal sequence
+    for key, record in stream_circuit_file(path):
+      if key == "positions":
+        positions.update((cid, tuple(position)) for cid, position in record.items())
+      elif key == "sequence":
+        sequence = record
+      else:
+        yield key, record
+
+  circuit = circuit_from_records(snapshot_records()) if os.path.exists(path) else Circuit()
+
+  for journal_path in _journal_paths(path):
+    for record in _read_journal(journal_path):
+      if record[0] > sequence:
+        sequence = record[0]
+        _replay(circuit, positions, record[1], record[2:])
+
+  return circuit, positions, sequence
+
+
+def _journal_paths(path: str) -> Tuple[str, str]:
+  """
+  Journal files of a saved file, the rotated one first
+  """
+  return path + JOURNAL_EXTENSION + ".old", path + JOURNAL_EXTENSION
+
+
+def _read_journal(path: str):
+  """
+  Records of a journal file. A crash can leave the last line half written,
+  it is dropped
+  """
+  if not os.path.exists(path):
+    return
+  with open(path, "r", encoding="utf-8") as f:
+    for line in f:
+      try:
+        yield json.loads(line)
+      except json.JSONDecodeError:
+        if line.endswith("\n"):
+          raise
+        return
+
+
+def _replay(circuit: Circuit, positions: Dict[str, Position], op: str, args: List[Any]) -> None:
+  if op == "add":
+    circuit.add_component(component_from_json(args[0]))
+  elif op == "delete":
+    circuit.delete_component(circuit.components[args[0]])
+    positions.pop(args[0], None)
+  elif op == "wire":
+    circuit.add_wire(Wire(**args[0]))
+  elif op == "unwire":
+    data = args[0]
+    key = (data["src_id"], data["src_pin"], data["dst_pin"])
+    for wire in circuit.fanin(data["dst_id"]):
+      if (wire.src_id, wire.src_pin, wire.dst_pin) == key:
+        circuit.delete_wire(wire)
+        break
+  elif op == "move":
+    positions[args[0]] = (args[1], args[2])
+  elif op == "reset":
+    for wire in list(circuit.wires):
+      circuit.delete_wire(wire)
+  else:
+    raise ValueError(f"unknown journal record: {op}")
+
+
+def _replay_data(data: Dict[str, Any], op: str, args: List[Any]) -> None:
+  """
+  Apply a journal record to saved circuit data. Components are keyed by
+  "cid" in the serializer format and by "id" in the gui format
+  """
+  components, wires = data["components"], data["wires"]
+
+  def key(component: Dict[str, Any]) -> str:
+    return component["cid"] if "cid" in component else component["id"]
+
+  if op == "add":
+    data["components"] = [comp for comp in components if key(comp) != key(args[0])] + [args[0]]
+  elif op == "delete":
+    data["components"] = [comp for comp in components if key(comp) != args[0]]
+    data["wires"] = [wire for wire in wires if args[0] not in (wire["src_id"], wire["dst_id"])]
+    data["positions"].pop(args[0], None)
+  elif op == "wire":
+    wires.append(args[0])
+  elif op == "unwire":
+    endpoints = ("src_id", "src_pin", "dst_id", "dst_pin")
+    for i, wire in enumerate(wires):
+      if all(wire[name] == args[0][name] for name in endpoints):
+        del wires[i]
+        break
+  elif op == "move":
+    data["positions"][args[0]] = [args[1], args[2]]
+    for comp in components:
+      if key(comp) == args[0] and "pos" in comp:
+        comp["pos"] = [args[1], args[2]]
+  elif op == "reset":
+    wires.clear()
+  else:
+    raise ValueError(f"unknown journal record: {op}")
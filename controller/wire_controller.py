@@ -52,8 +52,8 @@ class WireController:
     # TODO switch over to using commands for this
 
     wire = Wire(self.start_pin.pid, self.start_pin.pin_name, end_pin.pid, end_pin.pin_name) # type: ignore
-    self.circuit.wires.append(wire)
-    event_bus.publish("wire_committed")
+    acyclic = self.circuit.add_wire(wire)
+    event_bus.publish("wire_committed", {"wire": wire, "acyclic": acyclic})
 
   def update_preview(self, event: Event):
     """
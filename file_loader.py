@@ -1,12 +1,14 @@
-"""Module to load circuit based on json file"""
+"""Module to load circuit based on json or binary file"""
 
-import json
+import os
 import re
 
 import window_helpers as wh
 from andgate import AndGate
 from circuit import Wire
+from model.library_index import DEFAULT_DIRECTORY
 from pin import GUIPin
+from utils.circuit_file import stream_circuit_file
 from wire import GUICanvasWire
 
 
@@ -14,72 +16,30 @@ class FileLoader:
     """Class to handle reading and reconstructing circuit data"""
 
     def __init__(
-        self, file_name, circuit, canvas, window
-    ):  # pylint: disable=too-many-locals
+        self, file_name, circuit, canvas, window, directory=DEFAULT_DIRECTORY
+    ):  # pylint: disable=too-many-locals,too-many-arguments
         # TODO for the love of god move most of this from init into their own functions
         self.file_name = file_name
         self.circuit = circuit
         self.canvas = canvas
         self.window = window
 
-        # Open json save file
-        with open(f"components/{file_name}", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        self.circuit_name = None
 
-        # Instatiate highest level json elements
-        self.circuit_name = data["name"]
-        self.components = data["components"]
-        self.wires = data["wires"]
-
-        # Create component lookup dictionary
-        self.component_lookup = {d["id"]: d for d in self.components}
-
-        # create each gui component replace placeholder in lookup table
-        for component_data in self.components:
-            self.instantiate_component(component_data, self.canvas, self.window)
+        # Read the save file a record at a time, json or binary depending on
+        # the extension, and build each component and wire as it arrives
+        for key, record in stream_circuit_file(os.path.join(directory, file_name)):
+            if key == "name":
+                self.circuit_name = record
+            elif key == "components":
+                self.instantiate_component(record, self.canvas, self.window)
+            elif key == "wires":
+                self.instantiate_wire(record, circuit, canvas, window)
 
         print("----------------")
         self.window.circuit.print_topological_order()
         print("----------------")
 
-        # create each wire
-        for wire_data in self.wires:
-            src_id = wire_data["src_id"]
-            src_pin = wire_data["src_pin"]
-            dst_id = wire_data["dst_id"]
-            dst_pin = wire_data["dst_pin"]
-            path = wire_data["path"]
-
-            print(
-                f"src_id: {src_id}, src_pin: {src_pin}, dst_id: {dst_id}, dst_pin: {dst_pin}"
-            )
-
-            # Create logical wire
-            wire = Wire(src_id, src_pin, dst_id, dst_pin, path)
-            circuit.connect(wire)
-
-            src_id_obj = self.window.pin_lookup[(src_id, src_pin)]
-            dst_id_obj = self.window.pin_lookup[(dst_id, dst_pin)]
-
-            # Create Gui Wire
-            gui_wire = GUICanvasWire(canvas, src_id_obj, dst_id_obj)
-            for i in range(len(path) - 1):
-                x0, y0 = path[i]
-                x1, y1 = path[i + 1]
-                line = wh.draw_line(canvas, x0, y0, x1, y1, fill="black", width=3)
-                self.canvas.tag_lower(line)
-                gui_wire.line_segs.append(line)
-                self.canvas.tag_bind(line, "<Button-1>", gui_wire.add_ghost_node)
-                gui_wire.path.append((x0, y0))
-
-            gui_wire.path.append(path[-1])
-
-            src_id_obj.wire.append(gui_wire)
-            dst_id_obj.wire.append(gui_wire)
-
-            window.wire_lookup.setdefault((src_id, dst_id), []).append(gui_wire)
-            window.gui_lookup[src_id].wire = gui_wire
-
         # Set focus back on canvas
         self.window.canvas.focus_set()
 
@@ -90,6 +50,44 @@ class FileLoader:
         ]
         self.window.id_generator.counter = max(comp_nums) + 1
 
+    def instantiate_wire(self, wire_data, circuit, canvas, window):
+        """Creates the logical and gui wire for the given wire data"""
+        src_id = wire_data["src_id"]
+        src_pin = wire_data["src_pin"]
+        dst_id = wire_data["dst_id"]
+        dst_pin = wire_data["dst_pin"]
+        path = wire_data["path"]
+
+        print(
+            f"src_id: {src_id}, src_pin: {src_pin}, dst_id: {dst_id}, dst_pin: {dst_pin}"
+        )
+
+        # Create logical wire
+        wire = Wire(src_id, src_pin, dst_id, dst_pin, path)
+        circuit.connect(wire)
+
+        src_id_obj = window.pin_lookup[(src_id, src_pin)]
+        dst_id_obj = window.pin_lookup[(dst_id, dst_pin)]
+
+        # Create Gui Wire
+        gui_wire = GUICanvasWire(canvas, src_id_obj, dst_id_obj)
+        for i in range(len(path) - 1):
+            x0, y0 = path[i]
+            x1, y1 = path[i + 1]
+            line = wh.draw_line(canvas, x0, y0, x1, y1, fill="black", width=3)
+            canvas.tag_lower(line)
+            gui_wire.line_segs.append(line)
+            canvas.tag_bind(line, "<Button-1>", gui_wire.add_ghost_node)
+            gui_wire.path.append((x0, y0))
+
+        gui_wire.path.append(path[-1])
+
+        src_id_obj.wire.append(gui_wire)
+        dst_id_obj.wire.append(gui_wire)
+
+        window.wire_lookup.setdefault((src_id, dst_id), []).append(gui_wire)
+        window.gui_lookup[src_id].wire = gui_wire
+
     def instantiate_component(self, comp_data, canvas, window):
         """Instatiates given component based on its component data"""
         comp_id = comp_data["id"]
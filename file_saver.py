@@ -1,17 +1,22 @@
-"""Module to save current circuit as a json file"""
+"""Module to save current circuit as a json or binary file"""
 
-import json
+import os
+
+from model.library_index import DEFAULT_DIRECTORY, check_file_name
+from utils.circuit_file import write_circuit_file
 
 
 class FileSaver:
-    """Simple class to save current circuit in json"""
+    """
+    Simple class to save current circuit, files ending in .lgb are binary.
+    file_name must be a plain file name inside directory, ValueError otherwise
+    """
 
-    def __init__(self, file_name, circuit, name):
-        # TODO add better file path management
-        with open(f"components/{file_name}", "w", encoding="utf-8") as f:
-            data = {
-                "name": name,
-                **circuit.to_dict(),  # merge the rest of the circuit data
-            }
+    def __init__(self, file_name, circuit, name, directory=DEFAULT_DIRECTORY):
+        check_file_name(file_name)
+        data = {
+            "name": name,
+            **circuit.to_dict(),  # merge the rest of the circuit data
+        }
 
-            json.dump(data, f, indent=2)
+        write_circuit_file(os.path.join(directory, file_name), data)
@@ -2,10 +2,12 @@
 circuit.py
 """
 
-from collections import defaultdict, deque
-from typing import Dict, List, DefaultDict
-from model.component import Component
+import heapq
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, DefaultDict, Tuple
+from model.component import Component, ComponentType
 from model.wire import Wire
+from utils.topo_order import TopologicalOrder
 
 
 class Circuit:
@@ -20,6 +22,37 @@ class Circuit:
     self.components = {}
     self.wires = []
 
+    # fan-out/fan-in index: component id -> wires leaving/entering it
+    self._fanout: DefaultDict[str, List[Wire]] = defaultdict(list)
+    self._fanin: DefaultDict[str, List[Wire]] = defaultdict(list)
+    self._indexed_wires = 0
+
+    # evaluation order, kept up to date on every edit. Wires that would
+    # close a combinational loop are left out of it and kept in _cyclic
+    self._order = TopologicalOrder()
+    self._cyclic: List[Wire] = []
+
+    # bumped on every structural edit, lets evaluation results be reused
+    self._revision = 0
+    self._evaluated_revision: Any = -1
+    # subcircuit instances by id, their definitions are part of version
+    self._instances: Dict[str, Component] = {}
+    self._engines: Dict[str, Tuple[int, Any]] = {}
+
+    # objects told about every edit, see add_listener
+    self._listeners: List[Any] = []
+    self._interpreter: Any = None
+
+  def __getstate__(self):
+    # engines, listeners and the interpreter belong to this process, a copy
+    # builds its own
+    state = self.__dict__.copy()
+    state["_evaluated_revision"] = -1
+    state["_engines"] = {}
+    state["_listeners"] = []
+    state["_interpreter"] = None
+    return state
+
   def __str__(self):
     print_out = "-------------------------------------- \n"
     for key, comp in self.components.items():
@@ -44,42 +77,214 @@ class Circuit:
         Adds component to circuit
         """
     self.components[component.id] = component
+    self._order.add_node(component.id)
+    self._revision += 1
+    if component.type is ComponentType.SUBCIRCUIT:
+      self._instances[component.id] = component
+    # wires added before the component went in could not be ordered yet
+    for wire in self._fanout.get(component.id, ()):
+      self._order_wire(wire)
+    for wire in self._fanin.get(component.id, ()):
+      if wire.src_id != component.id:
+        self._order_wire(wire)
+    self._notify("component_added", component)
 
-  def delete_component(self, component: Component) -> None:
+  def delete_component(self, component: Component) -> List[Wire]:
     """
-        Deletes a component
+        Deletes a component along with every wire attached to it.
+        Returns the removed wires so callers can restore them.
         """
+    self._sync_wires()
     del self.components[component.id]
+    self._instances.pop(component.id, None)
+    self._order.remove_node(component.id)
+    self._revision += 1
 
-  def _topological_sort(self) -> List:
+    attached = self._fanout.pop(component.id, []) + self._fanin.pop(component.id, [])
+    removed = []
+    for wire in attached:
+      if wire in removed:  # self loop shows up in both lists
+        continue
+      removed.append(wire)
+      if wire.src_id != component.id:
+        self._fanout[wire.src_id].remove(wire)
+      if wire.dst_id != component.id:
+        self._fanin[wire.dst_id].remove(wire)
+
+    if removed:
+      self.wires = [w for w in self.wires if w.src_id != component.id and w.dst_id != component.id]
+      self._indexed_wires = len(self.wires)
+      self._cyclic = [w for w in self._cyclic if w not in removed]
+      self._retry_cyclic()
+
+    self._notify("component_deleted", component, removed)
+    return removed
+
+  def add_wire(self, wire: Wire) -> bool:
     """
-        Basic topological sort
+        Adds a wire to the circuit and indexes it. Returns False if the wire
+        closes a combinational loop, raises ValueError if its width does not
+        match the pins it connects
         """
-    # TODO figure out better thing than topo sort this shit doodoo
+    self._sync_wires()
+    for cid, pin in ((wire.src_id, wire.src_pin), (wire.dst_id, wire.dst_pin)):
+      component = self.components.get(cid)
+      width = component.pin_width(pin) if component is not None else None
+      if width is not None and width != wire.width:
+        raise ValueError(f"{wire.width} bit wire on {width} bit pin {cid}.{pin}")
 
-    graph: DefaultDict[List] = defaultdict(list)
-    in_degree: DefaultDict[int] = defaultdict(int)
+    self.wires.append(wire)
+    self._indexed_wires += 1
+    return self._index_wire(wire)
 
-    for cid in self.components:
-      in_degree[cid] = 0
+  def delete_wire(self, wire: Wire) -> None:
+    """
+        Removes a wire from the circuit
+        """
+    self._sync_wires()
+    self.wires.remove(wire)
+    self._fanout[wire.src_id].remove(wire)
+    self._fanin[wire.dst_id].remove(wire)
+    self._indexed_wires -= 1
+    self._revision += 1
 
-    for wire in self.wires:
-      graph[wire.src_id].append(wire.dst_id)
-      in_degree[wire.dst_id] += 1
+    if wire in self._cyclic:
+      self._cyclic.remove(wire)
+    else:
+      self._order.remove_edge(wire.src_id, wire.dst_id)
+      self._retry_cyclic()
 
-    queue = deque([cid for cid, deg in in_degree.items() if deg == 0])
-    sorted_order = []
+    self._notify("wire_deleted", wire)
 
-    while queue:
-      cid = queue.popleft()
-      sorted_order.append(cid)
+  def add_listener(self, listener: Any) -> None:
+    """
+        Register an object to be told about edits. Listeners implement
+        component_added, component_deleted, wire_added, wire_deleted and
+        circuit_reset, the last one fires when the wire index is rebuilt
+        """
+    self._listeners.append(listener)
+
+  def remove_listener(self, listener: Any) -> None:
+    """
+        Stop telling a listener about edits
+        """
+    self._listeners.remove(listener)
+
+  def _notify(self, event: str, *args) -> None:
+    for listener in self._listeners:
+      getattr(listener, event)(*args)
+
+  @property
+  def revision(self) -> int:
+    """
+        Counter that changes whenever components or wires are edited
+        """
+    self._sync_wires()
+    return self._revision
+
+  @property
+  def version(self) -> Any:
+    """
+        Revision together with the versions of the subcircuit definitions
+        in use, so it also changes when one of those is edited or reloaded.
+        Cached engines and evaluation results are keyed by it
+        """
+    revision = self.revision
+    if not self._instances:
+      return revision
+    definitions = {id(instance.definition): instance.definition
+                   for instance in self._instances.values()}
+    return revision, tuple(definition.version for definition in definitions.values())
+
+  @property
+  def cyclic_wires(self) -> List[Wire]:
+    """
+        Wires that close a combinational loop and are ignored when ordering
+        """
+    self._sync_wires()
+    return list(self._cyclic)
+
+  def has_cycle(self) -> bool:
+    """
+        True if the circuit contains a combinational loop
+        """
+    return bool(self.cyclic_wires)
+
+  def fanout(self, cid: str) -> List[Wire]:
+    """
+        Wires leaving the given component
+        """
+    self._sync_wires()
+    return self._fanout.get(cid, [])
+
+  def fanin(self, cid: str) -> List[Wire]:
+    """
+        Wires entering the given component
+        """
+    self._sync_wires()
+    return self._fanin.get(cid, [])
+
+  def _index_wire(self, wire: Wire) -> bool:
+    self._fanout[wire.src_id].append(wire)
+    self._fanin[wire.dst_id].append(wire)
+    self._revision += 1
+    acyclic = self._order_wire(wire)
+    self._notify("wire_added", wire)
+    return acyclic
+
+  def _order_wire(self, wire: Wire) -> bool:
+    """
+        Add the ordering edge of a wire. Wires whose ends are not both
+        components yet are left out, a sequential component's state only
+        changes on the clock so wires into one are not ordering edges either.
+        Returns False and keeps the wire in _cyclic if it closes a loop
+        """
+    src = self.components.get(wire.src_id)
+    dst = self.components.get(wire.dst_id)
+    if src is None or dst is None or dst.sequential:
+      return True
+    if self._order.add_edge(wire.src_id, wire.dst_id):
+      return True
+    self._cyclic.append(wire)
+    return False
+
+  def _retry_cyclic(self) -> None:
+    """
+        Removing wires can break a loop, so give rejected wires another go
+        """
+    self._cyclic = [w for w in self._cyclic if not self._order.add_edge(w.src_id, w.dst_id)]
+
+  def _sync_wires(self) -> None:
+    """
+        Picks up wires appended straight onto self.wires instead of going
+        through add_wire. Anything else rebuilds the whole index.
+        """
+    count = len(self.wires)
+    if count == self._indexed_wires:
+      return
 
-      for neighbor in graph[cid]:
-        in_degree[neighbor] -= 1
-        if in_degree[neighbor] == 0:
-          queue.append(neighbor)
+    if count < self._indexed_wires:
+      self._fanout.clear()
+      self._fanin.clear()
+      self._cyclic.clear()
+      self._order = TopologicalOrder()
+      for cid in self.components:
+        self._order.add_node(cid)
+      self._indexed_wires = 0
 
-    return sorted_order
+      self._notify("circuit_reset")
+
+    for wire in self.wires[self._indexed_wires:]:
+      self._index_wire(wire)
+    self._indexed_wires = count
+
+  def _topological_sort(self) -> List:
+    """
+        Evaluation order. Maintained incrementally, so this is free unless
+        wires were appended to self.wires directly
+        """
+    self._sync_wires()
+    return self._order.order()
 
   def evaluate(self):
     """
@@ -87,19 +292,185 @@ class Circuit:
         """
     # TODO figure out how I want to update the guis based on these
 
-    for comp in self.components.values():
-      if comp.type != "INPUT":
-        for pin in comp.inputs.keys():
-          comp.inputs[pin] = False
-
-    order = self._topological_sort()
-    for cid in order:
-      component = self.components[cid]
-      component.compute()
-      
-      for wire in [w for w in self.wires if w.src_id == cid]:
-        dst_comp_id, dst_pin_name = wire.dst_id, wire.dst_pin
-        value = component.outputs[wire.src_pin]
-        self.components[dst_comp_id].inputs[dst_pin_name] = (
-          self.components[dst_comp_id].inputs[dst_pin_name] or value
-        )
+    nets = self.nets()
+    for cells, index in nets.floating:
+      cells[index] = False
+
+    components = self.components
+    ready = nets.ready
+    for cid in self._topological_sort():
+      components[cid].compute()
+      for net in ready.get(cid, ()):
+        net.update()
+
+    self._evaluated_revision = self.version
+
+  def set_input(self, cid: str, value: bool, pin: str = "OUT") -> None:
+    """
+        Drive an input component and update the circuit event driven. Only
+        the fan-out cone of the input is recomputed, stopping at components
+        whose outputs do not change. Falls back to a full evaluate if the
+        circuit was edited since it was last evaluated
+        """
+    component = self.components[cid]
+    if self._evaluated_revision != self.version:
+      component.outputs[pin] = value
+      self.evaluate()
+      return
+
+    if component.outputs[pin] == value:
+      return
+    component.outputs[pin] = value
+    self.propagate([cid])
+
+  def propagate(self, changed: List[str]) -> None:
+    """
+        Push output changes of the given components through their fan-out
+        in topological order
+        """
+    components = self.components
+    position = self._order.position
+    driven = self.nets().driven
+    queue = []
+    queued = set()
+
+    def schedule(cid: str) -> None:
+      for net in driven.get(cid, ()):
+        if net.update():
+          for dst in net.loads:
+            if dst not in queued:
+              queued.add(dst)
+              heapq.heappush(queue, (position(dst), dst))
+
+    for cid in changed:
+      schedule(cid)
+
+    while queue:
+      _, cid = heapq.heappop(queue)
+      components[cid].compute()
+      schedule(cid)
+
+  def sequential_components(self) -> List[Component]:
+    """
+        Clocked components, see model.component.SequentialComponent
+        """
+    return [component for component in self.components.values() if component.sequential]
+
+  def clock(self) -> None:
+    """
+        One clock cycle: every sequential component latches its next state
+        from the settled circuit, then the new state is propagated
+        """
+    if self._evaluated_revision != self.version:
+      self.evaluate()
+
+    latched = [(component, component.next_state()) for component in self.sequential_components()]
+    changed = []
+    for component, state in latched:
+      if state != component.state:
+        component.state = state
+        component.compute()
+        changed.append(component.id)
+    self.propagate(changed)
+
+  def run_cycles(self, cycles: int) -> None:
+    """
+        Run the given number of clock cycles with the input components held
+        at their current values. The combinational logic is compiled, see
+        simulation.sequential, and state is only written back to the
+        components at the end
+        """
+    from simulation.sequential import CompiledSequential  # pylint: disable=import-outside-toplevel
+    engine = self._engine("sequential", CompiledSequential)
+
+    components = self.components
+    inputs = tuple(components[cid].outputs["OUT"] for cid in engine.inputs)
+    state = tuple(bit for cid in engine.registers for bit in components[cid].state)
+    state = engine.run(inputs, state, cycles)
+
+    offset = 0
+    for cid in engine.registers:
+      component = components[cid]
+      width = len(component.state)
+      component.state = state[offset:offset + width]
+      offset += width
+    self.evaluate()
+
+  def evaluate_batch(self, stimulus, chunk_size: int = 1 << 16):
+    """
+        Evaluate many input vectors at once with numpy. stimulus is a
+        (n_vectors x n_inputs) array whose columns follow the order the input
+        components were added in. Returns a structured array with one boolean
+        field per output component id
+        """
+    from simulation.batch import BatchSimulator  # pylint: disable=import-outside-toplevel
+    return self._engine("batch", BatchSimulator).run(stimulus, chunk_size)
+
+  def simulate_batch(self, stimulus, workers: int | None = None, chunk_size: int = 4096):
+    """
+        Evaluate a stream of input vectors across worker processes, see
+        simulation.parallel. Yields output vectors in stimulus order
+        """
+    from simulation.parallel import simulate_batch  # pylint: disable=import-outside-toplevel
+    return simulate_batch(self, stimulus, workers, chunk_size)
+
+  def compile(self):
+    """
+        Circuit compiled to a straight-line Python function, see
+        simulation.compiler. Recompiled only after the circuit is edited
+        """
+    from simulation.compiler import CompiledCircuit  # pylint: disable=import-outside-toplevel
+    return self._engine("compiled", CompiledCircuit)
+
+  def four_valued(self):
+    """
+        0/1/X/Z simulator for this circuit, see simulation.four_valued.
+        Rebuilt after edits, which puts its flip-flops back to X
+        """
+    # pylint: disable-next=import-outside-toplevel
+    from simulation.four_valued import FourValuedSimulator
+    return self._engine("four_valued", FourValuedSimulator)
+
+  def flattened(self) -> "Circuit":
+    """
+        This circuit with subcircuit instances inlined, see
+        simulation.flatten. Cached until the circuit is edited
+        """
+    from simulation.flatten import flatten  # pylint: disable=import-outside-toplevel
+    return self._engine("flat", flatten)
+
+  def optimized(self) -> "Circuit":
+    """
+        Optimized copy of this circuit, see simulation.optimize. Cached
+        until the circuit is edited
+        """
+    from simulation.optimize import optimize  # pylint: disable=import-outside-toplevel
+    return self._engine("optimized", optimize)
+
+  def interpreter(self):
+    """
+        Instruction array interpreter for this circuit, see simulation.vm.
+        It is patched in place as the circuit is edited
+        """
+    from simulation.vm import CircuitVM  # pylint: disable=import-outside-toplevel
+    if self._interpreter is None:
+      self._interpreter = CircuitVM(self)
+    return self._interpreter
+
+  def nets(self):
+    """
+        Nets of this circuit, see model.net. Rebuilt only after edits
+        """
+    from model.net import NetIndex  # pylint: disable=import-outside-toplevel
+    return self._engine("nets", NetIndex)
+
+  def _engine(self, name: str, build: Callable[["Circuit"], Any]) -> Any:
+    """
+        Simulation engine built from this circuit, rebuilt only after edits
+        """
+    version = self.version
+    cached = self._engines.get(name)
+    if cached is None or cached[0] != version:
+      cached = (version, build(self))
+      self._engines[name] = cached
+    return cached[1]
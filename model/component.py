@@ -2,16 +2,122 @@
 component.py
 """
 
-from typing import Dict
+import sys
+from collections.abc import MutableMapping
+from enum import Enum
+from typing import Dict, Iterator, List, Tuple
+
+
+class ComponentType(str, Enum):
+  """Component types. Members compare and hash equal to their names"""
+
+  AND = "AND"
+  OR = "OR"
+  NOT = "NOT"
+  INPUT = "INPUT"
+  OUTPUT = "OUTPUT"
+  SUBCIRCUIT = "SUBCIRCUIT"
+  DFF = "DFF"
+  REGISTER = "REGISTER"
+  COUNTER = "COUNTER"
+  ADD = "ADD"
+  MUX = "MUX"
+  COMPARE = "COMPARE"
+  BUS_AND = "BUS_AND"
+  BUS_OR = "BUS_OR"
+  BUS_XOR = "BUS_XOR"
+  BUS_NOT = "BUS_NOT"
+  SPLIT = "SPLIT"
+  MERGE = "MERGE"
+
+  def __str__(self):
+    return self.value
+
+
+class PinLayout:  # pylint: disable=too-few-public-methods
+  """
+  Pin names of a component and the index of each pin's value in the
+  component's cells, inputs first then outputs. Layouts are interned so every
+  component with the same pins shares one
+  """
+
+  __slots__ = ("inputs", "outputs", "input_index", "output_index")
+
+  _interned: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], "PinLayout"] = {}
+
+  def __init__(self, inputs: Tuple[str, ...], outputs: Tuple[str, ...]):
+    self.inputs = inputs
+    self.outputs = outputs
+    self.input_index = {name: i for i, name in enumerate(inputs)}
+    self.output_index = {name: i + len(inputs) for i, name in enumerate(outputs)}
+
+  @classmethod
+  def get(cls, inputs, outputs) -> "PinLayout":
+    """
+    Shared layout for the given pin names
+    """
+    key = (tuple(inputs), tuple(outputs))
+    layout = cls._interned.get(key)
+    if layout is None:
+      key = (tuple(map(sys.intern, key[0])), tuple(map(sys.intern, key[1])))
+      layout = cls._interned[key] = cls(*key)
+    return layout
+
+  def __reduce__(self):
+    # unpickled components share the interned layout again
+    return pin_layout, (self.inputs, self.outputs)
+
+
+def pin_layout(inputs: Tuple[str, ...], outputs: Tuple[str, ...]) -> PinLayout:
+  """
+  Shared layout for the given pin names, see PinLayout.get
+  """
+  return PinLayout.get(inputs, outputs)
+
+
+class PinMap(MutableMapping):
+  """
+  Dict-like view of some of a component's pin values, keyed by pin name.
+  Pins can be read and written but not added or removed
+  """
+
+  __slots__ = ("_cells", "_index")
+
+  def __init__(self, cells: List[bool], index: Dict[str, int]):
+    self._cells = cells
+    self._index = index
+
+  def __getitem__(self, name: str) -> bool:
+    return self._cells[self._index[name]]
+
+  def __setitem__(self, name: str, value: bool) -> None:
+    self._cells[self._index[name]] = value
+
+  def __delitem__(self, name: str) -> None:
+    raise TypeError("component pins cannot be removed")
+
+  def __iter__(self) -> Iterator[str]:
+    return iter(self._index)
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+  def __repr__(self):
+    return repr(dict(self.items()))
 
 
 class Component:
   """Component base class"""
 
+  __slots__ = ("id", "type", "layout", "cells")
+
   id: str
-  type: str
-  inputs: Dict[str, bool]
-  outputs: Dict[str, bool]
+  type: ComponentType | str
+  layout: PinLayout
+  cells: List[bool]
+
+  # sequential components only change on a clock edge, see SequentialComponent
+  sequential = False
 
   def __init__(
       self,
@@ -21,10 +127,37 @@ class Component:
       outputs: Dict[str, bool] | None = None,
   ):
 
+    inputs = inputs or {}
+    outputs = outputs or {}
     self.id = cid
-    self.type = type
-    self.inputs = inputs or {}
-    self.outputs = outputs or {}
+    try:
+      self.type = ComponentType(type)
+    except ValueError:
+      # types this version does not know, say from a newer file, stay strings
+      self.type = type
+    self.layout = PinLayout.get(inputs, outputs)
+    # concatenating sizes the list exactly, unpacking into a display leaves
+    # room to grow that a gate never uses
+    self.cells = list(inputs.values()) + list(outputs.values())
+
+  @property
+  def inputs(self) -> PinMap:
+    """Input pin values by pin name"""
+    return PinMap(self.cells, self.layout.input_index)
+
+  @property
+  def outputs(self) -> PinMap:
+    """Output pin values by pin name"""
+    return PinMap(self.cells, self.layout.output_index)
+
+  def clear_inputs(self) -> None:
+    """Set every input pin to False"""
+    count = len(self.layout.inputs)
+    self.cells[:count] = [False] * count
+
+  def pin_width(self, pin: str) -> int | None:  # pylint: disable=unused-argument
+    """Bits carried by a pin, None if it takes whatever it is wired to"""
+    return 1
 
   def compute(self) -> None:
     """Base compute function overide in subclasses"""
@@ -34,9 +167,9 @@ class Component:
     """Torn object into json serializable format"""
     return {
         "cid": self.id,
-        "type": self.type,
-        "inputs": self.inputs,
-        "outputs": self.outputs,
+        "type": str(self.type),
+        "inputs": dict(self.inputs.items()),
+        "outputs": dict(self.outputs.items()),
     }
 
 
@@ -45,11 +178,14 @@ class AndComponent(Component):
     And Component
     """
 
+  __slots__ = ()
+
   def __init__(self, cid):
     super().__init__(cid, "AND", {"A": False, "B": False}, {"OUT": False})
 
   def compute(self):
-    self.outputs["OUT"] = self.inputs["A"] and self.inputs["B"]
+    cells = self.cells
+    cells[2] = cells[0] and cells[1]
 
 
 class OrComponent(Component):
@@ -57,11 +193,14 @@ class OrComponent(Component):
     And Component
     """
 
+  __slots__ = ()
+
   def __init__(self, cid):
     super().__init__(cid, "OR", {"A": False, "B": False}, {"OUT": False})
 
   def compute(self):
-    self.outputs["OUT"] = self.inputs["A"] or self.inputs["B"]
+    cells = self.cells
+    cells[2] = cells[0] or cells[1]
 
 
 class NotComponent(Component):
@@ -69,11 +208,13 @@ class NotComponent(Component):
     Not Component
     """
 
+  __slots__ = ()
+
   def __init__(self, cid):
     super().__init__(cid, "NOT", {"IN": False}, {"OUT": True})
 
   def compute(self):
-    self.outputs["OUT"] = not self.inputs["IN"]
+    self.cells[1] = not self.cells[0]
 
 
 class InputComponent(Component):
@@ -81,9 +222,14 @@ class InputComponent(Component):
     Input Component
     """
 
+  __slots__ = ()
+
   def __init__(self, cid):
     super().__init__(cid, "INPUT", {}, {"OUT": False})
 
+  def pin_width(self, pin):
+    return None
+
   def compute(self):
     pass
 
@@ -93,28 +239,299 @@ class OutputComponent(Component):
     Output Component
     """
 
+  __slots__ = ()
+
   def __init__(self, cid):
     super().__init__(cid, "OUTPUT", {"IN": False}, {})
 
+  def pin_width(self, pin):
+    return None
+
   def compute(self):
-    return self.inputs["IN"]
+    return self.cells[0]
 
 
-class SubcircuitComponent(Component):  # pylint: disable=missing-class-docstring, abstract-method
-  # TODO implement this at some point
+class SubcircuitComponent(Component):
+  """
+    Instance of a subcircuit definition. Every instance shares the same
+    parsed definition, see model.library
+    """
+
+  __slots__ = ("definition",)
 
-  def __init__(self, cid, sub_circuit, interface_map):  # pylint: disable=useless-parent-delegation
-    super().__init__(cid, "SUBCIRCUIT")
-    self.sub_circuit = sub_circuit
-    self.interface_map = interface_map  # eg {"A": ("node_1", "OUT"), ...}
+  def __init__(self, cid, definition):
+    super().__init__(
+        cid,
+        "SUBCIRCUIT",
+        {port: False for port in definition.inputs},
+        {port: False for port in definition.outputs},
+    )
+    self.definition = definition
 
   def compute(self):
-    for ext_pin, (int_id, int_pin) in self.interface_map["inputs"].items():
-      self.sub_circuit.components[int_id].inputs[int_pin].value = self.inputs[
-          ext_pin].value
+    count = len(self.layout.inputs)
+    cells = self.cells
+    cells[count:] = self.definition.evaluate(tuple(cells[:count]))
+
+  def to_dict(self):
+    data = super().to_dict()
+    definition = self.definition
+    if definition.path is not None:
+      data["definition"] = definition.path
+    else:
+      # never saved to a file, so the definition is written out inline
+      data["definition"] = {
+          "name": definition.name,
+          "inputs": list(definition.inputs),
+          "outputs": list(definition.outputs),
+          **definition.circuit.to_dict(),
+      }
+    return data
+
+
+class SequentialComponent(Component):
+  """
+    Clocked component. compute only drives the outputs from the stored
+    state, clock latches the next state from the inputs. Wires into a
+    sequential component are not evaluation order edges, so feedback through
+    one is not a combinational loop
+    """
+
+  __slots__ = ("state",)
+
+  sequential = True
+
+  def __init__(self, cid, type, inputs, outputs):  # pylint: disable=redefined-builtin
+    super().__init__(cid, type, inputs, outputs)
+    self.state = tuple(outputs.values())
+
+  def compute(self):
+    self.cells[len(self.layout.inputs):] = self.state
+
+  def clock(self) -> None:
+    """Latch the next state"""
+    self.state = self.next_state()
+
+  def next_state(self) -> Tuple[bool, ...]:
+    """State after the next clock edge, from the current inputs"""
+    raise NotImplementedError
+
+  def to_dict(self):
+    data = super().to_dict()
+    data["width"] = len(self.state)
+    return data
 
-    self.sub_circuit.evaluate()
 
-    for ext_pin, (int_id, int_pin) in self.interface_map["outputs"].items():
-      self.outputs[ext_pin].value = (
-          self.sub_circuit.components[int_id].outputs[int_pin].value)
+class DffComponent(SequentialComponent):
+  """
+    D flip-flop
+    """
+
+  __slots__ = ()
+
+  def __init__(self, cid):
+    super().__init__(cid, "DFF", {"D": False}, {"Q": False})
+
+  def next_state(self):
+    return (self.cells[0],)
+
+
+class RegisterComponent(SequentialComponent):
+  """
+    Register of width D flip-flops sharing one clock, pins D0/Q0 are the
+    least significant bit
+    """
+
+  __slots__ = ()
+
+  def __init__(self, cid, width=8):
+    super().__init__(
+        cid,
+        "REGISTER",
+        {f"D{i}": False for i in range(width)},
+        {f"Q{i}": False for i in range(width)},
+    )
+
+  def next_state(self):
+    return tuple(self.cells[:len(self.state)])
+
+
+class CounterComponent(SequentialComponent):
+  """
+    Binary up counter of width bits. Counts while EN is high, RST clears it
+    and wins over EN. Q0 is the least significant bit
+    """
+
+  __slots__ = ()
+
+  def __init__(self, cid, width=8):
+    super().__init__(cid, "COUNTER", {"EN": False, "RST": False},
+                     {f"Q{i}": False for i in range(width)})
+
+  def next_state(self):
+    enable, reset = self.cells[0], self.cells[1]
+    if reset:
+      return (False,) * len(self.state)
+    if not enable:
+      return self.state
+
+    bits = []
+    carry = True
+    for bit in self.state:
+      bits.append(bit != carry)
+      carry = bit and carry
+    return tuple(bits)
+
+
+class WordComponent(Component):
+  """
+    Component working on bus pins of width bits. Bus pin values are ints,
+    single bit pins stay bools
+    """
+
+  __slots__ = ("width", "mask")
+
+  # pins carrying a single bit, every other pin is width bits wide
+  bit_pins: Tuple[str, ...] = ()
+
+  # pylint: disable-next=redefined-builtin,too-many-arguments
+  def __init__(self, cid, type, inputs, outputs, width):
+    super().__init__(
+        cid,
+        type,
+        {pin: False if self._bit_pin(pin) else 0 for pin in inputs},
+        {pin: False if self._bit_pin(pin) else 0 for pin in outputs},
+    )
+    self.width = width
+    self.mask = (1 << width) - 1
+
+  def _bit_pin(self, pin: str) -> bool:
+    return pin in self.bit_pins
+
+  def pin_width(self, pin):
+    return 1 if self._bit_pin(pin) else self.width
+
+  def to_dict(self):
+    data = super().to_dict()
+    data["width"] = self.width
+    return data
+
+
+class AddComponent(WordComponent):
+  """
+    Adder, OUT = A + B + CIN with the carry out of the top bit on COUT
+    """
+
+  __slots__ = ()
+
+  bit_pins = ("CIN", "COUT")
+
+  def __init__(self, cid, width=8):
+    super().__init__(cid, "ADD", ("A", "B", "CIN"), ("OUT", "COUT"), width)
+
+  def compute(self):
+    cells = self.cells
+    total = (cells[0] & self.mask) + (cells[1] & self.mask) + bool(cells[2])
+    cells[3] = total & self.mask
+    cells[4] = total > self.mask
+
+
+class MuxComponent(WordComponent):
+  """
+    Two way multiplexer, OUT = B if SEL else A
+    """
+
+  __slots__ = ()
+
+  bit_pins = ("SEL",)
+
+  def __init__(self, cid, width=8):
+    super().__init__(cid, "MUX", ("A", "B", "SEL"), ("OUT",), width)
+
+  def compute(self):
+    cells = self.cells
+    cells[3] = (cells[1] if cells[2] else cells[0]) & self.mask
+
+
+class CompareComponent(WordComponent):
+  """
+    Unsigned comparator of A and B
+    """
+
+  __slots__ = ()
+
+  bit_pins = ("EQ", "LT", "GT")
+
+  def __init__(self, cid, width=8):
+    super().__init__(cid, "COMPARE", ("A", "B"), ("EQ", "LT", "GT"), width)
+
+  def compute(self):
+    cells = self.cells
+    a, b = cells[0] & self.mask, cells[1] & self.mask
+    cells[2] = a == b
+    cells[3] = a < b
+    cells[4] = a > b
+
+
+class BitwiseComponent(WordComponent):
+  """
+    Bitwise AND, OR, XOR or NOT over whole buses
+    """
+
+  __slots__ = ()
+
+  OPERATIONS = ("AND", "OR", "XOR", "NOT")
+
+  def __init__(self, cid, operation, width=8):
+    if operation not in self.OPERATIONS:
+      raise ValueError(f"unknown bus operation {operation}")
+    inputs = ("A",) if operation == "NOT" else ("A", "B")
+    super().__init__(cid, f"BUS_{operation}", inputs, ("OUT",), width)
+
+  def compute(self):
+    cells = self.cells
+    if self.type is ComponentType.BUS_NOT:
+      cells[1] = ~cells[0] & self.mask
+    elif self.type is ComponentType.BUS_AND:
+      cells[2] = cells[0] & cells[1] & self.mask
+    elif self.type is ComponentType.BUS_OR:
+      cells[2] = (cells[0] | cells[1]) & self.mask
+    else:
+      cells[2] = (cells[0] ^ cells[1]) & self.mask
+
+
+class SplitComponent(WordComponent):
+  """
+    Splits bus IN into single bit outputs, OUT0 is the least significant
+    """
+
+  __slots__ = ()
+
+  def __init__(self, cid, width=8):
+    super().__init__(cid, "SPLIT", ("IN",), tuple(f"OUT{i}" for i in range(width)), width)
+
+  def _bit_pin(self, pin):
+    return pin != "IN"
+
+  def compute(self):
+    cells = self.cells
+    value = cells[0]
+    cells[1:] = [bool(value >> i & 1) for i in range(self.width)]
+
+
+class MergeComponent(WordComponent):
+  """
+    Joins single bit inputs into bus OUT, IN0 is the least significant
+    """
+
+  __slots__ = ()
+
+  def __init__(self, cid, width=8):
+    super().__init__(cid, "MERGE", tuple(f"IN{i}" for i in range(width)), ("OUT",), width)
+
+  def _bit_pin(self, pin):
+    return pin != "OUT"
+
+  def compute(self):
+    cells = self.cells
+    cells[self.width] = sum(1 << i for i in range(self.width) if cells[i])
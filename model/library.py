@@ -0,0 +1,366 @@
+"""
+library.py
+
+Subcircuit definitions loaded from saved circuit files. A definition is parsed
+once and the same object is shared by every SubcircuitComponent using it.
+
+Parsed definitions are also pickled to a cache folder next to the files, keyed
+by the sha256 of the file contents, so unchanged files load without being
+parsed again in later sessions. Hashes are remembered by mtime and size to
+avoid reading unchanged files just to hash them.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+from model.circuit import Circuit
+from model.wire import Wire
+from model.serializer import circuit_from_json
+from utils.circuit_file import read_circuit_file
+from utils.component_factory import build_component
+
+
+# definitions with at most this many inputs evaluate through a lookup table
+LUT_MAX_INPUTS = 8
+
+# folder next to the circuit files holding parsed definitions, None turns the
+# cache off
+CACHE_DIRECTORY: str | None = ".cache"
+# bump when the pickled classes change shape, older entries are then ignored
+CACHE_VERSION = 3
+
+
+class SubcircuitDefinition:
+  """
+  Reusable circuit with named ports. Input ports are the ids of its
+  InputComponents, output ports the ids of its OutputComponents
+  """
+
+  name: str
+  circuit: Circuit
+  inputs: List[str]
+  outputs: List[str]
+  path: str | None
+
+  def __init__(self, name: str, circuit: Circuit, inputs: List[str], outputs: List[str]):
+    self.name = name
+    self.circuit = circuit
+    self.inputs = inputs
+    self.outputs = outputs
+    self.path = None
+    # bumped when the definition is reloaded in place, see version
+    self.generation = 0
+    self._stamp: Tuple[float, int] | None = None
+    self._lut: Tuple[Any, List[Tuple[bool, ...]]] | None = None
+
+  def replace(self, other: "SubcircuitDefinition") -> None:
+    """
+    Take over the contents of another definition in place, so instances
+    sharing this one see the change
+    """
+    self.name = other.name
+    self.circuit = other.circuit
+    self.inputs = other.inputs
+    self.outputs = other.outputs
+    self.generation += 1
+    self._lut = None
+
+  @property
+  def version(self) -> Any:
+    """
+    Changes whenever the definition is reloaded or its circuit, or a
+    definition that one uses, is edited
+    """
+    return self.generation, self.circuit.version
+
+  @property
+  def interface_map(self) -> Dict[str, Dict[str, Tuple[str, str]]]:
+    """
+    Ports mapped to the internal component and pin they stand for
+    """
+    return {
+        "inputs": {port: (port, "OUT") for port in self.inputs},
+        "outputs": {port: (port, "IN") for port in self.outputs},
+    }
+
+  def evaluate(self, values: Tuple[bool, ...]) -> Tuple[bool, ...]:
+    """
+    Output port values for the given input port values
+    """
+    if len(self.inputs) > LUT_MAX_INPUTS:
+      return self.circuit.compile()(values)
+
+    index = 0
+    for bit, value in enumerate(values):
+      if value:
+        index |= 1 << bit
+    return self.lut()[index]
+
+  def lut(self) -> List[Tuple[bool, ...]]:
+    """
+    Truth table of the definition, entry i holds the outputs for the inputs
+    packed as bits of i. Built on first use and after edits
+    """
+    version = self.version
+    if self._lut is None or self._lut[0] != version:
+      # pylint: disable-next=import-outside-toplevel
+      from simulation.bit_parallel import BitParallelSimulator
+      table = BitParallelSimulator(self.circuit).truth_table()
+      self._lut = (version, [outputs for _, outputs in table])
+    return self._lut[1]
+
+
+_definitions: Dict[str, SubcircuitDefinition] = {}
+
+
+def load_definition(path: str) -> SubcircuitDefinition:
+  """
+  Load a definition from a saved circuit file. Each file is parsed once,
+  later calls return the same definition object. If the file changed on
+  disk since, the definition is reloaded in place. Raises ValueError if
+  the reloaded definition has other ports
+  """
+  key = os.path.realpath(path)
+  stat = os.stat(key)
+  stamp = (stat.st_mtime, stat.st_size)
+
+  definition = _definitions.get(key)
+  if definition is not None and definition._stamp == stamp:  # pylint: disable=protected-access
+    return definition
+
+  loaded = None
+  if CACHE_DIRECTORY is not None:
+    entry = _cache_entry(key, stat)
+    loaded = _read_cached(entry, os.path.dirname(key))
+  if loaded is None:
+    data = read_circuit_file(key)
+    loaded = definition_from_json(data, os.path.splitext(os.path.basename(key))[0])
+    if CACHE_DIRECTORY is not None:
+      _write_cached(entry, loaded, os.path.dirname(key))
+
+  if definition is None:
+    definition = _definitions[key] = loaded
+  elif (loaded.inputs, loaded.outputs) != (definition.inputs, definition.outputs):
+    # placed instances are laid out for the old ports
+    raise ValueError(f"{key}: ports changed, the definition can not be reloaded in place")
+  else:
+    definition.replace(loaded)
+  definition.path = key
+  definition._stamp = stamp  # pylint: disable=protected-access
+  return definition
+
+
+def definition_from_json(data: Dict[str, Any], default_name: str = "") -> SubcircuitDefinition:
+  """
+  Build a definition from saved circuit data. Accepts both the model
+  serializer format and the format the gui FileSaver writes
+  """
+  if data["components"] and "id" in data["components"][0]:
+    return _definition_from_gui_json(data, default_name)
+
+  circuit = circuit_from_json(data)
+
+  return SubcircuitDefinition(
+      data.get("name", default_name),
+      circuit,
+      [cid for cid, comp in circuit.components.items() if comp.type == "INPUT"],
+      [cid for cid, comp in circuit.components.items() if comp.type == "OUTPUT"],
+  )
+
+
+def _definition_from_gui_json(data: Dict[str, Any], default_name: str) -> SubcircuitDefinition:
+  """
+  The gui names pins from the canvas' point of view, its OUTPUT pins drive
+  the circuit and its INPUT pins are driven by it. Ports are ordered top to
+  bottom
+  """
+  pin_types = {"OUTPUT": "INPUT", "INPUT": "OUTPUT"}
+  circuit = Circuit()
+  inputs, outputs = [], []
+
+  for comp_data in sorted(data["components"], key=lambda comp: comp["pos"][1]):
+    comp_type = pin_types.get(comp_data["type"], comp_data["type"])
+    component = build_component(comp_type, tuple(comp_data["pos"]), comp_data["id"])
+    if component is None:
+      raise LookupError(comp_data["type"])
+    circuit.add_component(component)
+
+    if comp_type == "INPUT":
+      inputs.append(component.id)
+    elif comp_type == "OUTPUT":
+      outputs.append(component.id)
+
+  for wire_data in data["wires"]:
+    dst = circuit.components[wire_data["dst_id"]]
+    dst_pin = "IN" if dst.type == "OUTPUT" else wire_data["dst_pin"]
+    src = circuit.components[wire_data["src_id"]]
+    src_pin = "OUT" if src.type == "INPUT" else wire_data["src_pin"]
+    circuit.add_wire(Wire(wire_data["src_id"], src_pin, wire_data["dst_id"], dst_pin))
+
+  return SubcircuitDefinition(data.get("name", default_name), circuit, inputs, outputs)
+
+
+# cache folder -> {file name: [mtime_ns, size, sha256]}
+_hashes: Dict[str, Dict[str, List[Any]]] = {}
+
+# a file changed again within this many seconds can keep its mtime, so its
+# hash is not remembered until it is older
+RACY_SECONDS = 2
+
+
+def content_hash(path: str, stat: os.stat_result | None = None) -> str:
+  """
+  sha256 of a file's contents. Remembered in the cache folder by mtime and
+  size, a file that still matches is not read again
+  """
+  stat = stat or os.stat(path)
+  folder = os.path.join(os.path.dirname(path), CACHE_DIRECTORY or ".cache")
+  hashes = _hash_table(folder)
+  name = os.path.basename(path)
+  stamp = [stat.st_mtime_ns, stat.st_size]
+
+  known = hashes.get(name)
+  if known is not None and known[:2] == stamp:
+    return known[2]
+
+  with open(path, "rb") as f:
+    digest = hashlib.file_digest(f, "sha256").hexdigest()
+  if time.time() - stat.st_mtime < RACY_SECONDS:
+    return digest
+
+  hashes[name] = [*stamp, digest]
+  if known is not None and not any(other[2] == known[2] for other in hashes.values()):
+    # nothing has the old contents any more
+    _remove(os.path.join(folder, _entry_name(known[2])))
+  _write_atomic(os.path.join(folder, "hashes.json"), json.dumps(hashes).encode("utf-8"))
+  return digest
+
+
+def _hash_table(folder: str) -> Dict[str, List[Any]]:
+  hashes = _hashes.get(folder)
+  if hashes is None:
+    try:
+      with open(os.path.join(folder, "hashes.json"), "r", encoding="utf-8") as f:
+        hashes = json.load(f)
+    except (OSError, ValueError):
+      hashes = {}
+    _hashes[folder] = hashes
+  return hashes
+
+
+def _entry_name(digest: str) -> str:
+  return f"{digest}.v{CACHE_VERSION}.pickle"
+
+
+def _cache_entry(path: str, stat: os.stat_result) -> str:
+  return os.path.join(os.path.dirname(path), CACHE_DIRECTORY, _entry_name(content_hash(path, stat)))
+
+
+# modules whose classes a cached definition is made of, and the other globals
+# it uses. Cache files are only trusted to hold these
+_CACHED_MODULES = ("model.circuit", "model.component", "model.library", "model.wire",
+                   "utils.topo_order")
+_CACHED_GLOBALS = {("builtins", "list"), ("collections", "defaultdict"),
+                   ("model.component", "pin_layout")}
+
+
+def _inside(path: str, folder: str) -> bool:
+  return os.path.commonpath([os.path.realpath(path), folder]) == folder
+
+
+class _Pickler(pickle.Pickler):
+  """
+  Other definitions a cached one uses are stored by path and loaded through
+  load_definition, so they stay shared instead of being copied in. Only
+  those from the same library folder, others are copied
+  """
+
+  def __init__(self, file, root: SubcircuitDefinition, folder: str):
+    super().__init__(file, pickle.HIGHEST_PROTOCOL)
+    self.root = root
+    self.folder = folder
+
+  def persistent_id(self, obj):
+    if (isinstance(obj, SubcircuitDefinition) and obj is not self.root and obj.path is not None
+        and _inside(obj.path, self.folder)):
+      return obj.path
+    return None
+
+
+class _Unpickler(pickle.Unpickler):
+  """
+  Loads what _Pickler writes and nothing else, a cache file holding other
+  globals or definitions from outside the library folder is rejected
+  """
+
+  def __init__(self, file, folder: str):
+    super().__init__(file)
+    self.folder = folder
+
+  def find_class(self, module, name):
+    if (module, name) not in _CACHED_GLOBALS:
+      value = getattr(sys.modules.get(module), name, None) if module in _CACHED_MODULES else None
+      if not isinstance(value, type) or value.__module__ != module:
+        raise pickle.UnpicklingError(f"{module}.{name} is not part of a cached definition")
+    return super().find_class(module, name)
+
+  def persistent_load(self, pid):
+    if not isinstance(pid, str) or not _inside(pid, self.folder):
+      raise pickle.UnpicklingError(f"definition {pid!r} is outside {self.folder}")
+    return load_definition(pid)
+
+
+def _read_cached(entry: str, folder: str) -> SubcircuitDefinition | None:
+  """
+  Cached definition, None if there is none or it can not be read. Anything
+  going wrong here just means parsing the file again
+  """
+  try:
+    with open(entry, "rb") as f:
+      definition = _Unpickler(f, folder).load()
+  except FileNotFoundError:
+    return None
+  except Exception:  # pylint: disable=broad-except
+    _remove(entry)
+    return None
+  return definition if isinstance(definition, SubcircuitDefinition) else None
+
+
+def _write_cached(entry: str, definition: SubcircuitDefinition, folder: str) -> None:
+  try:
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    with open(entry + ".tmp", "wb") as f:
+      _Pickler(f, definition, folder).dump(definition)
+    os.replace(entry + ".tmp", entry)
+  except (OSError, pickle.PicklingError):
+    # a read-only folder or a definition that can not be pickled is loaded
+    # from the file every time
+    _remove(entry + ".tmp")
+    return
+
+  # entries an older CACHE_VERSION wrote are never read again
+  cache = os.path.dirname(entry)
+  for name in os.listdir(cache):
+    if name.endswith(".pickle") and not name.endswith(f".v{CACHE_VERSION}.pickle"):
+      _remove(os.path.join(cache, name))
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+  try:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+      f.write(content)
+    os.replace(path + ".tmp", path)
+  except OSError:
+    pass
+
+
+def _remove(path: str) -> None:
+  try:
+    os.remove(path)
+  except OSError:
+    pass
@@ -0,0 +1,189 @@
+"""
+library_index.py
+
+Catalogue of the saved circuits in a library folder. For every file the index
+records its name, port names, gate count and content hash in
+<folder>/.cache/index.json. Opening the library only reads that file and
+stats the folder. A file is parsed when it is new or has changed, and its
+definition is loaded the first time a part is placed.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List
+from model.component import SubcircuitComponent
+from model.library import RACY_SECONDS, SubcircuitDefinition, definition_from_json, load_definition
+from utils.circuit_file import BINARY_EXTENSION, read_circuit_file
+
+DEFAULT_DIRECTORY = "components"
+EXTENSIONS = (".json", BINARY_EXTENSION)
+
+# bump when LibraryEntry changes, older index files are rebuilt
+INDEX_VERSION = 1
+
+
+def check_file_name(file: str) -> str:
+  """
+  Returns file if it names a file directly inside a library folder. Raises
+  ValueError for names with path separators, or . and .., which would reach
+  outside it
+  """
+  separators = any(char in file for char in "/\\\0")
+  if file in ("", ".", "..") or separators or os.path.basename(file) != file:
+    raise ValueError(f"not a plain file name: {file!r}")
+  return file
+
+
+@dataclass
+class LibraryEntry:  # pylint: disable=too-many-instance-attributes
+  """
+  What the index knows about one saved circuit without loading it
+  """
+
+  file: str
+  name: str
+  inputs: List[str]
+  outputs: List[str]
+  gates: int
+  hash: str
+  mtime_ns: int
+  size: int
+
+
+class LibraryIndex:
+  """
+  Index over the circuit files in a folder, kept in step with the folder by
+  refresh
+  """
+
+  directory: str
+  entries: Dict[str, LibraryEntry]
+
+  def __init__(self, directory: str = DEFAULT_DIRECTORY):
+    self.directory = directory
+    self.entries = {}
+    # files that are not circuits, by [mtime_ns, size], not read again until
+    # they change
+    self._skipped: Dict[str, List[int]] = {}
+    self._index_path = os.path.join(directory, ".cache", "index.json")
+
+    try:
+      with open(self._index_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+      if data.get("version") == INDEX_VERSION:
+        self.entries = {entry["file"]: LibraryEntry(**entry) for entry in data["entries"]}
+        self._skipped = data["skipped"]
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+      pass
+    self.refresh()
+
+  def __iter__(self) -> Iterator[LibraryEntry]:
+    return iter(sorted(self.entries.values(), key=lambda entry: entry.name.lower()))
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def __contains__(self, file: str) -> bool:
+    return file in self.entries
+
+  def path(self, file: str) -> str:
+    """
+    Path of a file in the library folder, see check_file_name
+    """
+    return os.path.join(self.directory, check_file_name(file))
+
+  def refresh(self) -> None:
+    """
+    Pick up files added, changed or removed since the index was written.
+    Only new and changed files are read
+    """
+    found = {}
+    if os.path.isdir(self.directory):
+      with os.scandir(self.directory) as listing:
+        for item in listing:
+          if item.name.endswith(EXTENSIONS) and item.is_file():
+            found[item.name] = item.stat()
+
+    changed = False
+    for known in (self.entries, self._skipped):
+      for file in list(known):
+        if file not in found:
+          del known[file]
+          changed = True
+
+    for file, stat in found.items():
+      entry = self.entries.get(file)
+      if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+        continue
+      if self._skipped.get(file) == [stat.st_mtime_ns, stat.st_size]:
+        continue
+
+      changed = True
+      # a file written just now can change again without its mtime moving,
+      # it is checked again until it is older
+      mtime_ns = -1 if time.time() - stat.st_mtime < RACY_SECONDS else stat.st_mtime_ns
+
+      # the same sha256 the definition cache in model.library is keyed by
+      with open(self.path(file), "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+      if entry is None or entry.hash != digest:
+        entry = self._summarize(file, stat, digest)
+        if entry is None:
+          self.entries.pop(file, None)
+          self._skipped[file] = [mtime_ns, stat.st_size]
+          continue
+        self.entries[file] = entry
+        self._skipped.pop(file, None)
+
+      entry.mtime_ns, entry.size = mtime_ns, stat.st_size
+
+    if changed:
+      self._save()
+
+  def definition(self, file: str) -> SubcircuitDefinition:
+    """
+    Definition of a library part, loaded on first use and shared after
+    """
+    if file not in self.entries:
+      raise KeyError(file)
+    return load_definition(self.path(file))
+
+  def instantiate(self, file: str, cid: str) -> SubcircuitComponent:
+    """
+    New instance of a library part
+    """
+    return SubcircuitComponent(cid, self.definition(file))
+
+  def _summarize(self, file: str, stat: os.stat_result, digest: str) -> LibraryEntry | None:
+    """
+    Index entry for a file, None if it is not a circuit that can be read
+    """
+    try:
+      data = read_circuit_file(self.path(file))
+      definition = definition_from_json(data, os.path.splitext(file)[0])
+    except (OSError, ValueError, LookupError, TypeError, AttributeError):
+      # not readable, or valid JSON of some other shape
+      return None
+
+    gates = sum(1 for comp in definition.circuit.components.values()
+                if comp.type not in ("INPUT", "OUTPUT"))
+    return LibraryEntry(file, definition.name, definition.inputs, definition.outputs, gates, digest,
+                        stat.st_mtime_ns, stat.st_size)
+
+  def _save(self) -> None:
+    data = {
+        "version": INDEX_VERSION,
+        "entries": [asdict(entry) for entry in self.entries.values()],
+        "skipped": self._skipped,
+    }
+    try:
+      os.makedirs(os.path.dirname(self._index_path), exist_ok=True)
+      with open(self._index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+      os.replace(self._index_path + ".tmp", self._index_path)
+    except OSError:
+      # a read-only library is indexed again next time
+      pass
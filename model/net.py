@@ -0,0 +1,132 @@
+"""
+net.py
+"""
+
+from typing import Dict, List, Tuple
+
+# (component id, pin name)
+PinRef = Tuple[str, str]
+# (component cells, index of the pin's value), see model.component.PinLayout
+Cell = Tuple[List[bool], int]
+
+
+class Net:
+  """
+    One signal: the output pins driving it and every input pin it feeds.
+    Several drivers are resolved as a wired-OR, bit by bit on bus nets. The value is resolved once
+    and then written to all sinks
+    """
+
+  __slots__ = ("drivers", "sinks", "loads", "value", "_sources", "_targets")
+
+  drivers: List[PinRef]
+  sinks: List[PinRef]
+  loads: List[str]
+  value: bool
+
+  def __init__(self):
+    self.drivers = []
+    self.sinks = []
+    # components the net feeds, each listed once
+    self.loads = []
+    self.value = False
+    self._sources: List[Cell] = []
+    self._targets: List[Cell] = []
+
+  def add_driver(self, cid: str, pin: str, cells: List[bool], index: int) -> None:
+    """Add an output pin driving the net"""
+    self.drivers.append((cid, pin))
+    self._sources.append((cells, index))
+
+  def add_sink(self, cid: str, pin: str, cells: List[bool], index: int) -> None:
+    """Add an input pin fed by the net"""
+    self.sinks.append((cid, pin))
+    self._targets.append((cells, index))
+    if cid not in self.loads:
+      self.loads.append(cid)
+
+  def update(self) -> bool:
+    """
+        Resolve the drivers and write the value to every sink. Returns True
+        if the value changed
+        """
+    sources = self._sources
+    if len(sources) == 1:
+      cells, index = sources[0]
+      value = cells[index]
+    else:
+      # bitwise, so bus nets carrying ints resolve bit by bit
+      value = False
+      for cells, index in sources:
+        value |= cells[index]
+
+    for cells, index in self._targets:
+      cells[index] = value
+
+    if value == self.value:
+      return False
+    self.value = value
+    return True
+
+
+class NetIndex:  # pylint: disable=too-few-public-methods
+  """
+    Nets of a circuit. Input pins wired to the same drivers share a net, so
+    an output pin with plain fan-out is a single net. Feedback wires are
+    left out, the same as in the evaluation order, unless asked for
+    """
+
+  nets: List[Net]
+  ready: Dict[str, List[Net]]
+  driven: Dict[str, List[Net]]
+  floating: List[Cell]
+
+  def __init__(self, circuit, feedback: bool = False):
+    self.nets = []
+    # nets to resolve once a component is computed, the ones it is the last
+    # driver of in evaluation order
+    self.ready = {}
+    # nets each component drives
+    self.driven = {}
+    # input pins nothing drives
+    self.floating = []
+
+    components = circuit.components
+    order = circuit._topological_sort()  # pylint: disable=protected-access
+    position = {cid: i for i, cid in enumerate(order)}
+    ignored = set() if feedback else {id(wire) for wire in circuit.cyclic_wires}
+
+    nets: Dict[frozenset, Net] = {}
+    for cid in order:
+      component = components.get(cid)
+      if component is None:
+        continue
+
+      pin_drivers: Dict[str, Dict[PinRef, None]] = {}
+      for wire in circuit.fanin(cid):
+        if id(wire) not in ignored and wire.src_id in components:
+          pin_drivers.setdefault(wire.dst_pin, {})[(wire.src_id, wire.src_pin)] = None
+
+      for pin, index in component.layout.input_index.items():
+        drivers = pin_drivers.get(pin)
+        if not drivers:
+          self.floating.append((component.cells, index))
+          continue
+
+        key = frozenset(drivers)
+        net = nets.get(key)
+        if net is None:
+          net = nets[key] = self._add_net(components, drivers, position)
+        net.add_sink(cid, pin, component.cells, index)
+
+  def _add_net(self, components, drivers, position: Dict[str, int]) -> Net:
+    net = Net()
+    for src_id, src_pin in drivers:
+      source = components[src_id]
+      net.add_driver(src_id, src_pin, source.cells, source.layout.output_index[src_pin])
+      self.driven.setdefault(src_id, []).append(net)
+
+    last = max((src_id for src_id, _ in drivers), key=position.__getitem__)
+    self.ready.setdefault(last, []).append(net)
+    self.nets.append(net)
+    return net
@@ -5,7 +5,7 @@ pin.py
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Pin:
   """
     Pin class
@@ -2,10 +2,13 @@
 serializer.py
 """
 
-from typing import Dict, Any
+import json
+from typing import Any, Dict, Iterable, Tuple
 from model.circuit import Circuit
 from model.wire import Wire
-from model.component import Component
+from model.component import Component, SubcircuitComponent
+from utils.circuit_file import stream_circuit_file
+from utils.component_factory import build_component
 
 
 def circuit_to_json(circuit: Circuit) -> Dict[str, Any]:
@@ -17,19 +20,78 @@ def circuit_to_json(circuit: Circuit) -> Dict[str, Any]:
   return circuit.to_dict()
 
 
-def circuit_from_json(data: Dict) -> Circuit:
+def circuit_from_json(data: Dict, definitions: Dict[str, Any] | None = None) -> Circuit:
   """
     process json data into circuit object
     """
-  components = data["components"]
-  wires = data["wires"]
+  records = ((key, record) for key in ("components", "wires") for record in data[key])
+  return circuit_from_records(records, definitions)
+
+
+def load_circuit(path: str) -> Circuit:
+  """
+    Read a saved circuit file, building the circuit while the file is read
+    """
+  return circuit_from_records(stream_circuit_file(path))
 
-  circuit = Circuit()
 
-  for component in components:
-    circuit.add_component(Component(**component))
+def circuit_from_records(records: Iterable[Tuple[str, Any]],
+                         definitions: Dict[str, Any] | None = None) -> Circuit:
+  """
+    Build a circuit from ("components", data) and ("wires", data) pairs as
+    they come, see utils.circuit_file.stream_circuit_file. Other keys are
+    skipped
+    """
+  circuit = Circuit()
+  definitions = {} if definitions is None else definitions
 
-  for wire in wires:
-    circuit.wires.append(Wire(**wire))
+  for key, record in records:
+    if key == "components":
+      circuit.add_component(component_from_json(record, definitions))
+    elif key == "wires":
+      circuit.add_wire(Wire(**record))
 
   return circuit
+
+
+def component_from_json(data: Dict, definitions: Dict[str, Any] | None = None) -> Component:
+  """
+    Rebuild a component with the pin values it was saved with. Subcircuit
+    instances load their definition by path, or from the copy saved inline
+    with them, which is built once per entry in definitions. Types the
+    factory does not know, or saved with other pins, come back as plain
+    components
+    """
+  component = None
+  if data["type"] != "SUBCIRCUIT":
+    component = build_component(data["type"], (0, 0), data["cid"], width=data.get("width", 8))
+  elif "definition" in data:
+    component = SubcircuitComponent(data["cid"], _definition(data["definition"], definitions))
+
+  if component is None or (component.layout.inputs, component.layout.outputs) != (
+      tuple(data["inputs"]), tuple(data["outputs"])):
+    return Component(data["cid"], data["type"], data["inputs"], data["outputs"])
+
+  component.cells[:] = [*data["inputs"].values(), *data["outputs"].values()]
+  return component
+
+
+def _definition(reference: str | Dict, definitions: Dict[str, Any] | None):
+  """
+    Definition a saved subcircuit instance refers to
+    """
+  # model.library loads definitions through this module
+  # pylint: disable-next=import-outside-toplevel
+  from model.library import SubcircuitDefinition, load_definition
+
+  if isinstance(reference, str):
+    return load_definition(reference)
+
+  key = json.dumps(reference, sort_keys=True)
+  definition = definitions.get(key) if definitions is not None else None
+  if definition is None:
+    definition = SubcircuitDefinition(reference["name"], circuit_from_json(reference, definitions),
+                                      reference["inputs"], reference["outputs"])
+    if definitions is not None:
+      definitions[key] = definition
+  return definition
@@ -2,28 +2,39 @@
 wire.py
 """
 
+import sys
+
 
 class Wire:  # pylint: disable=too-few-public-methods
   """
-    Class for logical wire
+    Class for logical wire. A wire wider than one bit is a bus carrying an
+    int
     """
 
+  __slots__ = ("src_id", "src_pin", "dst_id", "dst_pin", "width")
+
   src_id: str
   src_pin: str
   dst_id: str
   dst_pin: str
+  width: int
 
-  def __init__(self, src_id: str, src_pin: str, dst_id: str, dst_pin: str):
+  # pylint: disable-next=too-many-arguments
+  def __init__(self, src_id: str, src_pin: str, dst_id: str, dst_pin: str, width: int = 1):
     self.src_id = src_id
-    self.src_pin = src_pin
+    self.src_pin = sys.intern(src_pin)
     self.dst_id = dst_id
-    self.dst_pin = dst_pin
+    self.dst_pin = sys.intern(dst_pin)
+    self.width = width
 
   def to_dict(self):
     """Turns object into json serializable format"""
-    return {
+    data = {
         "src_id": self.src_id,
         "src_pin": self.src_pin,
         "dst_id": self.dst_id,
         "dst_pin": self.dst_pin,
     }
+    if self.width != 1:
+      data["width"] = self.width
+    return data
@@ -99,7 +99,7 @@ class GUIPin(GUIComponent):
 
     def toggle_state(self):
         """
-        Flip the logic value of the pin and trigger evaluation if source.
+        Flip the logic value of the pin and propagate the change downstream.
         """
         logic_pin = self.window.circuit.components[self.component_id]
 
@@ -112,7 +112,7 @@ class GUIPin(GUIComponent):
             logic_pin.outputs[self.pin_name] = False
             self.state = 0
 
-        self.window.circuit.evaluate()
+        self.window.circuit.propagate(self.component_id)
 
     def set_state_color(self, logic_value):
         """Sets state color based on logic value"""
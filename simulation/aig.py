@@ -0,0 +1,241 @@
+"""
+aig.py
+
+And-Inverter Graph stored in parallel integer arrays. Node 0 is constant
+false, nodes are numbered so fanins always come first, and a literal is
+2 * node + complement bit. OR and NOT are expressed through De Morgan.
+"""
+
+from array import array
+from typing import Dict, List
+from model.circuit import Circuit
+from model.wire import Wire
+from simulation.netlist import Netlist
+from utils.component_factory import build_component
+
+FALSE_LIT = 0
+TRUE_LIT = 1
+
+
+def negate(lit: int) -> int:
+  """
+  Complemented literal
+  """
+  return lit ^ 1
+
+
+def _hash(a: int, b: int) -> int:
+  h = (a * 0x9E3779B1 ^ b * 0x85EBCA77) & 0xFFFFFFFF
+  return h ^ (h >> 16)
+
+
+class AIG:
+  """
+  Compact netlist of two-input AND nodes. fanin0/fanin1 hold the literals
+  of each node's inputs, primary inputs have both fanins set to -1
+  """
+
+  def __init__(self):
+    self.fanin0 = array("i", [-1])
+    self.fanin1 = array("i", [-1])
+    self.inputs: List[int] = []
+    self.outputs = array("i")
+    self.input_names: List[str] = []
+    self.output_names: List[str] = []
+
+    # structural hash table, open addressing over node numbers so it stays
+    # as compact as the fanin arrays. 0 marks an empty slot
+    self._table = array("i", bytes(4 * 1024))
+
+  @property
+  def node_count(self) -> int:
+    """
+    Number of nodes including the constant node
+    """
+    return len(self.fanin0)
+
+  @property
+  def and_count(self) -> int:
+    """
+    Number of AND nodes
+    """
+    return self.node_count - 1 - len(self.inputs)
+
+  def add_input(self, name: str = "") -> int:
+    """
+    New primary input, returns its literal
+    """
+    node = self.node_count
+    self.fanin0.append(-1)
+    self.fanin1.append(-1)
+    self.inputs.append(node)
+    self.input_names.append(name)
+    return 2 * node
+
+  def add_output(self, lit: int, name: str = "") -> None:
+    """
+    Mark a literal as primary output
+    """
+    self.outputs.append(lit)
+    self.output_names.append(name)
+
+  def add_and(self, a: int, b: int) -> int:
+    """
+    Literal of a AND b, reusing an existing node with the same fanins
+    """
+    if a > b:
+      a, b = b, a
+    if a == FALSE_LIT or a == negate(b):
+      return FALSE_LIT
+    if a == TRUE_LIT or a == b:
+      return b
+
+    table, fanin0, fanin1 = self._table, self.fanin0, self.fanin1
+    mask = len(table) - 1
+    slot = _hash(a, b) & mask
+    while table[slot]:
+      node = table[slot]
+      if fanin0[node] == a and fanin1[node] == b:
+        return 2 * node
+      slot = (slot + 1) & mask
+
+    node = self.node_count
+    fanin0.append(a)
+    fanin1.append(b)
+    table[slot] = node
+    if 2 * node > len(table):
+      self._rehash()
+    return 2 * node
+
+  def _rehash(self) -> None:
+    table = array("i", bytes(8 * len(self._table)))
+    mask = len(table) - 1
+    for node in range(1, self.node_count):
+      a, b = self.fanin0[node], self.fanin1[node]
+      if a < 0:
+        continue
+      slot = _hash(a, b) & mask
+      while table[slot]:
+        slot = (slot + 1) & mask
+      table[slot] = node
+    self._table = table
+
+  def add_or(self, a: int, b: int) -> int:
+    """
+    Literal of a OR b
+    """
+    return negate(self.add_and(negate(a), negate(b)))
+
+  def simulate(self, words: List[int], width: int) -> List[int]:
+    """
+    Bit-parallel simulation straight over the arrays. words holds one word
+    per input, one bit per vector. Returns one word per output
+    """
+    mask = (1 << width) - 1
+    values = [0] * self.node_count
+    for node, word in zip(self.inputs, words):
+      values[node] = word & mask
+
+    fanin0, fanin1 = self.fanin0, self.fanin1
+    for node in range(1, self.node_count):
+      a = fanin0[node]
+      if a < 0:
+        continue
+      b = fanin1[node]
+      x = values[a >> 1] ^ (mask if a & 1 else 0)
+      y = values[b >> 1] ^ (mask if b & 1 else 0)
+      values[node] = x & y
+
+    return [values[lit >> 1] ^ (mask if lit & 1 else 0) for lit in self.outputs]
+
+  @classmethod
+  def from_circuit(cls, circuit: Circuit) -> "AIG":
+    """
+    Convert a circuit, subcircuits are flattened first
+    """
+    netlist = Netlist(circuit)
+    aig = cls()
+    lits = [FALSE_LIT] * netlist.net_count
+
+    for cid, net in zip(netlist.inputs, netlist.input_nets()):
+      lits[net] = aig.add_input(cid)
+
+    def pin(drivers):
+      lit = FALSE_LIT
+      for net in drivers:
+        lit = aig.add_or(lit, lits[net])
+      return lit
+
+    for gate_type, out, pins in netlist.gates:
+      operands = [pin(drivers) for drivers in pins]
+      if gate_type == "AND":
+        lits[out] = aig.add_and(*operands)
+      elif gate_type == "OR":
+        lits[out] = aig.add_or(*operands)
+      else:
+        lits[out] = negate(operands[0])
+
+    for cid, drivers in zip(netlist.outputs, netlist.output_drivers):
+      aig.add_output(pin(drivers), cid)
+    return aig
+
+  def to_circuit(self) -> Circuit:
+    """
+    Convert back to AND/NOT components. Inputs and outputs keep their
+    names as ids, complemented literals share one NOT gate per node. Gates
+    are named after their node number, skipping ids a port already has
+    """
+    circuit = Circuit()
+    names: Dict[int, str] = {}
+    inverted: Dict[int, str] = {}
+    taken = {name for name in (*self.input_names, *self.output_names) if name}
+
+    def fresh(base: str) -> str:
+      cid, n = base, 1
+      while cid in taken:
+        n += 1
+        cid = f"{base}_{n}"
+      taken.add(cid)
+      return cid
+
+    for node, name in zip(self.inputs, self.input_names):
+      names[node] = name or fresh(f"i{node}")
+      circuit.add_component(build_component("INPUT", (0, 0), names[node]))
+
+    def source(lit: int) -> str | None:
+      node = lit >> 1
+      if node == 0 and not lit & 1:
+        return None  # constant false, leave the pin undriven
+      if node == 0 and 0 in inverted:
+        return inverted[0]
+      if node == 0:
+        # a NOT gate with nothing driving it is constant true
+        inverted[0] = fresh("n0")
+        circuit.add_component(build_component("NOT", (0, 0), inverted[0]))
+        return inverted[0]
+      if not lit & 1:
+        return names[node]
+      if node not in inverted:
+        inverted[node] = fresh(f"n{node}")
+        circuit.add_component(build_component("NOT", (0, 0), inverted[node]))
+        circuit.add_wire(Wire(names[node], "OUT", inverted[node], "IN"))
+      return inverted[node]
+
+    def connect(lit: int, dst_id: str, dst_pin: str) -> None:
+      src_id = source(lit)
+      if src_id is not None:
+        circuit.add_wire(Wire(src_id, "OUT", dst_id, dst_pin))
+
+    for node in range(1, self.node_count):
+      if self.fanin0[node] < 0:
+        continue
+      names[node] = fresh(f"a{node}")
+      circuit.add_component(build_component("AND", (0, 0), names[node]))
+      connect(self.fanin0[node], names[node], "A")
+      connect(self.fanin1[node], names[node], "B")
+
+    for i, (lit, name) in enumerate(zip(self.outputs, self.output_names)):
+      cid = name or fresh(f"o{i}")
+      circuit.add_component(build_component("OUTPUT", (0, 0), cid))
+      connect(lit, cid, "IN")
+    return circuit
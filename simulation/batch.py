@@ -0,0 +1,103 @@
+"""
+batch.py
+
+Levelized batch simulation with NumPy. The netlist is levelized once and each
+level is evaluated as a handful of vectorized boolean operations over every
+stimulus row at once.
+"""
+
+from typing import Dict, List, Tuple
+from model.circuit import Circuit
+from simulation.netlist import Netlist
+
+try:
+  import numpy as np
+except ImportError:  # numpy is optional, only needed for batch simulation
+  np = None
+
+
+class BatchSimulator:
+  """
+  Evaluates a circuit over a (n_vectors x n_inputs) stimulus array
+  """
+
+  def __init__(self, circuit: Circuit):
+    if np is None:
+      raise ImportError("batch simulation requires numpy, see requirements-optional.txt")
+
+    netlist = Netlist(circuit)
+    self.inputs: List[str] = netlist.inputs
+    self.outputs: List[str] = netlist.outputs
+    self._input_nets = np.array(netlist.input_nets(), dtype=np.intp) + 1
+
+    # net 0 is an always-false net for undriven pins, wired-OR pins get an
+    # extra OR node so every gate reads exactly one net per pin
+    self._net_count = netlist.net_count + 1
+    level = [0] * self._net_count
+    nodes: List[Tuple[int, str, int, Tuple[int, ...]]] = []
+
+    def pin_net(drivers: Tuple[int, ...]) -> int:
+      if not drivers:
+        return 0
+      net = drivers[0] + 1
+      for other in drivers[1:]:
+        merged = self._new_net(level)
+        level[merged] = max(level[net], level[other + 1]) + 1
+        nodes.append((level[merged], "OR", merged, (net, other + 1)))
+        net = merged
+      return net
+
+    for gate_type, out, pins in netlist.gates:
+      srcs = tuple(pin_net(drivers) for drivers in pins)
+      level[out + 1] = max(level[src] for src in srcs) + 1
+      nodes.append((level[out + 1], gate_type, out + 1, srcs))
+
+    self._output_nets = np.array([pin_net(drivers) for drivers in netlist.output_drivers],
+                                 dtype=np.intp)
+
+    # group each level by gate type, one numpy call per group
+    groups: Dict[Tuple[int, str], List[Tuple[int, Tuple[int, ...]]]] = {}
+    for lvl, gate_type, out, srcs in nodes:
+      groups.setdefault((lvl, gate_type), []).append((out, srcs))
+
+    self._levels = []
+    for (_, gate_type), members in sorted(groups.items()):
+      outs = np.array([out for out, _ in members], dtype=np.intp)
+      srcs = np.array([src for _, src in members], dtype=np.intp).T
+      self._levels.append((gate_type, outs, srcs))
+
+  def _new_net(self, level: List[int]) -> int:
+    level.append(0)
+    self._net_count += 1
+    return self._net_count - 1
+
+  def run(self, stimulus, chunk_size: int = 1 << 16):
+    """
+    Evaluate every row of stimulus, columns follow self.inputs. Returns a
+    structured array with one boolean field per output component id
+    """
+    stimulus = np.asarray(stimulus, dtype=bool)
+    if stimulus.ndim != 2 or stimulus.shape[1] != len(self.inputs):
+      raise ValueError(f"stimulus must have shape (n, {len(self.inputs)})")
+
+    result = np.empty(len(stimulus), dtype=[(cid, bool) for cid in self.outputs])
+    for start in range(0, len(stimulus), chunk_size):
+      chunk = self._run_chunk(stimulus[start:start + chunk_size])
+      for column, cid in enumerate(self.outputs):
+        result[cid][start:start + chunk_size] = chunk[column]
+    return result
+
+  def _run_chunk(self, stimulus):
+    # nets are stored one row per net so gathering a net is contiguous
+    nets = np.zeros((self._net_count, len(stimulus)), dtype=bool)
+    nets[self._input_nets] = stimulus.T
+
+    for gate_type, outs, srcs in self._levels:
+      if gate_type == "AND":
+        nets[outs] = nets[srcs[0]] & nets[srcs[1]]
+      elif gate_type == "OR":
+        nets[outs] = nets[srcs[0]] | nets[srcs[1]]
+      else:
+        nets[outs] = ~nets[srcs[0]]
+
+    return nets[self._output_nets]
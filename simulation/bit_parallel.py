@@ -0,0 +1,117 @@
+"""
+bit_parallel.py
+
+Bit-parallel simulation. Every net holds an arbitrary width Python int with
+one bit per test vector, so a single pass over the gates evaluates as many
+vectors as there are bits.
+"""
+
+from typing import Dict, List, Tuple
+from model.circuit import Circuit
+from simulation.netlist import Netlist
+
+
+def exhaustive_patterns(count: int) -> List[int]:
+  """
+  Input words enumerating all 2**count input combinations. Bit i of input k
+  is bit k of the vector number i
+  """
+  width = 1 << count
+  patterns = []
+  for k in range(count):
+    half = 1 << k
+    pattern = ((1 << half) - 1) << half
+    # doubling the copied block keeps the work linear in the width
+    length = 2 * half
+    while length < width:
+      pattern |= pattern << length
+      length *= 2
+    patterns.append(pattern)
+  return patterns
+
+
+def unpack(word: int, width: int) -> List[bool]:
+  """
+  Bits 0 to width - 1 of a word as bools, in one pass over the word instead
+  of a shift per bit
+  """
+  return [char == "1" for char in reversed(format(word, f"0{width}b"))]
+
+
+class BitParallelSimulator:
+  """
+  Evaluates a circuit over many input vectors at once
+  """
+
+  def __init__(self, circuit: Circuit):
+    self.netlist = Netlist(circuit)
+
+  @property
+  def inputs(self) -> List[str]:
+    """
+    Input component ids in the order stimulus words are expected
+    """
+    return self.netlist.inputs
+
+  @property
+  def outputs(self) -> List[str]:
+    """
+    Output component ids in the order results are returned
+    """
+    return self.netlist.outputs
+
+  def run(self, stimulus: Dict[str, int], width: int) -> Dict[str, int]:
+    """
+    Simulate width vectors. stimulus maps each input id to a word with one
+    bit per vector, missing inputs read as 0. Returns one word per output id
+    """
+    mask = (1 << width) - 1
+    nets = [0] * self.netlist.net_count
+    for cid, net in zip(self.netlist.inputs, self.netlist.input_nets()):
+      nets[net] = stimulus.get(cid, 0) & mask
+
+    for gate_type, out, pins in self.netlist.gates:
+      values = [_wired_or(nets, drivers) for drivers in pins]
+      if gate_type == "AND":
+        nets[out] = values[0] & values[1]
+      elif gate_type == "OR":
+        nets[out] = values[0] | values[1]
+      else:
+        nets[out] = ~values[0] & mask
+
+    return {
+        cid: _wired_or(nets, drivers)
+        for cid, drivers in zip(self.netlist.outputs, self.netlist.output_drivers)
+    }
+
+  def exhaustive(self) -> Dict[str, int]:
+    """
+    Simulate every input combination. Bit i of each output word is the
+    output for the vector whose input k equals bit k of i
+    """
+    patterns = exhaustive_patterns(len(self.inputs))
+    return self.run(dict(zip(self.inputs, patterns)), 1 << len(self.inputs))
+
+  def truth_table(self) -> List[Tuple[Tuple[bool, ...], Tuple[bool, ...]]]:
+    """
+    Rows of (input values, output values) for every input combination
+    """
+    width = 1 << len(self.inputs)
+    patterns = exhaustive_patterns(len(self.inputs))
+    result = self.run(dict(zip(self.inputs, patterns)), width)
+    return list(zip(_rows([unpack(word, width) for word in patterns], width),
+                    _rows([unpack(result[cid], width) for cid in self.outputs], width)))
+
+
+def _rows(columns: List[List[bool]], width: int) -> List[Tuple[bool, ...]]:
+  """
+  Per vector tuples out of per signal bit lists
+  """
+  return list(zip(*columns)) if columns else [()] * width
+
+
+def _wired_or(nets: List[int], drivers: Tuple[int, ...]) -> int:
+  value = 0
+  for net in drivers:
+    value |= nets[net]
+  return value
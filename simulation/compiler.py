@@ -0,0 +1,70 @@
+"""
+compiler.py
+
+Compiles a circuit into straight-line Python source over local variables. The
+generated function skips component objects, pin dicts and wire lists entirely.
+"""
+
+from typing import Callable, List, Tuple
+from model.circuit import Circuit
+from simulation.netlist import Netlist
+
+_TEMPLATES = {
+    "AND": "{} and {}",
+    "OR": "{} or {}",
+    "NOT": "not {}",
+}
+
+
+class CompiledCircuit:
+  """
+  Circuit compiled to a Python function taking a tuple of input values, in
+  the order of self.inputs, and returning a tuple of output values in the
+  order of self.outputs
+  """
+
+  inputs: List[str]
+  outputs: List[str]
+  source: str
+
+  def __init__(self, circuit: Circuit):
+    netlist = Netlist(circuit)
+    self.inputs = netlist.inputs
+    self.outputs = netlist.outputs
+    self.source = generate_source(netlist)
+
+    namespace = {}
+    exec(compile(self.source, "<compiled circuit>", "exec"), namespace)  # pylint: disable=exec-used
+    self.function: Callable[[Tuple[bool, ...]], Tuple[bool, ...]] = namespace["evaluate"]
+
+  def __call__(self, values: Tuple[bool, ...]) -> Tuple[bool, ...]:
+    return self.function(values)
+
+
+def generate_source(netlist: Netlist) -> str:
+  """
+  Python source of an evaluate(inputs) function for the netlist
+  """
+  lines = ["def evaluate(inputs):"]
+
+  input_nets = netlist.input_nets()
+  if len(input_nets) == 1:
+    lines.append(f"    n{input_nets[0]}, = inputs")
+  elif input_nets:
+    lines.append(f"    {', '.join(f'n{net}' for net in input_nets)} = inputs")
+
+  for gate_type, out, pins in netlist.gates:
+    operands = [_pin_expression(drivers) for drivers in pins]
+    lines.append(f"    n{out} = {_TEMPLATES[gate_type].format(*operands)}")
+
+  results = [_pin_expression(drivers) for drivers in netlist.output_drivers]
+  lines.append(f"    return ({''.join(f'{result}, ' for result in results)})")
+  return "\n".join(lines) + "\n"
+
+
+def _pin_expression(drivers: Tuple[int, ...]) -> str:
+  if not drivers:
+    return "False"
+  if len(drivers) == 1:
+    return f"n{drivers[0]}"
+  return f"({' or '.join(f'n{net}' for net in drivers)})"
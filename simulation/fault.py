@@ -0,0 +1,106 @@
+"""
+fault.py
+
+Parallel stuck-at fault simulation. Bit 0 of every net word carries the good
+machine and bit i + 1 the machine with fault i injected, so one pass over the
+gates simulates every faulty machine for a test vector at once.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
+from model.circuit import Circuit
+from simulation.netlist import Netlist
+
+# (component id, output pin, stuck value)
+Fault = Tuple[str, str, bool]
+
+
+@dataclass
+class FaultCoverage:
+  """
+  Result of a fault simulation run
+  """
+
+  detected: List[Fault]
+  undetected: List[Fault]
+
+  @property
+  def coverage(self) -> float:
+    """
+    Fraction of faults detected by the test vectors
+    """
+    total = len(self.detected) + len(self.undetected)
+    return len(self.detected) / total if total else 1.0
+
+
+class FaultSimulator:
+  """
+  Injects stuck-at-0 and stuck-at-1 on every net, a net being the output pin
+  of an input or gate, and checks which faults a test set detects
+  """
+
+  faults: List[Fault]
+
+  def __init__(self, circuit: Circuit):
+    self.netlist = Netlist(circuit)
+    self.faults = []
+
+    nets = sorted(self.netlist.net_index.items(), key=lambda item: item[1])
+    self._stuck_0 = [0] * self.netlist.net_count
+    self._stuck_1 = [0] * self.netlist.net_count
+    for (cid, pin), net in nets:
+      for value, masks in ((False, self._stuck_0), (True, self._stuck_1)):
+        masks[net] = 1 << (len(self.faults) + 1)
+        self.faults.append((cid, pin, value))
+
+    self._mask = (1 << (len(self.faults) + 1)) - 1
+
+  def run(self, vectors: Iterable[Tuple[bool, ...]]) -> FaultCoverage:
+    """
+    Simulate every fault for each vector, input values in the order of
+    self.netlist.inputs. A fault is detected once any output differs from
+    the good machine
+    """
+    detected = 0
+    for vector in vectors:
+      detected |= self._detect(vector)
+      if detected | 1 == self._mask:
+        break
+
+    return FaultCoverage(
+        [fault for i, fault in enumerate(self.faults) if detected >> (i + 1) & 1],
+        [fault for i, fault in enumerate(self.faults) if not detected >> (i + 1) & 1],
+    )
+
+  def _detect(self, vector: Tuple[bool, ...]) -> int:
+    mask = self._mask
+    stuck_0, stuck_1 = self._stuck_0, self._stuck_1
+    nets = [0] * self.netlist.net_count
+
+    for net, value in zip(self.netlist.input_nets(), vector):
+      nets[net] = ((mask if value else 0) & ~stuck_0[net]) | stuck_1[net]
+
+    for gate_type, out, pins in self.netlist.gates:
+      values = []
+      for drivers in pins:
+        value = 0
+        for driver in drivers:
+          value |= nets[driver]
+        values.append(value)
+
+      if gate_type == "AND":
+        word = values[0] & values[1]
+      elif gate_type == "OR":
+        word = values[0] | values[1]
+      else:
+        word = ~values[0] & mask
+      nets[out] = (word & ~stuck_0[out]) | stuck_1[out]
+
+    detected = 0
+    for drivers in self.netlist.output_drivers:
+      word = 0
+      for driver in drivers:
+        word |= nets[driver]
+      good = mask if word & 1 else 0
+      detected |= word ^ good
+    return detected
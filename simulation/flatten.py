@@ -0,0 +1,106 @@
+"""
+flatten.py
+
+Inlines subcircuit instances into their parent netlist so the simulation
+engines only ever see primitive gates.
+"""
+
+from typing import Dict, List, Set, Tuple
+from model.circuit import Circuit
+from model.wire import Wire
+from utils.component_factory import build_component
+
+Endpoint = Tuple[str, str]
+
+
+def flatten(circuit: Circuit) -> Circuit:
+  """
+  Circuit with every SUBCIRCUIT instance replaced by the gates of its
+  definition, ids prefixed with the instance id. Circuits without instances
+  are returned as they are. Definitions are flattened once and shared
+  """
+  instances = {cid: comp for cid, comp in circuit.components.items() if comp.type == "SUBCIRCUIT"}
+  if not instances:
+    return circuit
+
+  flat = Circuit()
+  ports: Dict[str, Tuple[Dict[str, List[Endpoint]], Dict[str, List[Endpoint]]]] = {}
+
+  for cid, component in circuit.components.items():
+    if cid not in instances:
+      flat.add_component(component)
+      continue
+
+    inner = component.definition.circuit.flattened()
+    ports[cid] = _inline(flat, cid, inner)
+
+  def sources(src: Endpoint, seen: Set[Endpoint]) -> List[Endpoint]:
+    """
+    Primitive outputs driving src, looking through instance output ports
+    and ports wired straight through an instance
+    """
+    src_id, src_pin = src
+    if src_id not in instances:
+      return [src]
+    if src in seen:
+      return []
+    seen = seen | {src}
+
+    result = []
+    for driver in ports[src_id][1][src_pin]:
+      if driver[0] is None:  # input port wired straight to this output port
+        for wire in circuit.fanin(src_id):
+          if wire.dst_pin == driver[1]:
+            result += sources((wire.src_id, wire.src_pin), seen)
+      else:
+        result.append(driver)
+    return result
+
+  for wire in circuit.wires:
+    if wire.dst_id in instances:
+      sinks = ports[wire.dst_id][0][wire.dst_pin]
+    else:
+      sinks = [(wire.dst_id, wire.dst_pin)]
+
+    for src_id, src_pin in sources((wire.src_id, wire.src_pin), set()):
+      for dst_id, dst_pin in sinks:
+        flat.add_wire(Wire(src_id, src_pin, dst_id, dst_pin, wire.width))
+
+  return flat
+
+
+def _inline(flat: Circuit, prefix: str, inner: Circuit):
+  """
+  Copy the gates of a flattened definition into flat. Returns, per input
+  port, the gate pins it feeds and, per output port, the gate outputs
+  driving it. (None, port) marks an input port wired straight through
+  """
+  port_sinks: Dict[str, List[Endpoint]] = {}
+  port_drivers: Dict[str, List[Endpoint]] = {}
+
+  for cid, component in inner.components.items():
+    if component.type == "INPUT":
+      port_sinks[cid] = []
+    elif component.type == "OUTPUT":
+      port_drivers[cid] = []
+    elif component.sequential:
+      # every instance shares the definition, there is nowhere to keep its own state
+      raise ValueError(f"sequential component {cid} inside a subcircuit is not supported")
+    else:
+      flat.add_component(build_component(component.type, (0, 0), f"{prefix}/{cid}",
+                                         width=getattr(component, "width", 8)))
+
+  for wire in inner.wires:
+    src_port = wire.src_id in port_sinks
+    dst_port = wire.dst_id in port_drivers
+    if src_port and dst_port:
+      port_drivers[wire.dst_id].append((None, wire.src_id))
+    elif src_port:
+      port_sinks[wire.src_id].append((f"{prefix}/{wire.dst_id}", wire.dst_pin))
+    elif dst_port:
+      port_drivers[wire.dst_id].append((f"{prefix}/{wire.src_id}", wire.src_pin))
+    else:
+      flat.add_wire(Wire(f"{prefix}/{wire.src_id}", wire.src_pin,
+                         f"{prefix}/{wire.dst_id}", wire.dst_pin, wire.width))
+
+  return port_sinks, port_drivers
@@ -0,0 +1,209 @@
+"""
+four_valued.py
+
+Four-valued 0/1/X/Z simulation. Every net is a pair of bit-planes, the same
+arbitrary width ints as in simulation.bit_parallel: a bit is set in the ones
+plane where the net can be 1 and in the zeros plane where it can be 0.
+
+  0 = (0, 1)    1 = (1, 0)    X = (1, 1)    Z = (0, 0)
+
+X is unknown, from an input nobody set or a flip-flop never loaded, and Z is
+not driven at all. Gates see Z as X, output pins report it as it is.
+"""
+
+from typing import Dict, List, Tuple
+from model.circuit import Circuit
+from simulation.netlist import Netlist
+
+ZERO, ONE, X, Z = "0", "1", "X", "Z"
+
+# (ones, zeros) bit-planes of a net
+Planes = Tuple[int, int]
+
+_PLANES: Dict[str, Planes] = {ZERO: (0, 1), ONE: (1, 0), X: (1, 1), Z: (0, 0)}
+_VALUES: Dict[Planes, str] = {planes: value for value, planes in _PLANES.items()}
+
+
+def to_planes(value: str | bool, width: int = 1) -> Planes:
+  """
+  Bit-planes with every one of width vectors set to value, which is one
+  of 0/1/X/Z or a bool
+  """
+  if isinstance(value, bool):
+    value = ONE if value else ZERO
+  mask = (1 << width) - 1
+  ones, zeros = _PLANES[value]
+  return ones * mask, zeros * mask
+
+
+def from_planes(planes: Planes, vector: int = 0) -> str:
+  """
+  Value of one vector in a pair of bit-planes
+  """
+  ones, zeros = planes
+  return _VALUES[(ones >> vector & 1, zeros >> vector & 1)]
+
+
+class FourValuedSimulator:
+  """
+  Evaluates a circuit over many vectors at once in 0/1/X/Z. Flip-flops
+  start out as X and are loaded by clock
+  """
+
+  def __init__(self, circuit: Circuit):
+    self.netlist = Netlist(circuit, sequential=True)
+    self.state: Dict[str, Tuple[str, ...]] = {}
+    self.reset_state()
+
+    # nets that can be Z and have to be read as X by a gate: only input
+    # components can be left floating, gate outputs always drive
+    input_nets = set(self.netlist.input_nets())
+    self._gates = [
+        (gate_type, out, [(drivers, any(net in input_nets for net in drivers)) for drivers in pins])
+        for gate_type, out, pins in self.netlist.gates
+    ]
+
+  @property
+  def inputs(self) -> List[str]:
+    """
+    Input component ids in the order stimulus is expected
+    """
+    return self.netlist.inputs
+
+  @property
+  def outputs(self) -> List[str]:
+    """
+    Output component ids in the order results are returned
+    """
+    return self.netlist.outputs
+
+  def reset_state(self) -> None:
+    """
+    Put every flip-flop back to X
+    """
+    self.state = {cid: (X,) * len(outs) for cid, _, outs, _ in self.netlist.registers}
+
+  def run(self, stimulus: Dict[str, Planes], width: int) -> Dict[str, Planes]:
+    """
+    Simulate width vectors. stimulus maps input ids to bit-planes, missing
+    inputs are X. Returns the bit-planes of every output id
+    """
+    ones, zeros = self._settle(stimulus, width)
+    return {
+        cid: _resolve(ones, zeros, drivers, (1 << width) - 1)
+        for cid, drivers in zip(self.netlist.outputs, self.netlist.output_drivers)
+    }
+
+  def evaluate(self, values: Dict[str, str | bool]) -> Dict[str, str]:
+    """
+    Single vector convenience around run, values are 0/1/X/Z or bools
+    """
+    result = self.run({cid: to_planes(value) for cid, value in values.items()}, 1)
+    return {cid: from_planes(planes) for cid, planes in result.items()}
+
+  def clock(self, values: Dict[str, str | bool]) -> None:
+    """
+    Settle the circuit with the given inputs and load every flip-flop
+    """
+    ones, zeros = self._settle({cid: to_planes(value) for cid, value in values.items()}, 1)
+    for cid, register_type, outs, pins in self.netlist.registers:
+      operands = [_gate_input(ones, zeros, drivers, True, 1) for drivers in pins]
+      current = [(ones[net], zeros[net]) for net in outs]
+      state = _next_state(register_type, operands, current)
+      self.state[cid] = tuple(from_planes(planes) for planes in state)
+
+  def _settle(self, stimulus: Dict[str, Planes], width: int) -> Tuple[List[int], List[int]]:
+    mask = (1 << width) - 1
+    netlist = self.netlist
+    ones = [mask] * netlist.net_count
+    zeros = [mask] * netlist.net_count
+
+    for cid, net in zip(netlist.inputs, netlist.input_nets()):
+      if cid in stimulus:
+        ones[net], zeros[net] = stimulus[cid][0] & mask, stimulus[cid][1] & mask
+    for cid, _, outs, _ in netlist.registers:
+      for net, value in zip(outs, self.state[cid]):
+        ones[net], zeros[net] = to_planes(value, width)
+
+    for gate_type, out, pins in self._gates:
+      (a_drivers, a_float), *rest = pins
+      if len(a_drivers) == 1 and not a_float:
+        a1, a0 = ones[a_drivers[0]], zeros[a_drivers[0]]
+      else:
+        a1, a0 = _gate_input(ones, zeros, a_drivers, a_float, mask)
+
+      if gate_type == "NOT":
+        ones[out], zeros[out] = a0, a1
+        continue
+
+      b_drivers, b_float = rest[0]
+      if len(b_drivers) == 1 and not b_float:
+        b1, b0 = ones[b_drivers[0]], zeros[b_drivers[0]]
+      else:
+        b1, b0 = _gate_input(ones, zeros, b_drivers, b_float, mask)
+
+      if gate_type == "AND":
+        ones[out], zeros[out] = a1 & b1, a0 | b0
+      else:
+        ones[out], zeros[out] = a1 | b1, a0 & b0
+
+    return ones, zeros
+
+
+def _resolve(ones: List[int], zeros: List[int], drivers: Tuple[int, ...], mask: int) -> Planes:
+  """
+  Wired-OR of several drivers. Drivers at Z take no part, the net is Z only
+  when every driver is
+  """
+  if len(drivers) == 1:
+    return ones[drivers[0]], zeros[drivers[0]]
+
+  one = 0
+  can_be_zero = mask
+  driving = 0
+  for net in drivers:
+    one |= ones[net]
+    can_be_zero &= zeros[net] | ~ones[net]
+    driving |= ones[net] | zeros[net]
+  return one, can_be_zero & driving
+
+
+def _gate_input(ones: List[int], zeros: List[int], drivers: Tuple[int, ...], floating: bool,
+                mask: int) -> Planes:
+  """
+  Value a gate pin sees, Z reads as X. Pins whose drivers can not float
+  skip the Z handling
+  """
+  if not drivers:
+    return mask, mask
+
+  if not floating:
+    one, zero = 0, mask
+    for net in drivers:
+      one |= ones[net]
+      zero &= zeros[net]
+    return one, zero
+
+  one, zero = _resolve(ones, zeros, drivers, mask)
+  undriven = ~(one | zero) & mask
+  return one | undriven, zero | undriven
+
+
+def _next_state(register_type: str, operands: List[Planes], current: List[Planes]) -> List[Planes]:
+  """
+  Bit-planes a register loads on the clock
+  """
+  if register_type in ("DFF", "REGISTER"):
+    return operands
+
+  if register_type == "COUNTER":
+    carry, reset = operands
+    keep = (reset[1], reset[0])
+    bits = []
+    for bit in current:
+      flipped = (bit[0] & carry[1] | bit[1] & carry[0], bit[0] & carry[0] | bit[1] & carry[1])
+      bits.append((keep[0] & flipped[0], keep[1] | flipped[1]))
+      carry = (bit[0] & carry[0], bit[1] | carry[1])
+    return bits
+
+  raise ValueError(f"unsupported component type: {register_type}")
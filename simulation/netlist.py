@@ -0,0 +1,109 @@
+"""
+netlist.py
+
+Lowers a model circuit into flat integer nets so the simulation engines do not
+have to go through component objects, pin dicts and wire lists.
+"""
+
+from typing import Dict, List, Tuple
+from model.circuit import Circuit
+
+GATE_TYPES = ("AND", "OR", "NOT")
+
+# one tuple of driver nets per input pin, several drivers are wired-OR
+PinDrivers = Tuple[Tuple[int, ...], ...]
+
+
+class Netlist:  # pylint: disable=too-few-public-methods
+  """
+  Circuit lowered to numbered nets. Every component output pin gets a net,
+  gates are listed in evaluation order and read the nets driving their pins.
+  Subcircuit instances are flattened first.
+  Inputs and outputs are listed in the order they were added to the circuit.
+  Sequential components are only accepted when asked for; their outputs are
+  nets like the inputs' and they are listed in self.registers with the nets
+  driving each of their pins
+  """
+
+  inputs: List[str]
+  outputs: List[str]
+  net_index: Dict[Tuple[str, str], int]
+  gates: List[Tuple[str, int, PinDrivers]]
+  output_drivers: List[Tuple[int, ...]]
+  registers: List[Tuple[str, str, Tuple[int, ...], PinDrivers]]
+
+  def __init__(self, circuit: Circuit, sequential: bool = False):
+    self.inputs = []
+    self.outputs = []
+    self.net_index = {}
+    self.gates = []
+    self.output_drivers = []
+    self.registers = []
+
+    circuit = circuit.flattened()
+    for cid in circuit._topological_sort():  # pylint: disable=protected-access
+      component = circuit.components.get(cid)
+      if component is None:
+        continue
+
+      if component.sequential and sequential:
+        for pin in component.outputs:
+          self.net_index[(cid, pin)] = len(self.net_index)
+        continue
+
+      drivers = self._pin_drivers(circuit, cid, component.inputs)
+
+      if component.type == "INPUT":
+        self.inputs.append(cid)
+      elif component.type == "OUTPUT":
+        self.outputs.append(cid)
+        self.output_drivers.append(drivers[0])
+        continue
+      elif component.type not in GATE_TYPES:
+        raise ValueError(f"unsupported component type: {component.type}")
+
+      for pin in component.outputs:
+        self.net_index[(cid, pin)] = len(self.net_index)
+
+      if component.type != "INPUT":
+        self.gates.append((component.type, self.net_index[(cid, "OUT")], drivers))
+
+    # wires into a register are not ordering edges, so its drivers are only
+    # all known once every net is
+    for cid, component in circuit.components.items():
+      if component.sequential and sequential:
+        outs = tuple(self.net_index[(cid, pin)] for pin in component.outputs)
+        drivers = self._pin_drivers(circuit, cid, component.inputs)
+        self.registers.append((cid, component.type, outs, drivers))
+
+    # ports follow the order components were added in, not evaluation order
+    placed = {cid: i for i, cid in enumerate(circuit.components)}
+    self.inputs.sort(key=placed.__getitem__)
+    ports = sorted(zip(self.outputs, self.output_drivers), key=lambda port: placed[port[0]])
+    self.outputs = [cid for cid, _ in ports]
+    self.output_drivers = [drivers for _, drivers in ports]
+
+  @property
+  def net_count(self) -> int:
+    """
+    Number of nets in the netlist
+    """
+    return len(self.net_index)
+
+  def input_nets(self) -> List[int]:
+    """
+    Net of each input component, in the same order as self.inputs
+    """
+    return [self.net_index[(cid, "OUT")] for cid in self.inputs]
+
+  def _pin_drivers(self, circuit: Circuit, cid: str, pins) -> PinDrivers:
+    """
+    Nets driving each input pin. Drivers that come later in the order sit on
+    a feedback wire and, like in Circuit.evaluate, are never seen
+    """
+    drivers: Dict[str, List[int]] = {pin: [] for pin in pins}
+    for wire in circuit.fanin(cid):
+      net = self.net_index.get((wire.src_id, wire.src_pin))
+      if net is not None and wire.dst_pin in drivers:
+        drivers[wire.dst_pin].append(net)
+    return tuple(tuple(nets) for nets in drivers.values())
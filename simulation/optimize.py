@@ -0,0 +1,165 @@
+"""
+optimize.py
+
+Logic optimization over a circuit: constant propagation, double NOT removal,
+structural hashing of identical gates and removal of gates that never reach
+an output. Produces a new, smaller circuit that evaluates the same.
+"""
+
+from typing import Dict, List, Tuple
+from model.circuit import Circuit
+from model.wire import Wire
+from simulation.netlist import Netlist
+from utils.component_factory import build_component
+
+# a signal is ("const", value), ("node", id) or ("wor", ids) for a pin with
+# several drivers, which the circuit ORs together
+Signal = Tuple
+FALSE: Signal = ("const", False)
+TRUE: Signal = ("const", True)
+
+CONST_TRUE_ID = "const_1"
+
+
+class _Builder:
+  """
+  Hash-consed gate graph with the local simplification rules
+  """
+
+  def __init__(self):
+    self.nodes: Dict[str, Tuple[str, Tuple[Signal, ...]]] = {}
+    self._table: Dict[Tuple[str, Tuple[Signal, ...]], Signal] = {}
+
+  def wired_or(self, signals: List[Signal]) -> Signal:
+    ids = set()
+    for signal in signals:
+      if signal == TRUE:
+        return TRUE
+      if signal[0] == "node":
+        ids.add(signal[1])
+      elif signal[0] == "wor":
+        ids.update(signal[1])
+    if not ids:
+      return FALSE
+    if len(ids) == 1:
+      return ("node", ids.pop())
+    return ("wor", tuple(sorted(ids)))
+
+  def gate(self, gid: str, gate_type: str, operands: List[Signal]) -> Signal:
+    if gate_type == "NOT":
+      (operand,) = operands
+      if operand[0] == "const":
+        return ("const", not operand[1])
+      inner = self.nodes.get(operand[1]) if operand[0] == "node" else None
+      if inner is not None and inner[0] == "NOT":
+        return inner[1][0]
+      return self._add(gid, "NOT", (operand,))
+
+    dominant, neutral = (FALSE, TRUE) if gate_type == "AND" else (TRUE, FALSE)
+    if dominant in operands:
+      return dominant
+    operands = [operand for operand in operands if operand != neutral]
+    if not operands:
+      return neutral
+    if len(operands) == 1 or operands[0] == operands[1]:
+      return operands[0]
+    if self._complements(*operands):
+      return dominant
+    return self._add(gid, gate_type, tuple(sorted(operands)))
+
+  def _complements(self, a: Signal, b: Signal) -> bool:
+    for x, y in ((a, b), (b, a)):
+      node = self.nodes.get(x[1]) if x[0] == "node" else None
+      if node is not None and node[0] == "NOT" and node[1][0] == y:
+        return True
+    return False
+
+  def _add(self, gid: str, gate_type: str, operands: Tuple[Signal, ...]) -> Signal:
+    key = (gate_type, operands)
+    signal = self._table.get(key)
+    if signal is None:
+      self.nodes[gid] = key
+      signal = self._table[key] = ("node", gid)
+    return signal
+
+
+def optimize(circuit: Circuit) -> Circuit:
+  """
+  Optimized copy of the circuit. Input and output components keep their
+  ids, surviving gates keep the id of the first gate they stand for.
+  Subcircuits are flattened first
+  """
+  netlist = Netlist(circuit)
+  owners = {net: key for key, net in netlist.net_index.items()}
+  builder = _Builder()
+  signals: Dict[int, Signal] = {}
+
+  for cid in netlist.inputs:
+    signals[netlist.net_index[(cid, "OUT")]] = ("node", cid)
+
+  for gate_type, out, pins in netlist.gates:
+    operands = [builder.wired_or([signals[net] for net in drivers]) for drivers in pins]
+    signals[out] = builder.gate(owners[out][0], gate_type, operands)
+
+  results = [builder.wired_or([signals[net] for net in drivers])
+             for drivers in netlist.output_drivers]
+
+  # keep only gates some output depends on
+  live = set()
+  stack = list(results)
+  while stack:
+    for gid in _node_ids(stack.pop()):
+      if gid in builder.nodes and gid not in live:
+        live.add(gid)
+        stack.extend(builder.nodes[gid][1])
+
+  optimized = Circuit()
+  for cid in netlist.inputs:
+    optimized.add_component(build_component("INPUT", (0, 0), cid))
+
+  # every id in the result comes from the circuit, the constant needs one
+  # none of them has
+  taken = set(circuit.components) | {cid for cid, _ in netlist.net_index} | set(netlist.outputs)
+  const_id = _unique_id(CONST_TRUE_ID, taken)
+
+  def connect(signal: Signal, dst_id: str, dst_pin: str) -> None:
+    if signal == TRUE:
+      if const_id not in optimized.components:
+        # a NOT gate with nothing driving it always outputs True
+        optimized.add_component(build_component("NOT", (0, 0), const_id))
+      optimized.add_wire(Wire(const_id, "OUT", dst_id, dst_pin))
+    elif signal[0] == "node":
+      optimized.add_wire(Wire(signal[1], "OUT", dst_id, dst_pin))
+    elif signal[0] == "wor":
+      for src_id in signal[1]:
+        optimized.add_wire(Wire(src_id, "OUT", dst_id, dst_pin))
+
+  gates = [gid for gid in builder.nodes if gid in live]
+  for gid in gates:
+    optimized.add_component(build_component(builder.nodes[gid][0], (0, 0), gid))
+  for gid in gates:
+    component = optimized.components[gid]
+    for pin, operand in zip(component.inputs, builder.nodes[gid][1]):
+      connect(operand, gid, pin)
+
+  for cid, signal in zip(netlist.outputs, results):
+    optimized.add_component(build_component("OUTPUT", (0, 0), cid))
+    connect(signal, cid, "IN")
+
+  return optimized
+
+
+def _unique_id(base: str, taken) -> str:
+  cid, n = base, 1
+  while cid in taken:
+    n += 1
+    cid = f"{base}_{n}"
+  return cid
+
+
+def _node_ids(signal: Signal) -> Tuple[str, ...]:
+  if signal[0] == "node":
+    return (signal[1],)
+  if signal[0] == "wor":
+    return signal[1]
+  return ()
@@ -0,0 +1,56 @@
+"""
+parallel.py
+
+Batch simulation spread over worker processes. Each worker receives the
+compiled circuit once, as generated source, then evaluates the stimulus chunks
+it is handed. Results are yielded in stimulus order as chunks complete.
+"""
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Tuple
+from model.circuit import Circuit
+
+Vector = Tuple[bool, ...]
+
+_worker_function: Callable[[Vector], Vector] | None = None
+
+
+def simulate_batch(circuit: Circuit, stimulus: Iterable[Vector], workers: int | None = None,
+                   chunk_size: int = 4096) -> Iterator[Vector]:
+  """
+  Evaluate every input vector of stimulus, in the input order of
+  circuit.compile(), and yield the output vectors in the same order. The
+  stimulus is consumed lazily so it can be a stream larger than memory
+  """
+  source = circuit.compile().source
+  workers = workers or os.cpu_count() or 1
+  vectors = iter(stimulus)
+
+  with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(source,)) as executor:
+    pending = deque()
+    while True:
+      # keep a couple of chunks per worker in flight, no more
+      while len(pending) < 2 * workers:
+        chunk = list(itertools.islice(vectors, chunk_size))
+        if not chunk:
+          break
+        pending.append(executor.submit(_run_chunk, chunk))
+
+      if not pending:
+        return
+      yield from pending.popleft().result()
+
+
+def _init_worker(source: str) -> None:
+  global _worker_function  # pylint: disable=global-statement
+  namespace = {}
+  exec(compile(source, "<compiled circuit>", "exec"), namespace)  # pylint: disable=exec-used
+  _worker_function = namespace["evaluate"]
+
+
+def _run_chunk(chunk: List[Vector]) -> List[Vector]:
+  function = _worker_function
+  return [function(vector) for vector in chunk]
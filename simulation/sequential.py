@@ -0,0 +1,101 @@
+"""
+sequential.py
+
+Compiles a circuit with clocked components into a Python function that runs
+many clock cycles in one call. The combinational logic is straight-line code
+over local variables, as in simulation.compiler, inside a loop that carries
+the register state from one cycle to the next.
+"""
+
+from typing import Callable, List, Tuple
+from model.circuit import Circuit
+from simulation.compiler import _TEMPLATES, _pin_expression
+from simulation.netlist import Netlist, PinDrivers
+
+Bits = Tuple[bool, ...]
+
+
+class CompiledSequential:  # pylint: disable=too-few-public-methods
+  """
+  Circuit compiled to run(inputs, state, cycles). inputs follow self.inputs
+  and are held for the whole run, state is the concatenated state of
+  self.registers. Returns the state after the last cycle
+  """
+
+  inputs: List[str]
+  registers: List[str]
+  source: str
+
+  def __init__(self, circuit: Circuit):
+    netlist = Netlist(circuit, sequential=True)
+    self.inputs = netlist.inputs
+    self.registers = [cid for cid, _, _, _ in netlist.registers]
+    self.source = generate_source(netlist)
+
+    namespace = {}
+    # pylint: disable-next=exec-used
+    exec(compile(self.source, "<compiled sequential circuit>", "exec"), namespace)
+    self.run: Callable[[Bits, Bits, int], Bits] = namespace["run"]
+
+
+def generate_source(netlist: Netlist) -> str:
+  """
+  Python source of a run(inputs, state, cycles) function for the netlist
+  """
+  lines = ["def run(inputs, state, cycles):"]
+
+  input_nets = netlist.input_nets()
+  if input_nets:
+    lines.append(f"    {''.join(f'n{net}, ' for net in input_nets)}= inputs")
+
+  state_nets = [net for _, _, outs, _ in netlist.registers for net in outs]
+  if not state_nets:
+    lines.append("    return ()")
+    return "\n".join(lines) + "\n"
+  lines.append(f"    {''.join(f'n{net}, ' for net in state_nets)}= state")
+
+  # only the cone feeding the registers has to run every cycle, outputs are
+  # settled once after the run
+  live = {net for _, _, _, pins in netlist.registers for drivers in pins for net in drivers}
+  cone = []
+  for gate_type, out, pins in reversed(netlist.gates):
+    if out in live:
+      cone.append((gate_type, out, pins))
+      live.update(net for drivers in pins for net in drivers)
+
+  lines.append("    for _ in range(cycles):")
+  for gate_type, out, pins in reversed(cone):
+    operands = [_pin_expression(drivers) for drivers in pins]
+    lines.append(f"        n{out} = {_TEMPLATES[gate_type].format(*operands)}")
+
+  # every register latches at once, so next states go to temporaries first
+  next_state = []
+  for index, (_, register_type, outs, pins) in enumerate(netlist.registers):
+    next_state += _next_state(lines, f"r{index}_", register_type, outs, pins)
+  lines.append(f"        {''.join(f'n{net}, ' for net in state_nets)}= {', '.join(next_state)},")
+
+  lines.append(f"    return ({''.join(f'n{net}, ' for net in state_nets)})")
+  return "\n".join(lines) + "\n"
+
+
+def _next_state(lines: List[str], prefix: str, register_type: str, outs: Tuple[int, ...],
+                pins: PinDrivers) -> List[str]:
+  """
+  Emit the loop body lines computing a register's next state, returns the
+  expression of each state bit
+  """
+  if register_type in ("DFF", "REGISTER"):
+    return [_pin_expression(drivers) for drivers in pins]
+
+  if register_type == "COUNTER":
+    enable, reset = (_pin_expression(drivers) for drivers in pins)
+    lines.append(f"        {prefix}c = {enable}")
+    lines.append(f"        {prefix}k = not {reset}")
+    bits = []
+    for bit, net in enumerate(outs):
+      lines.append(f"        {prefix}{bit} = {prefix}k and (n{net} != {prefix}c)")
+      lines.append(f"        {prefix}c = n{net} and {prefix}c")
+      bits.append(f"{prefix}{bit}")
+    return bits
+
+  raise ValueError(f"unsupported component type: {register_type}")
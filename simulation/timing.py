@@ -0,0 +1,181 @@
+"""
+timing.py
+
+Discrete-event simulation with a propagation delay per component type.
+Output changes are scheduled on a timing wheel and only the components fed by
+a net that actually changed are evaluated, so the work follows circuit
+activity instead of circuit size. Glitches show up in the trace, and
+feedback loops that never settle are caught by an event budget.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+from model.circuit import Circuit
+from model.component import ComponentType
+from model.net import NetIndex
+
+# time units from an input change to the output change it causes
+DEFAULT_DELAYS: Dict[str, int] = {
+    ComponentType.AND: 1,
+    ComponentType.OR: 1,
+    ComponentType.NOT: 1,
+    ComponentType.INPUT: 0,
+    ComponentType.OUTPUT: 0,
+    ComponentType.SUBCIRCUIT: 1,
+    ComponentType.ADD: 4,
+    ComponentType.MUX: 1,
+    ComponentType.COMPARE: 3,
+    ComponentType.BUS_AND: 1,
+    ComponentType.BUS_OR: 1,
+    ComponentType.BUS_XOR: 1,
+    ComponentType.BUS_NOT: 1,
+    ComponentType.SPLIT: 0,
+    ComponentType.MERGE: 0,
+}
+
+# (time, component id, output pin, value)
+Change = Tuple[int, str, str, bool]
+
+
+@dataclass
+class Settle:
+  """
+  Result of running the simulator until no events are left
+  """
+
+  time: int
+  events: int
+  stable: bool
+
+
+class TimingSimulator:
+  """
+  Event-driven simulator over a model circuit. Feedback wires are part of
+  the simulation, unlike in Circuit.evaluate. Sequential components only
+  change on Circuit.clock and are treated as sources here
+  """
+
+  circuit: Circuit
+  delays: Dict[str, int]
+  budget: int
+  now: int
+  trace: List[Change]
+
+  def __init__(self, circuit: Circuit, delays: Dict[str, int] | None = None,
+               budget: int = 100_000, record: bool = False):
+    self.circuit = circuit
+    self.delays = {**DEFAULT_DELAYS, **(delays or {})}
+    self.budget = budget
+    self.record = record
+    self.now = 0
+    self.trace = []
+
+    # every delay fits inside the wheel, so a slot only ever holds events
+    # for the time it is visited next
+    size = 1 << max(self.delays.values()).bit_length()
+    self._mask = size - 1
+    self._wheel: List[List[Tuple[str, Tuple[bool, ...]]]] = [[] for _ in range(size)]
+    self._pending = 0
+    self._version: Any = -1
+    self._nets: NetIndex | None = None
+
+  def reset(self) -> Settle:
+    """
+    Settle the circuit from a zero-delay evaluation, then let feedback
+    loops run. Called automatically after the circuit is edited
+    """
+    for bucket in self._wheel:
+      bucket.clear()
+    self._pending = 0
+
+    self.circuit.evaluate()
+    self._version = self.circuit.version
+    self._nets = NetIndex(self.circuit, feedback=True)
+
+    affected = {}
+    for net in self._nets.nets:
+      if net.update():
+        affected.update(dict.fromkeys(net.loads))
+    for cid in affected:
+      self._evaluate(cid)
+    return self.run()
+
+  def set_input(self, cid: str, value: bool, pin: str = "OUT") -> Settle:
+    """
+    Drive an input component at the current time and run until the circuit
+    settles or the event budget runs out
+    """
+    if self._version != self.circuit.version:
+      self.reset()
+
+    component = self.circuit.components[cid]
+    outputs = list(component.cells[len(component.layout.inputs):])
+    outputs[component.layout.output_index[pin] - len(component.layout.inputs)] = value
+    self._schedule(self.now, cid, tuple(outputs))
+    return self.run()
+
+  def run(self) -> Settle:
+    """
+    Process events until none are left or the budget is used up. The time
+    reported is from the start of the run to the last output change
+    """
+    components = self.circuit.components
+    driven = self._nets.driven
+    wheel = self._wheel
+    start = last_change = self.now
+    events = 0
+
+    while self._pending:
+      slot = self.now & self._mask
+      bucket = wheel[slot]
+      if not bucket:
+        self.now += 1
+        continue
+      wheel[slot] = []
+      self._pending -= len(bucket)
+
+      affected = {}
+      for cid, outputs in bucket:
+        events += 1
+        component = components[cid]
+        count = len(component.layout.inputs)
+        if tuple(component.cells[count:]) == outputs:
+          continue
+
+        component.cells[count:] = outputs
+        last_change = self.now
+        if self.record:
+          for pin, value in zip(component.layout.outputs, outputs):
+            self.trace.append((self.now, cid, pin, value))
+        for net in driven.get(cid, ()):
+          if net.update():
+            affected.update(dict.fromkeys(net.loads))
+
+      for cid in affected:
+        self._evaluate(cid)
+
+      if events > self.budget:
+        return Settle(last_change - start, events, False)
+
+    return Settle(last_change - start, events, True)
+
+  def _evaluate(self, cid: str) -> None:
+    """
+    Compute a component from its current inputs and schedule the result
+    after its delay, leaving its outputs as they are until then
+    """
+    component = self.circuit.components[cid]
+    if component.sequential or not component.layout.outputs:
+      return
+
+    cells = component.cells
+    count = len(component.layout.inputs)
+    before = cells[count:]
+    component.compute()
+    outputs = tuple(cells[count:])
+    cells[count:] = before
+    self._schedule(self.now + self.delays[component.type], cid, outputs)
+
+  def _schedule(self, time: int, cid: str, outputs: Tuple[bool, ...]) -> None:
+    self._wheel[time & self._mask].append((cid, outputs))
+    self._pending += 1
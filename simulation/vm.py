@@ -0,0 +1,329 @@
+"""
+vm.py
+
+Interpreter evaluating a circuit from a flat instruction array. Each component
+and each wire is one fixed width instruction (opcode, src, src, dst) over a
+bytearray of pin and net values. The interpreter listens to the circuit and
+patches single instructions as gates and wires are added or deleted, instead
+of lowering the whole netlist again.
+
+Every opcode is a builtin binary operator: a wire ORs its source into its
+destination and NOT is XOR with a slot holding 1. Running dispatches through
+that table over the decoded instructions, no-ops left out, which are decoded
+again only after the array was patched.
+
+Subcircuit instances are lowered from Circuit.flattened, and every edit then
+lowers again on the next run. Circuits with components the instruction set
+has no opcode for, such as flip-flops and word-level components, are run
+through Circuit.evaluate instead.
+"""
+
+import operator
+from array import array
+from typing import Dict, List, Tuple
+from model.circuit import Circuit
+from model.component import Component
+from model.wire import Wire
+from utils.topo_order import TopologicalOrder
+
+OP_NOP = 0
+OP_WIRE = 1
+OP_AND = 2
+OP_OR = 3
+OP_NOT = 4
+
+_GATE_OPS = {"AND": OP_AND, "OR": OP_OR, "NOT": OP_NOT}
+_OPERATORS = {
+    OP_WIRE: operator.or_,
+    OP_AND: operator.and_,
+    OP_OR: operator.or_,
+    OP_NOT: operator.xor,
+}
+
+Instruction = Tuple[int, int, int, int]
+
+
+def _lowerable(component: Component) -> bool:
+  return component.type in _GATE_OPS or component.type in ("INPUT", "OUTPUT")
+
+
+class _CodeOrder(TopologicalOrder):
+  """
+  Topological order whose positions are instruction slots. Every node it
+  moves has its instruction moved along with it
+  """
+
+  def __init__(self, vm: "CircuitVM"):
+    super().__init__()
+    self._vm = vm
+
+  def _reorder(self, forward, backward) -> None:
+    super()._reorder(forward, backward)
+    for node in backward + forward:
+      self._vm.place(node)
+
+  def _compact(self) -> None:
+    super()._compact()
+    self._vm.relayout()
+
+
+class CircuitVM:
+  """
+  Instruction array interpreter kept in sync with a circuit
+  """
+
+  inputs: List[str]
+  outputs: List[str]
+
+  def __init__(self, circuit: Circuit):
+    self.circuit = circuit
+    circuit.add_listener(self)
+    self._rebuild()
+
+  # -----------------------------------------------------------------------
+  # evaluation
+  # -----------------------------------------------------------------------
+
+  def run(self, values: Tuple[bool, ...]) -> Tuple[bool, ...]:
+    """
+    Evaluate with input values in the order of self.inputs, returns output
+    values in the order of self.outputs
+    """
+    # reading the version picks up wires appended to circuit.wires directly,
+    # it also moves when a definition a flattened program came from reloads
+    version = self.circuit.version
+    if not self._patchable and version != self._version:
+      self._stale = True
+    if self._stale:
+      self._rebuild()
+    if self._fallback:
+      return self._evaluate(values)
+
+    program = self._program
+    if program is None:
+      code = self.code
+      program = self._program = [
+          (_OPERATORS[code[i]], code[i + 1], code[i + 2], code[i + 3])
+          for i in range(0, len(code), 4) if code[i] != OP_NOP]
+
+    nets = bytearray(self._slot_count)
+    nets[self._one] = 1
+    for slot, value in zip(self._input_slots, values):
+      nets[slot] = value
+
+    for operation, a, b, dst in program:
+      nets[dst] = operation(nets[a], nets[b])
+
+    return tuple(bool(nets[slot]) for slot in self._output_slots)
+
+  def _evaluate(self, values: Tuple[bool, ...]) -> Tuple[bool, ...]:
+    """
+    Evaluate the circuit itself. Its pin values are put back afterwards so
+    running does not change what the circuit shows, and its next set_input
+    evaluates in full since its nets still hold the values of this run
+    """
+    circuit = self.circuit
+    components = circuit.components
+    saved = [(component, component.cells[:]) for component in components.values()]
+    try:
+      for cid, value in zip(self.inputs, values):
+        components[cid].outputs["OUT"] = value
+      circuit.evaluate()
+      return tuple(components[cid].inputs["IN"] for cid in self.outputs)
+    finally:
+      for component, cells in saved:
+        component.cells[:] = cells
+      circuit._evaluated_revision = -1  # pylint: disable=protected-access
+
+  # -----------------------------------------------------------------------
+  # circuit listener
+  # -----------------------------------------------------------------------
+
+  def component_added(self, component: Component) -> None:
+    """
+    Allocate slots for the component and append its instruction. Components
+    without an opcode are picked up by lowering again on the next run
+    """
+    if self._stale or not self._patchable or not _lowerable(component):
+      self._stale = True
+      return
+
+    cid = component.id
+    for pin in component.inputs:
+      self._pins[(cid, pin)] = self._alloc()
+    for pin in component.outputs:
+      self._nets[(cid, pin)] = self._alloc()
+
+    if component.type == "INPUT":
+      self.inputs.append(cid)
+      self._input_slots.append(self._nets[(cid, "OUT")])
+      record = (OP_NOP, 0, 0, 0)
+    elif component.type == "OUTPUT":
+      self.outputs.append(cid)
+      self._output_slots.append(self._pins[(cid, "IN")])
+      record = (OP_NOP, 0, 0, 0)
+    else:
+      pins = [self._pins[(cid, pin)] for pin in component.inputs] + [self._one]
+      record = (_GATE_OPS[component.type], pins[0], pins[1], self._nets[(cid, "OUT")])
+
+    self._records[cid] = record
+    self._order.add_node(cid)
+    self.place(cid)
+
+  def component_deleted(self, component: Component, wires: List[Wire]) -> None:
+    """
+    Turn the component's and its wires' instructions into no-ops
+    """
+    if self._stale or not self._patchable:
+      self._stale = True
+      return
+    for wire in wires:
+      self._drop(wire)
+    self._drop(component.id)
+
+    cid = component.id
+    for pin in component.inputs:
+      self._free.append(self._pins.pop((cid, pin)))
+    for pin in component.outputs:
+      self._free.append(self._nets.pop((cid, pin)))
+
+    if component.type == "INPUT":
+      index = self.inputs.index(cid)
+      del self.inputs[index]
+      del self._input_slots[index]
+    elif component.type == "OUTPUT":
+      index = self.outputs.index(cid)
+      del self.outputs[index]
+      del self._output_slots[index]
+
+    self._retry_cyclic()
+
+  def wire_added(self, wire: Wire) -> None:
+    """
+    Add an instruction ORing the source net into the destination pin
+    """
+    if self._stale or not self._patchable:
+      self._stale = True
+      return
+    src = self._nets.get((wire.src_id, wire.src_pin))
+    dst = self._pins.get((wire.dst_id, wire.dst_pin))
+    if src is None or dst is None:
+      # wire to a component the circuit does not have (yet)
+      self._stale = True
+      return
+
+    self._records[wire] = (OP_WIRE, src, dst, dst)
+    self._order.add_node(wire)
+    self._order.add_edge(wire.src_id, wire)
+    if not self._order.add_edge(wire, wire.dst_id):
+      # feedback wire, Circuit.evaluate never lets the destination see it
+      self._cyclic.append(wire)
+      self._records[wire] = (OP_NOP, 0, 0, 0)
+    self.place(wire)
+
+  def wire_deleted(self, wire: Wire) -> None:
+    """
+    Turn the wire's instruction into a no-op
+    """
+    if self._stale or not self._patchable:
+      self._stale = True
+      return
+    self._drop(wire)
+    self._retry_cyclic()
+
+  def circuit_reset(self) -> None:
+    """
+    The circuit rebuilt its wire index, lower everything again on next run
+    """
+    self._stale = True
+
+  # -----------------------------------------------------------------------
+  # instruction layout
+  # -----------------------------------------------------------------------
+
+  def place(self, node) -> None:
+    """
+    Write a node's instruction into the slot matching its position
+    """
+    index = 4 * self._order.position(node)
+    code = self.code
+    if index >= len(code):
+      code.extend([OP_NOP] * (index + 4 - len(code)))
+    code[index:index + 4] = array("i", self._records[node])
+    self._program = None
+
+  def relayout(self) -> None:
+    """
+    Slide every instruction down to its slot after the order was compacted.
+    Compaction keeps relative order, so writing front to back is safe
+    """
+    for node in self._order.order():
+      self.place(node)
+    del self.code[4 * len(self._order):]
+
+  def _drop(self, node) -> None:
+    if node in self._cyclic:
+      self._cyclic.remove(node)
+    index = 4 * self._order.position(node)
+    self.code[index:index + 4] = array("i", (OP_NOP, 0, 0, 0))
+    self._program = None
+    del self._records[node]
+    self._order.remove_node(node)
+
+  def _retry_cyclic(self) -> None:
+    for wire in list(self._cyclic):
+      if self._order.add_edge(wire, wire.dst_id):
+        self._cyclic.remove(wire)
+        dst = self._pins[(wire.dst_id, wire.dst_pin)]
+        self._records[wire] = (OP_WIRE, self._nets[(wire.src_id, wire.src_pin)], dst, dst)
+        self.place(wire)
+
+  def _alloc(self) -> int:
+    if self._free:
+      return self._free.pop()
+    self._slot_count += 1
+    return self._slot_count - 1
+
+  def _rebuild(self) -> None:
+    self.code = array("i")
+    self._program: List[Tuple] | None = None
+    self.inputs = []
+    self.outputs = []
+    self._input_slots: List[int] = []
+    self._output_slots: List[int] = []
+    self._records: Dict[object, Instruction] = {}
+    self._pins: Dict[Tuple[str, str], int] = {}
+    self._nets: Dict[Tuple[str, str], int] = {}
+    self._free: List[int] = []
+    self._slot_count = 0
+    # slot holding 1, NOT gates XOR their input with it
+    self._one = self._alloc()
+    self._cyclic: List[Wire] = []
+    self._order = _CodeOrder(self)
+    self._stale = False
+    # edits are patched into the program only when it was lowered from the
+    # circuit itself, not from its flattened copy or not at all
+    self._patchable = True
+    self._fallback = False
+    self._version = self.circuit.version
+
+    source = self.circuit
+    if not all(map(_lowerable, source.components.values())):
+      try:
+        source = self.circuit.flattened()
+      except ValueError:
+        # sequential components inside a subcircuit
+        pass
+      if not all(map(_lowerable, source.components.values())):
+        self._fallback = True
+        self._patchable = False
+        components = self.circuit.components
+        self.inputs = [cid for cid, comp in components.items() if comp.type == "INPUT"]
+        self.outputs = [cid for cid, comp in components.items() if comp.type == "OUTPUT"]
+        return
+
+    for component in source.components.values():
+      self.component_added(component)
+    for wire in source.wires:
+      self.wire_added(wire)
+    self._patchable = source is self.circuit
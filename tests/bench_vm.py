@@ -0,0 +1,54 @@
+"""
+bench_vm.py
+
+Times the instruction array interpreter against Circuit.evaluate on random
+circuits. Not collected by the test runner, run it with
+
+    python -m tests.bench_vm
+"""
+
+import random
+import time
+from model.circuit import Circuit
+from tests.circuit_builders import random_circuit, input_ids
+
+
+def time_per_vector(run, vectors, repeat: int = 5) -> float:
+    """
+    Best of repeat runs over all vectors, in microseconds per vector
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for vector in vectors:
+            run(vector)
+        best = min(best, time.perf_counter() - start)
+    return best / len(vectors) * 1e6
+
+
+def evaluate_runner(circuit: Circuit):
+    inputs = [circuit.components[cid] for cid in input_ids(circuit)]
+
+    def run(vector):
+        for component, value in zip(inputs, vector):
+            component.outputs["OUT"] = value
+        circuit.evaluate()
+    return run
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'gates':>8} {'evaluate us':>12} {'vm us':>10} {'speedup':>8}")
+    for n_gates in (100, 1000, 10000):
+        circuit = random_circuit(1, n_inputs=16, n_gates=n_gates, n_outputs=32)
+        vm = circuit.interpreter()
+        count = max(10, 20000 // n_gates)
+        vectors = [tuple(rng.random() < 0.5 for _ in vm.inputs) for _ in range(count)]
+        evaluate = time_per_vector(evaluate_runner(circuit), vectors)
+        interpreted = time_per_vector(vm.run, vectors)
+        speedup = evaluate / interpreted
+        print(f"{n_gates:>8} {evaluate:>12.1f} {interpreted:>10.1f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
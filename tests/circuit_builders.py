@@ -0,0 +1,102 @@
+"""
+circuit_builders.py
+
+Helpers building circuits shared by the simulation tests.
+"""
+
+import random
+from typing import List
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import (AndComponent, OrComponent, NotComponent, OutputComponent,
+                             InputComponent, Component, RegisterComponent)
+from utils.id_generator import ComponentIDGenerator
+
+
+def random_circuit(seed: int, n_inputs: int = 6, n_gates: int = 60, n_outputs: int = 10) -> Circuit:
+    """
+    Random combinational circuit of AND/OR/NOT gates. Some pins get several
+    drivers to exercise wired-OR and some stay undriven
+    """
+    rng = random.Random(seed)
+    circuit = Circuit()
+    cid_gen = ComponentIDGenerator()
+
+    sources: List[Component] = []
+    for _ in range(n_inputs):
+        component = InputComponent(cid_gen.gen_id())
+        circuit.add_component(component)
+        sources.append(component)
+
+    for _ in range(n_gates):
+        gate: Component = rng.choice([AndComponent, OrComponent, NotComponent])(cid_gen.gen_id())
+        circuit.add_component(gate)
+        for pin in gate.inputs:
+            for _ in range(rng.choice([0, 1, 1, 1, 1, 1, 2])):
+                circuit.add_wire(Wire(rng.choice(sources).id, "OUT", gate.id, pin))
+        sources.append(gate)
+
+    for source in sources[-n_outputs:]:
+        output = OutputComponent(cid_gen.gen_id())
+        circuit.add_component(output)
+        circuit.add_wire(Wire(source.id, "OUT", output.id, "IN"))
+
+    return circuit
+
+
+def random_sequential_circuit(seed: int, n_inputs: int = 4, n_gates: int = 60,
+                              width: int = 8) -> Circuit:
+    """
+    Random state machine: a register whose next state is random logic of
+    its own outputs and the inputs
+    """
+    rng = random.Random(seed)
+    circuit = Circuit()
+    cid_gen = ComponentIDGenerator()
+
+    register = RegisterComponent(cid_gen.gen_id(), width)
+    circuit.add_component(register)
+    sources = [(register.id, pin) for pin in register.outputs]
+    for _ in range(n_inputs):
+        component = InputComponent(cid_gen.gen_id())
+        circuit.add_component(component)
+        sources.append((component.id, "OUT"))
+
+    gates: List[str] = []
+    for _ in range(n_gates):
+        gate: Component = rng.choice([AndComponent, OrComponent, NotComponent])(cid_gen.gen_id())
+        circuit.add_component(gate)
+        for pin in gate.inputs:
+            src_id, src_pin = rng.choice(sources)
+            circuit.add_wire(Wire(src_id, src_pin, gate.id, pin))
+        sources.append((gate.id, "OUT"))
+        gates.append(gate.id)
+
+    for pin, gate_id in zip(register.inputs, gates[-width:]):
+        circuit.add_wire(Wire(gate_id, "OUT", register.id, pin))
+
+    return circuit
+
+
+def input_ids(circuit: Circuit) -> List[str]:
+    """
+    Ids of the input components in insertion order
+    """
+    return [cid for cid, comp in circuit.components.items() if comp.type == "INPUT"]
+
+
+def output_ids(circuit: Circuit) -> List[str]:
+    """
+    Ids of the output components in insertion order
+    """
+    return [cid for cid, comp in circuit.components.items() if comp.type == "OUTPUT"]
+
+
+def evaluate_vector(circuit: Circuit, values: List[bool]) -> List[bool]:
+    """
+    Reference result from Circuit.evaluate for one input vector
+    """
+    for cid, value in zip(input_ids(circuit), values):
+        circuit.components[cid].outputs["OUT"] = value
+    circuit.evaluate()
+    return [circuit.components[cid].inputs["IN"] for cid in output_ids(circuit)]
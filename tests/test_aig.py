@@ -0,0 +1,65 @@
+"""
+test_aig.py
+
+Test module for the array-backed And-Inverter Graph.
+"""
+
+import itertools
+import unittest
+from model.circuit import Circuit
+from model.component import AndComponent, InputComponent, NotComponent, OrComponent, OutputComponent
+from model.wire import Wire
+from simulation.aig import AIG, negate
+from simulation.bit_parallel import BitParallelSimulator, exhaustive_patterns
+from tests.circuit_builders import random_circuit
+
+
+class TestAIG(unittest.TestCase):
+    def test_structural_hashing(self):
+        aig = AIG()
+        a, b = aig.add_input("a"), aig.add_input("b")
+
+        self.assertEqual(aig.add_and(a, b), aig.add_and(b, a))
+        self.assertEqual(aig.add_and(a, negate(a)), 0)
+        self.assertEqual(aig.add_and(a, a), a)
+        self.assertEqual(aig.and_count, 1)
+
+    def test_simulation_matches_circuit(self):
+        for seed in range(4):
+            circuit = random_circuit(seed, n_inputs=6)
+            aig = AIG.from_circuit(circuit)
+            expected = BitParallelSimulator(circuit).exhaustive()
+
+            words = aig.simulate(exhaustive_patterns(6), 64)
+            self.assertEqual(words, [expected[cid] for cid in aig.output_names])
+
+    def test_round_trip(self):
+        circuit = random_circuit(5, n_inputs=5)
+        rebuilt = AIG.from_circuit(circuit).to_circuit()
+
+        original, converted = circuit.compile(), rebuilt.compile()
+        self.assertEqual(converted.inputs, original.inputs)
+        for vector in itertools.product([False, True], repeat=5):
+            self.assertEqual(converted(vector), original(vector))
+
+    def test_port_names_like_generated_ids(self):
+        circuit = Circuit()
+        for component in (InputComponent("a3"), InputComponent("n3"), InputComponent("n0"),
+                          AndComponent("g"), NotComponent("inv"), OrComponent("any"),
+                          OutputComponent("a4"), OutputComponent("n5"), OutputComponent("o0")):
+            circuit.add_component(component)
+        for src, dst, pin in (("a3", "g", "A"), ("n3", "g", "B"), ("g", "inv", "IN"),
+                              ("inv", "any", "A"), ("n0", "any", "B"), ("inv", "a4", "IN"),
+                              ("any", "n5", "IN"), ("g", "o0", "IN")):
+            circuit.add_wire(Wire(src, "OUT", dst, pin))
+
+        aig = AIG.from_circuit(circuit)
+        aig.add_output(1, "")
+        rebuilt = aig.to_circuit()
+        for cid in ("a3", "n3", "n0", "a4", "n5", "o0"):
+            self.assertIn(rebuilt.components[cid].type, ("INPUT", "OUTPUT"))
+
+        original, converted = circuit.compile(), rebuilt.compile()
+        for vector in itertools.product([False, True], repeat=3):
+            self.assertEqual(list(converted(vector))[:3], list(original(vector)))
+            self.assertTrue(list(converted(vector))[3])
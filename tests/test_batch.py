@@ -0,0 +1,34 @@
+"""
+test_batch.py
+
+Test module for the numpy batch simulator.
+"""
+
+import random
+import unittest
+from tests.circuit_builders import random_circuit, evaluate_vector, output_ids
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestBatchSimulation(unittest.TestCase):
+    def test_matches_evaluate(self):
+        rng = random.Random(5)
+        for seed in range(4):
+            circuit = random_circuit(seed, n_inputs=8, n_gates=120)
+            stimulus = np.array([[rng.random() < 0.5 for _ in range(8)] for _ in range(40)])
+
+            result = circuit.evaluate_batch(stimulus, chunk_size=16)
+
+            for row, vector in enumerate(stimulus):
+                expected = evaluate_vector(circuit, [bool(v) for v in vector])
+                self.assertEqual([bool(result[cid][row]) for cid in output_ids(circuit)], expected)
+
+    def test_bad_stimulus_shape(self):
+        circuit = random_circuit(1, n_inputs=3)
+        with self.assertRaises(ValueError):
+            circuit.evaluate_batch(np.zeros((4, 2), dtype=bool))
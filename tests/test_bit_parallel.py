@@ -0,0 +1,39 @@
+"""
+test_bit_parallel.py
+
+Test module for the bit-parallel simulation engine.
+"""
+
+import unittest
+from simulation.bit_parallel import BitParallelSimulator, exhaustive_patterns
+from tests.circuit_builders import random_circuit, evaluate_vector
+
+
+class TestBitParallelSimulator(unittest.TestCase):
+    def test_exhaustive_patterns(self):
+        self.assertEqual(exhaustive_patterns(3), [0b10101010, 0b11001100, 0b11110000])
+
+        patterns = exhaustive_patterns(20)
+        for vector in (0, 1, 5, 77777, (1 << 20) - 1):
+            self.assertEqual([bool(word >> vector & 1) for word in patterns],
+                             [bool(vector >> k & 1) for k in range(20)])
+
+    def test_matches_evaluate(self):
+        for seed in range(4):
+            circuit = random_circuit(seed, n_inputs=5)
+            table = BitParallelSimulator(circuit).truth_table()
+
+            self.assertEqual(len(table), 32)
+            for inputs, outputs in table:
+                self.assertEqual(list(outputs), evaluate_vector(circuit, list(inputs)))
+
+    def test_wide_run(self):
+        circuit = random_circuit(9, n_inputs=16, n_gates=200)
+        simulator = BitParallelSimulator(circuit)
+        result = simulator.exhaustive()
+
+        for vector in (0, 1, 12345, 65535):
+            inputs = [bool(vector >> k & 1) for k in range(16)]
+            expected = evaluate_vector(circuit, inputs)
+            bits = [bool(result[cid] >> vector & 1) for cid in simulator.outputs]
+            self.assertEqual(bits, expected)
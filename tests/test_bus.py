@@ -0,0 +1,104 @@
+"""
+test_bus.py
+
+Test module for bus wires and word-level components.
+"""
+
+import unittest
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import (AddComponent, AndComponent, BitwiseComponent, CompareComponent,
+                             Component, InputComponent, MergeComponent, MuxComponent,
+                             OutputComponent, SplitComponent)
+from model.serializer import circuit_from_json, circuit_to_json
+from utils.component_factory import build_component
+
+
+class TestBus(unittest.TestCase):
+    def setUp(self):
+        # sum = sel ? a + b : a ^ b, plus a comparison of a and b
+        self.circuit: Circuit = Circuit()
+        for component in (InputComponent("a"), InputComponent("b"), InputComponent("sel"),
+                          AddComponent("add", 32), BitwiseComponent("xor", "XOR", 32),
+                          MuxComponent("mux", 32), CompareComponent("cmp", 32),
+                          OutputComponent("out"), OutputComponent("carry"), OutputComponent("lt")):
+            self.circuit.add_component(component)
+
+        for wire in (Wire("a", "OUT", "add", "A", 32), Wire("b", "OUT", "add", "B", 32),
+                     Wire("a", "OUT", "xor", "A", 32), Wire("b", "OUT", "xor", "B", 32),
+                     Wire("xor", "OUT", "mux", "A", 32), Wire("add", "OUT", "mux", "B", 32),
+                     Wire("sel", "OUT", "mux", "SEL"), Wire("mux", "OUT", "out", "IN", 32),
+                     Wire("add", "COUT", "carry", "IN"), Wire("a", "OUT", "cmp", "A", 32),
+                     Wire("b", "OUT", "cmp", "B", 32), Wire("cmp", "LT", "lt", "IN")):
+            self.circuit.add_wire(wire)
+
+    def read(self, cid: str):
+        return self.circuit.components[cid].inputs["IN"]
+
+    def test_word_datapath(self):
+        self.circuit.set_input("a", 0xFFFF_FFFF)
+        self.circuit.set_input("b", 2)
+        self.assertEqual(self.read("out"), 0xFFFF_FFFD)
+        self.assertFalse(self.read("lt"))
+
+        self.circuit.set_input("sel", True)
+        self.assertEqual(self.read("out"), 1)
+        self.assertTrue(self.read("carry"))
+
+        self.circuit.set_input("a", 1)
+        self.assertEqual(self.read("out"), 3)
+        self.assertFalse(self.read("carry"))
+        self.assertTrue(self.read("lt"))
+
+    def test_width_checked(self):
+        with self.assertRaises(ValueError):
+            self.circuit.add_wire(Wire("a", "OUT", "add", "CIN", 32))
+        with self.assertRaises(ValueError):
+            self.circuit.add_wire(Wire("add", "OUT", "mux", "SEL", 32))
+
+    def test_split_and_merge(self):
+        circuit = Circuit()
+        for component in (InputComponent("bus"), SplitComponent("split", 4), AndComponent("and"),
+                          MergeComponent("merge", 4), OutputComponent("out")):
+            circuit.add_component(component)
+        circuit.add_wire(Wire("bus", "OUT", "split", "IN", 4))
+        circuit.add_wire(Wire("split", "OUT0", "and", "A"))
+        circuit.add_wire(Wire("split", "OUT1", "and", "B"))
+        circuit.add_wire(Wire("and", "OUT", "merge", "IN3"))
+        circuit.add_wire(Wire("split", "OUT2", "merge", "IN0"))
+        circuit.add_wire(Wire("merge", "OUT", "out", "IN", 4))
+
+        circuit.set_input("bus", 0b0111)
+        self.assertEqual(circuit.components["out"].inputs["IN"], 0b1001)
+
+    def test_wired_or_bus(self):
+        self.circuit.add_component(OutputComponent("both"))
+        self.circuit.add_wire(Wire("a", "OUT", "both", "IN", 32))
+        self.circuit.add_wire(Wire("b", "OUT", "both", "IN", 32))
+        self.circuit.set_input("a", 0b0101)
+        self.circuit.set_input("b", 0b0011)
+        self.assertEqual(self.read("both"), 0b0111)
+
+    def test_round_trip(self):
+        self.circuit.set_input("a", 7)
+        data = circuit_to_json(self.circuit)
+        loaded = circuit_from_json(data)
+        self.assertEqual(circuit_to_json(loaded), data)
+        self.assertEqual(loaded.components["add"].width, 32)
+
+        loaded.set_input("b", 5)
+        self.assertEqual(loaded.components["out"].inputs["IN"], 7 ^ 5)
+
+    def test_unknown_types(self):
+        # saved by a newer version, loads as a plain component and saves back unchanged
+        for kind in ("GIZMO", "BUS_NAND"):
+            data = {"cid": "g", "type": kind, "inputs": {"A": 3, "B": 5}, "outputs": {"OUT": 0}}
+            loaded = circuit_from_json({"components": [data], "wires": []})
+            self.assertEqual(type(loaded.components["g"]), Component)
+            self.assertEqual(loaded.components["g"].type, kind)
+            self.assertEqual(circuit_to_json(loaded)["components"], [data])
+
+        self.assertIsNone(build_component("BUS_FOO", (0, 0), "foo", width=4))
+        self.assertIsNone(build_component("BUS_NAND", (0, 0), "nand", width=4))
+        with self.assertRaises(ValueError):
+            BitwiseComponent("nand", "NAND", 4)
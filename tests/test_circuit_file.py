@@ -0,0 +1,75 @@
+"""
+test_circuit_file.py
+
+Test module for the json and binary circuit file formats.
+"""
+
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from typing import Any, Dict
+from model.library import load_definition
+from utils.circuit_file import BinaryCircuitFile, read_circuit_file, write_circuit_file
+
+COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "components")
+
+
+class TestCircuitFile(unittest.TestCase):
+    def setUp(self):
+        with open(os.path.join(COMPONENTS_DIR, "test.json"), "r", encoding="utf-8") as f:
+            self.data: Dict[str, Any] = json.load(f)
+        self.directory: str = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def test_round_trip(self):
+        write_circuit_file(self.path("nand.lgb"), self.data)
+        write_circuit_file(self.path("nand.json"), self.data)
+        self.assertEqual(read_circuit_file(self.path("nand.lgb")), self.data)
+        self.assertEqual(read_circuit_file(self.path("nand.json")), self.data)
+        size = os.path.getsize(self.path("nand.lgb"))
+        self.assertLess(size, os.path.getsize(self.path("nand.json")) / 3)
+
+    def test_records_on_demand(self):
+        write_circuit_file(self.path("nand.lgb"), self.data)
+        with BinaryCircuitFile(self.path("nand.lgb")) as circuit_file:
+            self.assertEqual(circuit_file.name, "NAND")
+            self.assertEqual(circuit_file.wire_count, len(self.data["wires"]))
+            self.assertEqual(circuit_file.component(2), self.data["components"][2])
+            self.assertEqual(circuit_file.wire(3), self.data["wires"][3])
+
+    def test_paths_off_grid_and_far_apart(self):
+        self.data["wires"][0]["path"] = [[0.25, 1], [2, 3.75]]
+        self.data["wires"][1]["path"] = [[0, 0], [50000, -50000.5]]
+        self.data["wires"][2]["path"] = []
+        write_circuit_file(self.path("paths.lgb"), self.data)
+        self.assertEqual(read_circuit_file(self.path("paths.lgb"))["wires"], self.data["wires"])
+
+    def test_rejects_other_files(self):
+        write_circuit_file(self.path("nand.json"), self.data)
+        os.rename(self.path("nand.json"), self.path("text.lgb"))
+        with self.assertRaises(ValueError):
+            read_circuit_file(self.path("text.lgb"))
+
+        write_circuit_file(self.path("nand.lgb"), self.data)
+        with open(self.path("nand.lgb"), "r+b") as f:
+            f.seek(4)
+            f.write(struct.pack("<H", 99))
+        with self.assertRaises(ValueError):
+            read_circuit_file(self.path("nand.lgb"))
+
+    def test_binary_subcircuit_definition(self):
+        write_circuit_file(self.path("nand.lgb"), self.data)
+        write_circuit_file(self.path("nand.json"), self.data)
+        binary = load_definition(self.path("nand.lgb"))
+        text = load_definition(self.path("nand.json"))
+        self.assertEqual((binary.name, binary.inputs, binary.outputs),
+                         (text.name, text.inputs, text.outputs))
+        self.assertEqual(binary.lut(), text.lut())
@@ -0,0 +1,34 @@
+"""
+test_compiler.py
+
+Test module for compiling circuits to Python source.
+"""
+
+import itertools
+import unittest
+from model.wire import Wire
+from model.component import NotComponent
+from tests.circuit_builders import random_circuit, evaluate_vector
+
+
+class TestCompiledCircuit(unittest.TestCase):
+    def test_matches_evaluate(self):
+        for seed in range(4):
+            circuit = random_circuit(seed, n_inputs=5)
+            compiled = circuit.compile()
+
+            for vector in itertools.product([False, True], repeat=5):
+                self.assertEqual(list(compiled(vector)), evaluate_vector(circuit, list(vector)))
+
+    def test_cached_until_edit(self):
+        circuit = random_circuit(2)
+        compiled = circuit.compile()
+        self.assertIs(circuit.compile(), compiled)
+
+        gate = NotComponent("extra")
+        circuit.add_component(gate)
+        self.assertIsNot(circuit.compile(), compiled)
+
+        compiled = circuit.compile()
+        circuit.add_wire(Wire("comp_0", "OUT", gate.id, "IN"))
+        self.assertIsNot(circuit.compile(), compiled)
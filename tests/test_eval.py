@@ -4,12 +4,15 @@ test_eval.py
 Test module for circuit evaluation.
 """
 
+import random
+import sys
 import unittest
 from typing import List
 from model.wire import Wire
 from model.circuit import Circuit
 from model.component import AndComponent, OutputComponent, InputComponent, Component
 from utils.id_generator import ComponentIDGenerator
+from tests.circuit_builders import random_circuit, input_ids, output_ids
 
 
 class TestCircuitEvaluation(unittest.TestCase):
@@ -40,3 +43,114 @@ class TestCircuitEvaluation(unittest.TestCase):
         self.circuit.evaluate()
 
         self.assertTrue(self.output1.inputs["IN"])
+
+    def test_fanout_index_tracks_wires(self):
+        self.assertEqual([w.dst_id for w in self.circuit.fanout(self.input1.id)], [self.and1.id])
+        self.assertEqual(len(self.circuit.fanin(self.and1.id)), 2)
+
+        extra: Wire = Wire(self.input1.id, "OUT", self.output1.id, "IN")
+        self.circuit.add_wire(extra)
+        self.assertIn(extra, self.circuit.fanout(self.input1.id))
+
+        self.circuit.delete_wire(extra)
+        self.assertNotIn(extra, self.circuit.fanout(self.input1.id))
+        self.assertNotIn(extra, self.circuit.wires)
+
+    def test_delete_component_removes_attached_wires(self):
+        removed: List[Wire] = self.circuit.delete_component(self.and1)
+
+        self.assertEqual(len(removed), 3)
+        self.assertEqual(self.circuit.wires, [])
+        self.assertEqual(self.circuit.fanout(self.input1.id), [])
+
+        self.input1.outputs["OUT"] = True
+        self.circuit.evaluate()
+        self.assertFalse(self.output1.inputs["IN"])
+
+    def test_wired_or_between_drivers(self):
+        self.circuit.add_wire(Wire(self.input1.id, "OUT", self.output1.id, "IN"))
+        self.input1.outputs["OUT"] = True
+
+        self.circuit.evaluate()
+
+        self.assertTrue(self.output1.inputs["IN"])
+
+    def test_cycle_reported(self):
+        feedback: Wire = Wire(self.output1.id, "IN", self.and1.id, "A")
+
+        self.assertFalse(self.circuit.add_wire(feedback))
+        self.assertTrue(self.circuit.has_cycle())
+
+        self.circuit.delete_wire(feedback)
+        self.assertFalse(self.circuit.has_cycle())
+
+    def test_wire_from_unknown_component_ignored(self):
+        self.circuit.wires.append(Wire("ghost", "OUT", self.and1.id, "A"))
+        self.circuit.add_wire(Wire(self.input2.id, "OUT", "ghost", "IN"))
+        self.assertNotIn("ghost", self.circuit._topological_sort())
+
+        self.input1.outputs["OUT"] = True
+        self.circuit.evaluate()
+        self.circuit.set_input(self.input2.id, True)
+        self.assertTrue(self.output1.inputs["IN"])
+
+    def test_order_cached_between_evaluations(self):
+        order: List[str] = self.circuit._topological_sort()
+        self.circuit.evaluate()
+        self.assertIs(self.circuit._topological_sort(), order)
+        self.assertLess(order.index(self.input1.id), order.index(self.and1.id))
+
+    def test_set_input_propagates(self):
+        self.circuit.evaluate()
+
+        self.circuit.set_input(self.input1.id, True)
+        self.assertFalse(self.output1.inputs["IN"])
+
+        self.circuit.set_input(self.input2.id, True)
+        self.assertTrue(self.output1.inputs["IN"])
+
+        self.circuit.set_input(self.input1.id, False)
+        self.assertFalse(self.output1.inputs["IN"])
+
+
+class TestEventDrivenEvaluation(unittest.TestCase):
+    def setUp(self):
+        self.circuit: Circuit = random_circuit(3)
+        self.inputs: List[str] = input_ids(self.circuit)
+        self.outputs: List[str] = output_ids(self.circuit)
+        self.rng = random.Random(3)
+
+    def output_values(self) -> List[bool]:
+        return [self.circuit.components[cid].inputs["IN"] for cid in self.outputs]
+
+    def test_matches_full_evaluation(self):
+        self.circuit.evaluate()
+        for _ in range(50):
+            component: Component = self.circuit.components[self.rng.choice(self.inputs)]
+            self.circuit.set_input(component.id, not component.outputs["OUT"])
+            incremental: List[bool] = self.output_values()
+
+            self.circuit.evaluate()
+            self.assertEqual(incremental, self.output_values())
+
+
+class TestComponentLayout(unittest.TestCase):
+    def test_layout_is_shared(self):
+        self.assertIs(AndComponent("a").layout, AndComponent("b").layout)
+
+    def test_cells_sized_exactly(self):
+        gate = AndComponent("a")
+        self.assertEqual(sys.getsizeof(gate.cells), sys.getsizeof([False] * 3))
+        self.assertFalse(hasattr(gate, "__dict__"))
+
+    def test_to_dict_is_plain(self):
+        self.assertEqual(
+            AndComponent("a").to_dict(),
+            {"cid": "a", "type": "AND", "inputs": {"A": False, "B": False},
+             "outputs": {"OUT": False}},
+        )
+        self.assertIs(type(AndComponent("a").to_dict()["type"]), str)
+
+    def test_pins_cannot_be_removed(self):
+        with self.assertRaises(TypeError):
+            del AndComponent("a").inputs["A"]
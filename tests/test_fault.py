@@ -0,0 +1,69 @@
+"""
+test_fault.py
+
+Test module for parallel stuck-at fault simulation.
+"""
+
+import itertools
+import unittest
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import AndComponent, InputComponent, OutputComponent
+from simulation.fault import FaultSimulator
+from tests.circuit_builders import random_circuit
+
+
+def serial_outputs(netlist, vector, forced=None, value=False):
+    """
+    Reference: simulate one vector gate by gate, optionally with one net
+    forced to a constant
+    """
+    nets = [0] * netlist.net_count
+    for net, bit in zip(netlist.input_nets(), vector):
+        nets[net] = int(value if net == forced else bit)
+    for gate_type, out, pins in netlist.gates:
+        pin_values = [int(any(nets[d] for d in drivers)) for drivers in pins]
+        if gate_type == "AND":
+            nets[out] = pin_values[0] & pin_values[1]
+        elif gate_type == "OR":
+            nets[out] = pin_values[0] | pin_values[1]
+        else:
+            nets[out] = 1 - pin_values[0]
+        if out == forced:
+            nets[out] = int(value)
+    return [any(nets[d] for d in drivers) for drivers in netlist.output_drivers]
+
+
+class TestFaultSimulation(unittest.TestCase):
+    def test_and_gate_full_coverage(self):
+        circuit = Circuit()
+        for component in [InputComponent("a"), InputComponent("b"), AndComponent("g"),
+                          OutputComponent("y")]:
+            circuit.add_component(component)
+        circuit.add_wire(Wire("a", "OUT", "g", "A"))
+        circuit.add_wire(Wire("b", "OUT", "g", "B"))
+        circuit.add_wire(Wire("g", "OUT", "y", "IN"))
+
+        simulator = FaultSimulator(circuit)
+        self.assertEqual(len(simulator.faults), 6)
+
+        partial = simulator.run([(True, True)])
+        self.assertEqual(sorted(partial.detected),
+                         [("a", "OUT", False), ("b", "OUT", False), ("g", "OUT", False)])
+
+        full = simulator.run([(True, True), (False, True), (True, False)])
+        self.assertEqual(full.coverage, 1.0)
+
+    def test_matches_serial_injection(self):
+        circuit = random_circuit(12, n_inputs=4, n_gates=25, n_outputs=5)
+        simulator = FaultSimulator(circuit)
+        vectors = list(itertools.product([False, True], repeat=4))[::3]
+        result = simulator.run(vectors)
+
+        netlist = simulator.netlist
+        for cid, pin, value in simulator.faults:
+            forced = netlist.net_index[(cid, pin)]
+            expected = any(
+                serial_outputs(netlist, vector, forced, value) != serial_outputs(netlist, vector)
+                for vector in vectors)
+            self.assertEqual((cid, pin, value) in result.detected, expected)
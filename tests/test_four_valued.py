@@ -0,0 +1,86 @@
+"""
+test_four_valued.py
+
+Test module for 0/1/X/Z simulation.
+"""
+
+import unittest
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import (AndComponent, CounterComponent, DffComponent, InputComponent,
+                             OutputComponent)
+from simulation.bit_parallel import BitParallelSimulator, exhaustive_patterns
+from simulation.four_valued import ONE, X, Z, ZERO, FourValuedSimulator
+from tests.circuit_builders import random_circuit
+
+
+class TestFourValued(unittest.TestCase):
+    def setUp(self):
+        self.circuit: Circuit = Circuit()
+        for component in (InputComponent("a"), InputComponent("b"), AndComponent("and"),
+                          DffComponent("flop"), OutputComponent("out"), OutputComponent("state"),
+                          OutputComponent("floating"), OutputComponent("bus")):
+            self.circuit.add_component(component)
+        self.circuit.add_wire(Wire("a", "OUT", "and", "A"))
+        self.circuit.add_wire(Wire("b", "OUT", "and", "B"))
+        self.circuit.add_wire(Wire("and", "OUT", "out", "IN"))
+        self.circuit.add_wire(Wire("a", "OUT", "flop", "D"))
+        self.circuit.add_wire(Wire("flop", "Q", "state", "IN"))
+        self.circuit.add_wire(Wire("a", "OUT", "bus", "IN"))
+        self.circuit.add_wire(Wire("b", "OUT", "bus", "IN"))
+
+    def test_unknown_and_floating(self):
+        result = self.circuit.four_valued().evaluate({"b": True})
+        self.assertEqual(result["out"], X)
+        self.assertEqual(result["floating"], Z)
+        self.assertEqual(result["state"], X)
+
+        result = self.circuit.four_valued().evaluate({"a": False})
+        self.assertEqual(result["out"], ZERO)
+
+    def test_undriven_bus_driver_takes_no_part(self):
+        simulator = self.circuit.four_valued()
+        self.assertEqual(simulator.evaluate({"a": Z, "b": False})["bus"], ZERO)
+        self.assertEqual(simulator.evaluate({"a": Z, "b": True})["bus"], ONE)
+        self.assertEqual(simulator.evaluate({"a": Z, "b": Z})["bus"], Z)
+        self.assertEqual(simulator.evaluate({"a": Z, "b": True})["out"], X)
+
+    def test_flip_flop_loads_on_clock(self):
+        simulator = self.circuit.four_valued()
+        simulator.clock({"a": True})
+        self.assertEqual(simulator.evaluate({})["state"], ONE)
+        simulator.reset_state()
+        self.assertEqual(simulator.evaluate({})["state"], X)
+
+    def test_counter_unknown_until_reset(self):
+        circuit = Circuit()
+        for component in (InputComponent("en"), InputComponent("rst"),
+                          CounterComponent("count", 2)):
+            circuit.add_component(component)
+        circuit.add_wire(Wire("en", "OUT", "count", "EN"))
+        circuit.add_wire(Wire("rst", "OUT", "count", "RST"))
+
+        simulator = FourValuedSimulator(circuit)
+        simulator.clock({"en": True, "rst": False})
+        self.assertEqual(simulator.state["count"], (X, X))
+        simulator.clock({"rst": True})
+        self.assertEqual(simulator.state["count"], (ZERO, ZERO))
+        for _ in range(3):
+            simulator.clock({"en": True, "rst": False})
+        self.assertEqual(simulator.state["count"], (ONE, ONE))
+
+    def test_known_inputs_match_two_valued(self):
+        for seed in range(4):
+            circuit = random_circuit(seed, n_inputs=5)
+            two_valued = BitParallelSimulator(circuit).exhaustive()
+            simulator = FourValuedSimulator(circuit)
+            width = 1 << 5
+            mask = (1 << width) - 1
+            patterns = zip(simulator.inputs, exhaustive_patterns(5))
+            stimulus = {cid: (word, ~word & mask) for cid, word in patterns}
+            result = simulator.run(stimulus, width)
+            for cid, word in two_valued.items():
+                ones, zeros = result[cid]
+                known = ~(ones & zeros) & mask
+                self.assertEqual(ones & known, word & known)
+                self.assertEqual(zeros & known, ~word & known)
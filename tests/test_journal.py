@@ -0,0 +1,213 @@
+"""
+test_journal.py
+
+Test module for the edit journal and crash recovery.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import circuit as legacy
+from controller.command import AddGateCommand, AddWireCommand, DeleteCommand, MoveCommand
+from controller.journal import EditJournal, attach_journal, open_journal, recover, recover_file
+from model.component import InputComponent, OutputComponent, SubcircuitComponent
+from model.library import definition_from_json
+from model.pin import Pin
+from model.wire import Wire
+from tests.circuit_builders import random_circuit
+from tests.test_subcircuit import NAND_DATA
+from utils.circuit_file import read_circuit_file, write_circuit_file
+
+
+class TestEditJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory: str = tempfile.mkdtemp()
+        self.path: str = os.path.join(self.directory, "design.json")
+        self.journal: EditJournal = open_journal(self.path)
+        self.circuit = self.journal.circuit
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def add_wire(self, wire: Wire) -> AddWireCommand:
+        command = AddWireCommand(Pin(wire.src_id, wire.src_pin, False, False), "w", self.circuit)
+        command.wire = wire
+        command.execute()
+        return command
+
+    def edit(self) -> None:
+        for gate_type, cid, position in (("INPUT", "a", (0, 0)), ("INPUT", "b", (0, 40)),
+                                         ("AND", "g", (60, 20)), ("OUTPUT", "o", (120, 20))):
+            AddGateCommand(gate_type, position, cid, self.circuit, self.journal).execute()
+        self.add_wire(Wire("a", "OUT", "g", "A"))
+        self.add_wire(Wire("b", "OUT", "g", "B"))
+        self.add_wire(Wire("g", "OUT", "o", "IN")).undo()
+        self.add_wire(Wire("b", "OUT", "o", "IN"))
+        MoveCommand("g", (60, 20), (80, 20), self.journal).execute()
+
+        scratch = AddGateCommand("NOT", (10, 10), "n", self.circuit, self.journal)
+        scratch.execute()
+        self.add_wire(Wire("a", "OUT", "n", "IN"))
+        delete = DeleteCommand(self.circuit.components["n"], self.circuit)
+        delete.execute()
+        delete.undo()
+        delete.redo()
+
+    def assert_recovers(self) -> None:
+        self.journal.flush()
+        circuit, positions, sequence = recover(self.path)
+        self.assertEqual(circuit.to_dict(), self.circuit.to_dict())
+        self.assertEqual(positions, {"a": (0, 0), "b": (0, 40), "g": (80, 20), "o": (120, 20)})
+        self.assertEqual(sequence, self.journal.sequence)
+
+    def test_replay_after_crash(self):
+        self.edit()
+        # nothing but the empty snapshot open_journal wrote, the edits are all
+        # in the journal
+        self.assertEqual(read_circuit_file(self.path),
+                         {"components": [], "wires": [], "positions": {}, "sequence": 0})
+        self.assert_recovers()
+
+    def test_torn_last_line(self):
+        self.edit()
+        with open(self.journal.journal_path, "a", encoding="utf-8") as f:
+            f.write('[999,"add",{"cid":"x","ty')
+        self.assert_recovers()
+
+    def test_compaction(self):
+        self.journal.compact_every = 4
+        self.edit()
+        self.journal.compact(background=False)
+        self.assertEqual(os.path.getsize(self.journal.journal_path), 0)
+        self.assertFalse(os.path.exists(self.journal.journal_path + ".old"))
+        self.assert_recovers()
+
+    def test_crash_during_compaction(self):
+        self.edit()
+        # journal moved aside, snapshot not written yet
+        self.journal._rotate()  # pylint: disable=protected-access
+        self.add_wire(Wire("a", "OUT", "o", "IN"))
+        self.assert_recovers()
+
+        # snapshot written, old journal not deleted yet
+        shutil.copy(self.journal.journal_path + ".old", self.path + ".keep")
+        self.journal.compact(background=False)
+        shutil.copy(self.path + ".keep", self.journal.journal_path + ".old")
+        self.assert_recovers()
+
+    def test_wires_appended_directly(self):
+        for gate_type, cid, position in (("INPUT", "a", (0, 0)), ("INPUT", "b", (0, 40)),
+                                         ("AND", "g", (80, 20)), ("OUTPUT", "o", (120, 20))):
+            AddGateCommand(gate_type, position, cid, self.circuit, self.journal).execute()
+        self.circuit.wires += [Wire("a", "OUT", "g", "A"), Wire("b", "OUT", "g", "B")]
+        self.circuit.wires.append(Wire("b", "OUT", "o", "IN"))
+        self.assert_recovers()
+
+        self.circuit.wires.pop(0)
+        self.assert_recovers()
+
+    def test_subcircuit_instances(self):
+        nand = definition_from_json(NAND_DATA)
+        for component in (InputComponent("a"), InputComponent("b"), SubcircuitComponent("n", nand),
+                          OutputComponent("o")):
+            self.circuit.add_component(component)
+        for src, src_pin, dst, dst_pin in (("a", "OUT", "n", "a"), ("b", "OUT", "n", "b"),
+                                           ("n", "out", "o", "IN")):
+            self.circuit.add_wire(Wire(src, src_pin, dst, dst_pin))
+        self.journal.flush()
+        replayed = recover(self.path)[0]
+        self.journal.compact(background=False)
+        from_snapshot = recover(self.path)[0]
+
+        for circuit in (replayed, from_snapshot):
+            self.assertEqual(circuit.to_dict(), self.circuit.to_dict())
+            circuit.components["a"].outputs["OUT"] = True
+            circuit.components["b"].outputs["OUT"] = True
+            circuit.evaluate()
+            self.assertFalse(circuit.components["o"].inputs["IN"])
+
+    def test_reopen(self):
+        source = random_circuit(seed=5)
+        for component in source.components.values():
+            self.circuit.add_component(component)
+        for wire in source.wires:
+            self.circuit.add_wire(Wire(wire.src_id, wire.src_pin, wire.dst_id, wire.dst_pin))
+        self.journal.compact()
+        self.circuit.delete_component(next(iter(self.circuit.components.values())))
+        self.journal.wait()
+        expected = self.circuit.to_dict()
+
+        reopened = open_journal(self.path)
+        self.assertEqual(reopened.circuit.to_dict(), expected)
+        reopened.close()
+
+
+class _Window:
+    """
+    Stand-in for the gui window the legacy circuit calls back into
+    """
+
+    def remove_gui_wire(self, src_id, dst_id):
+        pass
+
+
+class TestGuiJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory: str = tempfile.mkdtemp()
+        self.path: str = os.path.join(self.directory, "design.lgb")
+        self.circuit = legacy.Circuit(_Window())
+        self.circuit.add_component(legacy.Pin("a", "OUTPUT", ["OUT"], (0, 0)))
+        write_circuit_file(self.path, {"name": "design", **self.circuit.to_dict()})
+        self.journal: EditJournal = attach_journal(self.path, self.circuit, name="design")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def edit(self) -> None:
+        for component in (legacy.Component("g", "NOT", ["IN"], ["OUT"], (40, 0)),
+                          legacy.Component("n", "NOT", ["IN"], ["OUT"], (40, 40)),
+                          legacy.Pin("o", "INPUT", ["IN"], (80, 0))):
+            self.circuit.add_component(component)
+        for src, dst, pin in (("a", "g", "IN"), ("g", "o", "IN"), ("a", "n", "IN")):
+            self.circuit.connect(legacy.Wire(src, "OUT", dst, pin, [[0, 0], [1, 1]]))
+        self.circuit.delete_component(self.circuit.components["n"])
+        self.journal.move("g", (50, 10))
+
+    def test_recover_file(self):
+        self.edit()
+        self.journal.flush()
+        self.assertTrue(recover_file(self.path))
+        data = read_circuit_file(self.path)
+        self.assertEqual([comp["id"] for comp in data["components"]], ["a", "g", "o"])
+        self.assertEqual(data["components"][1]["pos"], [50, 10])
+        self.assertEqual(data["wires"], [wire.to_dict() for wire in self.circuit.wires])
+        self.assertFalse(os.path.exists(self.journal.journal_path))
+        self.assertFalse(recover_file(self.path))
+        self.journal.close(compact=False)
+
+    def test_recover_after_reopen(self):
+        self.edit()
+        self.journal.close()
+        # the next session picks up from the compacted file and then crashes
+        journal = attach_journal(self.path, self.circuit, name="design")
+        self.assertEqual(journal.sequence, self.journal.sequence)
+        self.circuit.add_component(legacy.Component("h", "NOT", ["IN"], ["OUT"], (40, 80)))
+        self.circuit.connect(legacy.Wire("a", "OUT", "h", "IN", [[0, 0], [1, 1]]))
+        journal.flush()
+        self.assertTrue(recover_file(self.path))
+        data = read_circuit_file(self.path)
+        self.assertEqual([comp["id"] for comp in data["components"]], ["a", "g", "o", "h"])
+        self.assertEqual(data["wires"], [wire.to_dict() for wire in self.circuit.wires])
+        journal.close(compact=False)
+
+    def test_snapshot_is_a_save_file(self):
+        self.edit()
+        self.journal.close()
+        data = read_circuit_file(self.path)
+        self.assertEqual(data["name"], "design")
+        self.assertEqual([comp["pos"] for comp in data["components"]], [[0, 0], [50, 10], [80, 0]])
+        self.assertEqual(data["sequence"], self.journal.sequence)
+        # nothing left over to fold in
+        self.assertFalse(recover_file(self.path))
@@ -0,0 +1,87 @@
+"""
+test_json_stream.py
+
+Test module for reading circuit files a record at a time.
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from model.serializer import circuit_from_json, circuit_to_json, load_circuit
+from tests.circuit_builders import random_circuit
+from utils.circuit_file import stream_circuit_file, write_circuit_file
+from utils.json_stream import stream_object
+
+COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "components")
+
+
+class TestStreamObject(unittest.TestCase):
+    def test_matches_json_load_at_any_chunk_size(self):
+        data = {
+            "name": "odd \"]}, name",
+            "width": 12345,
+            "components": [{"id": "c[1]", "pos": [1.5, -20]}, {"id": "c,2", "pos": []}, 3e10],
+            "empty": [],
+            "wires": [],
+            "flag": True,
+        }
+        text = json.dumps(data, indent=2)
+        for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+            stream = stream_object(io.StringIO(text), ("components", "wires", "empty"), chunk_size)
+            pairs = list(stream)
+            self.assertEqual(pairs, [
+                ("name", data["name"]),
+                ("width", 12345),
+                *(("components", item) for item in data["components"]),
+                ("flag", True),
+            ])
+
+    def test_arrays_not_streamed_come_whole(self):
+        pairs = list(stream_object(io.StringIO('{"wires": [1, 2], "other": [3]}'), ("wires",), 4))
+        self.assertEqual(pairs, [("wires", 1), ("wires", 2), ("other", [3])])
+
+    def test_records_come_before_the_file_is_read(self):
+        text = json.dumps({"components": [{"id": i} for i in range(1000)]})
+        stream = io.StringIO(text)
+        first = next(stream_object(stream, ("components",), 64))
+        self.assertEqual(first, ("components", {"id": 0}))
+        self.assertLess(stream.tell(), 200)
+
+    def test_malformed(self):
+        for text in ('[1, 2]', '{"a": [1, 2}', '{"a": 1 "b": 2}', '{"a": [1, 2]', '{"a": tru}',
+                     '{1: 2}'):
+            with self.assertRaises(ValueError, msg=text):
+                list(stream_object(io.StringIO(text), ("a",), 3))
+
+
+class TestStreamCircuitFile(unittest.TestCase):
+    def setUp(self):
+        self.directory: str = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_both_formats_stream_the_same_records(self):
+        with open(os.path.join(COMPONENTS_DIR, "test.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for name in ("nand.json", "nand.lgb"):
+            path = os.path.join(self.directory, name)
+            write_circuit_file(path, data)
+            self.assertEqual(list(stream_circuit_file(path)), [
+                ("name", data["name"]),
+                *(("components", record) for record in data["components"]),
+                *(("wires", record) for record in data["wires"]),
+            ])
+
+    def test_load_circuit(self):
+        circuit = random_circuit(seed=3)
+        path = os.path.join(self.directory, "random.json")
+        write_circuit_file(path, circuit_to_json(circuit))
+
+        loaded = load_circuit(path)
+        expected = circuit_from_json(circuit_to_json(circuit))
+        self.assertEqual(loaded.to_dict(), expected.to_dict())
+        self.assertEqual(loaded.evaluate(), expected.evaluate())
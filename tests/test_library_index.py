@@ -0,0 +1,121 @@
+"""
+test_library_index.py
+
+Test module for the component library index.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from model import library_index
+from file_saver import FileSaver
+from model.library_index import LibraryIndex, check_file_name
+from tests.test_subcircuit import COMPONENTS_DIR, NAND_DATA
+
+
+class TestLibraryIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory: str = tempfile.mkdtemp()
+        self.write("nand.json", NAND_DATA)
+        shutil.copy(os.path.join(COMPONENTS_DIR, "test.json"),
+                    os.path.join(self.directory, "gui.json"))
+        with open(os.path.join(self.directory, "broken.json"), "w", encoding="utf-8") as f:
+            f.write("{")
+        with open(os.path.join(self.directory, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("not a circuit")
+        # old enough for the index to trust their mtimes
+        for file in os.listdir(self.directory):
+            os.utime(os.path.join(self.directory, file), (time.time() - 120, time.time() - 120))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, file: str, data) -> None:
+        path = os.path.join(self.directory, file)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        stamp = time.time() - 60 + len(os.listdir(self.directory))
+        os.utime(path, (stamp, stamp))
+
+    def no_parsing(self):
+        return mock.patch.object(library_index, "read_circuit_file",
+                                 side_effect=AssertionError("parsed"))
+
+    def test_entries(self):
+        index = LibraryIndex(self.directory)
+        self.assertEqual(sorted(index.entries), ["gui.json", "nand.json"])
+
+        nand = index.entries["nand.json"]
+        self.assertEqual((nand.name, nand.inputs, nand.outputs, nand.gates),
+                         ("NAND", ["a", "b"], ["out"], 2))
+        gui = index.entries["gui.json"]
+        self.assertEqual((gui.name, gui.inputs, len(gui.outputs)),
+                         ("NAND", ["comp_3", "comp_4"], 2))
+        self.assertNotEqual(nand.hash, gui.hash)
+
+    def test_malformed_files(self):
+        # valid JSON, but not shaped like a circuit
+        for file, data in (("list.json", []), ("number.json", 7),
+                           ("text.json", {"components": "abc"}),
+                           ("items.json", {"components": [1], "wires": []})):
+            self.write(file, data)
+        index = LibraryIndex(self.directory)
+        self.assertEqual(sorted(index.entries), ["gui.json", "nand.json"])
+
+    def test_file_names_stay_in_the_folder(self):
+        index = LibraryIndex(self.directory)
+        for file in ("../evil.json", "sub/part.json", "..", "/tmp/x.json", "a\\b.json", ""):
+            with self.assertRaises(ValueError):
+                check_file_name(file)
+            with self.assertRaises(ValueError):
+                index.path(file)
+        self.assertEqual(check_file_name("...json"), "...json")
+
+        circuit = mock.Mock(to_dict=lambda: {"components": [], "wires": []})
+        with self.assertRaises(ValueError):
+            FileSaver("../escaped.json", circuit, "escaped", self.directory)
+        escaped = os.path.join(os.path.dirname(self.directory), "escaped.json")
+        self.assertFalse(os.path.exists(escaped))
+
+    def test_reopen_reads_only_the_index(self):
+        first = LibraryIndex(self.directory)
+        loading = mock.patch.object(library_index, "load_definition",
+                                    side_effect=AssertionError("loaded"))
+        with self.no_parsing(), loading:
+            second = LibraryIndex(self.directory)
+        self.assertEqual(second.entries, first.entries)
+
+    def test_follows_folder_changes(self):
+        index = LibraryIndex(self.directory)
+        path = os.path.join(self.directory, "nand.json")
+        os.utime(path, (time.time() - 30, time.time() - 30))
+        with self.no_parsing():
+            index.refresh()
+
+        data = json.loads(json.dumps(NAND_DATA))
+        data["name"] = "NAND2"
+        data["components"] = data["components"][:-1] + [
+            {"cid": "y", "type": "OUTPUT", "inputs": {"IN": False}, "outputs": {}}]
+        data["wires"][3]["dst_id"] = "y"
+        self.write("nand.json", data)
+        os.remove(os.path.join(self.directory, "gui.json"))
+        self.write("copy.json", NAND_DATA)
+
+        index.refresh()
+        self.assertEqual(sorted(index.entries), ["copy.json", "nand.json"])
+        nand = index.entries["nand.json"]
+        self.assertEqual((nand.name, nand.outputs), ("NAND2", ["y"]))
+        self.assertEqual([entry.file for entry in index], ["copy.json", "nand.json"])
+
+    def test_definitions_load_on_first_use(self):
+        index = LibraryIndex(self.directory)
+        first = index.instantiate("nand.json", "n1")
+        second = index.instantiate("nand.json", "n2")
+        self.assertIs(first.definition, second.definition)
+        self.assertEqual(first.definition.evaluate((True, True)), (False,))
+        with self.assertRaises(KeyError):
+            index.definition("broken.json")
@@ -0,0 +1,66 @@
+"""
+test_net.py
+
+Test module for nets and multi-driver resolution.
+"""
+
+import unittest
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import AndComponent, OrComponent, InputComponent, OutputComponent
+
+
+class TestNets(unittest.TestCase):
+    def setUp(self):
+        self.circuit: Circuit = Circuit()
+        for component in (
+            InputComponent("a"),
+            InputComponent("b"),
+            AndComponent("and"),
+            OrComponent("or"),
+            OutputComponent("wired"),
+        ):
+            self.circuit.add_component(component)
+
+        self.circuit.add_wire(Wire("a", "OUT", "and", "A"))
+        self.circuit.add_wire(Wire("a", "OUT", "and", "B"))
+        self.circuit.add_wire(Wire("a", "OUT", "or", "A"))
+        self.circuit.add_wire(Wire("a", "OUT", "wired", "IN"))
+        self.circuit.add_wire(Wire("b", "OUT", "wired", "IN"))
+
+    def test_fanout_is_one_net(self):
+        net = self.circuit.nets().driven["a"][0]
+        self.assertEqual(net.drivers, [("a", "OUT")])
+        self.assertEqual(net.sinks, [("and", "A"), ("and", "B"), ("or", "A")])
+        self.assertEqual(net.loads, ["and", "or"])
+
+    def test_multiple_drivers_share_a_net(self):
+        nets = self.circuit.nets()
+        wired = [net for net in nets.nets if net.sinks == [("wired", "IN")]]
+        self.assertEqual(len(wired), 1)
+        self.assertEqual(sorted(wired[0].drivers), [("a", "OUT"), ("b", "OUT")])
+        self.assertIn(wired[0], nets.ready["b"])
+
+    def test_wired_or(self):
+        self.circuit.set_input("b", True)
+        self.assertTrue(self.circuit.components["wired"].inputs["IN"])
+        self.assertFalse(self.circuit.components["and"].outputs["OUT"])
+
+        self.circuit.set_input("b", False)
+        self.assertFalse(self.circuit.components["wired"].inputs["IN"])
+
+        self.circuit.set_input("a", True)
+        self.assertTrue(self.circuit.components["wired"].inputs["IN"])
+        self.assertTrue(self.circuit.components["and"].outputs["OUT"])
+
+    def test_floating_pin_reads_false(self):
+        self.circuit.components["or"].inputs["B"] = True
+        self.circuit.evaluate()
+        self.assertFalse(self.circuit.components["or"].inputs["B"])
+
+    def test_rebuilt_after_edit(self):
+        before = self.circuit.nets()
+        self.circuit.add_wire(Wire("b", "OUT", "or", "B"))
+        self.assertIsNot(self.circuit.nets(), before)
+        self.circuit.set_input("b", True)
+        self.assertTrue(self.circuit.components["or"].outputs["OUT"])
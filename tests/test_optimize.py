@@ -0,0 +1,77 @@
+"""
+test_optimize.py
+
+Test module for the logic optimization pass.
+"""
+
+import itertools
+import unittest
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import AndComponent, InputComponent, NotComponent, OrComponent, OutputComponent
+from tests.circuit_builders import random_circuit
+
+
+def build(components, wires):
+    circuit = Circuit()
+    for component in components:
+        circuit.add_component(component)
+    for src, dst, pin in wires:
+        circuit.add_wire(Wire(src, "OUT", dst, pin))
+    return circuit
+
+
+def gate_count(circuit):
+    return sum(comp.type in ("AND", "OR", "NOT") for comp in circuit.components.values())
+
+
+class TestOptimize(unittest.TestCase):
+    def assert_equivalent(self, circuit, optimized):
+        count = sum(comp.type == "INPUT" for comp in circuit.components.values())
+        original, reduced = circuit.compile(), optimized.compile()
+        self.assertEqual(reduced.inputs, original.inputs)
+        self.assertEqual(reduced.outputs, original.outputs)
+        for vector in itertools.product([False, True], repeat=count):
+            self.assertEqual(reduced(vector), original(vector))
+
+    def test_random_circuits_equivalent(self):
+        for seed in range(6):
+            circuit = random_circuit(seed, n_inputs=5, n_gates=80, n_outputs=6)
+            optimized = circuit.optimized()
+            self.assertLess(gate_count(optimized), gate_count(circuit))
+            self.assert_equivalent(circuit, optimized)
+
+    def test_rules(self):
+        circuit = build(
+            [InputComponent("a"), InputComponent("b"),
+             NotComponent("n1"), NotComponent("n2"),                # double NOT
+             AndComponent("g1"), AndComponent("g2"),                # duplicates
+             OrComponent("dead"),                                   # drives nothing
+             AndComponent("zero"), NotComponent("one"),             # constants
+             OutputComponent("y1"), OutputComponent("y2"),
+             OutputComponent("y3"), OutputComponent("y4")],
+            [("a", "n1", "IN"), ("n1", "n2", "IN"), ("n2", "y1", "IN"),
+             ("a", "g1", "A"), ("b", "g1", "B"), ("b", "g2", "A"), ("a", "g2", "B"),
+             ("g1", "y2", "IN"), ("g2", "y3", "IN"),
+             ("a", "dead", "A"), ("b", "dead", "B"),
+             ("a", "zero", "A"), ("zero", "one", "IN"), ("one", "y4", "IN")],
+        )
+        optimized = circuit.optimized()
+
+        self.assertEqual(sorted(cid for cid, comp in optimized.components.items()
+                                if comp.type in ("AND", "OR", "NOT")), ["const_1", "g1"])
+        self.assert_equivalent(circuit, optimized)
+
+    def test_constant_id_is_unique(self):
+        # components already named like the constant driver
+        circuit = build(
+            [InputComponent("const_1"), AndComponent("zero"), NotComponent("one"),
+             OutputComponent("const_1_2"), OutputComponent("y")],
+            [("const_1", "zero", "A"), ("zero", "one", "IN"), ("one", "y", "IN"),
+             ("const_1", "const_1_2", "IN")],
+        )
+        optimized = circuit.optimized()
+        self.assertEqual(optimized.components["const_1"].type, "INPUT")
+        self.assertEqual(optimized.components["const_1_2"].type, "OUTPUT")
+        self.assertEqual(optimized.components["const_1_3"].type, "NOT")
+        self.assert_equivalent(circuit, optimized)
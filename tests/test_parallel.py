@@ -0,0 +1,25 @@
+"""
+test_parallel.py
+
+Test module for multi-process batch simulation.
+"""
+
+import random
+import unittest
+from tests.circuit_builders import random_circuit
+
+
+class TestParallelSimulation(unittest.TestCase):
+    def test_matches_compiled_in_order(self):
+        rng = random.Random(2)
+        circuit = random_circuit(8, n_inputs=6)
+        stimulus = [tuple(rng.random() < 0.5 for _ in range(6)) for _ in range(500)]
+
+        compiled = circuit.compile()
+        results = list(circuit.simulate_batch(iter(stimulus), workers=2, chunk_size=37))
+
+        self.assertEqual(results, [compiled(vector) for vector in stimulus])
+
+    def test_empty_stimulus(self):
+        circuit = random_circuit(8, n_inputs=6)
+        self.assertEqual(list(circuit.simulate_batch([], workers=2)), [])
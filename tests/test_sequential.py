@@ -0,0 +1,94 @@
+"""
+test_sequential.py
+
+Test module for clocked components and multi-cycle runs.
+"""
+
+import unittest
+from typing import List
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import (CounterComponent, DffComponent, InputComponent, NotComponent,
+                             OutputComponent, SubcircuitComponent)
+from model.library import SubcircuitDefinition
+from tests.circuit_builders import random_sequential_circuit, input_ids
+
+
+def counter_value(circuit: Circuit, cid: str) -> int:
+    """
+    Value on a counter's outputs, Q0 is the least significant bit
+    """
+    return sum(1 << i for i, bit in enumerate(circuit.components[cid].outputs.values()) if bit)
+
+
+class TestSequential(unittest.TestCase):
+    def setUp(self):
+        self.circuit: Circuit = Circuit()
+        for component in (InputComponent("en"), InputComponent("rst"), CounterComponent("count", 4),
+                          DffComponent("flop"), NotComponent("toggle"), OutputComponent("out")):
+            self.circuit.add_component(component)
+
+        self.circuit.add_wire(Wire("en", "OUT", "count", "EN"))
+        self.circuit.add_wire(Wire("rst", "OUT", "count", "RST"))
+        self.circuit.add_wire(Wire("flop", "Q", "toggle", "IN"))
+        self.feedback = Wire("toggle", "OUT", "flop", "D")
+        self.circuit.add_wire(self.feedback)
+        self.circuit.add_wire(Wire("flop", "Q", "out", "IN"))
+
+    def test_feedback_through_flip_flop_is_not_a_loop(self):
+        self.assertFalse(self.circuit.has_cycle())
+
+    def test_clock(self):
+        self.circuit.set_input("en", True)
+        for cycle in range(1, 20):
+            self.circuit.clock()
+            self.assertEqual(counter_value(self.circuit, "count"), cycle % 16)
+            self.assertEqual(self.circuit.components["out"].inputs["IN"], cycle % 2 == 1)
+
+    def test_counter_enable_and_reset(self):
+        self.circuit.clock()
+        self.assertEqual(counter_value(self.circuit, "count"), 0)
+
+        self.circuit.set_input("en", True)
+        self.circuit.run_cycles(5)
+        self.assertEqual(counter_value(self.circuit, "count"), 5)
+
+        self.circuit.set_input("rst", True)
+        self.circuit.clock()
+        self.assertEqual(counter_value(self.circuit, "count"), 0)
+
+    def test_run_cycles(self):
+        self.circuit.set_input("en", True)
+        self.circuit.run_cycles(37)
+        self.assertEqual(counter_value(self.circuit, "count"), 37 % 16)
+        self.assertTrue(self.circuit.components["out"].inputs["IN"])
+
+    def test_run_cycles_matches_clock(self):
+        for seed in range(4):
+            stepped = random_sequential_circuit(seed)
+            compiled = random_sequential_circuit(seed)
+            for circuit in (stepped, compiled):
+                for cid in input_ids(circuit)[::2]:
+                    circuit.components[cid].outputs["OUT"] = True
+                circuit.evaluate()
+
+            for _ in range(25):
+                stepped.clock()
+            compiled.run_cycles(25)
+
+            states: List = [[c.state for c in circuit.sequential_components()]
+                            for circuit in (stepped, compiled)]
+            self.assertEqual(states[0], states[1])
+
+    def test_not_combinational(self):
+        with self.assertRaises(ValueError):
+            self.circuit.compile()
+
+    def test_no_state_inside_subcircuits(self):
+        inner = Circuit()
+        inner.add_component(DffComponent("flop"))
+        parent = Circuit()
+        flop = SubcircuitDefinition("FLOP", inner, [], [])
+        parent.add_component(SubcircuitComponent("inst", flop))
+        with self.assertRaises(ValueError):
+            parent.run_cycles(1)
@@ -0,0 +1,340 @@
+"""
+test_subcircuit.py
+
+Test module for subcircuit definitions and flattening.
+"""
+
+import itertools
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from typing import List
+from unittest import mock
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import InputComponent, OutputComponent, SubcircuitComponent
+from model import library
+from model.library import SubcircuitDefinition, definition_from_json, load_definition
+from model.serializer import circuit_from_json, circuit_to_json
+from tests.circuit_builders import evaluate_vector
+
+COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "components")
+
+NAND_DATA = {
+    "name": "NAND",
+    "components": [
+        {"cid": "a", "type": "INPUT", "inputs": {}, "outputs": {"OUT": False}},
+        {"cid": "b", "type": "INPUT", "inputs": {}, "outputs": {"OUT": False}},
+        {"cid": "and", "type": "AND", "inputs": {"A": False, "B": False},
+         "outputs": {"OUT": False}},
+        {"cid": "not", "type": "NOT", "inputs": {"IN": False}, "outputs": {"OUT": True}},
+        {"cid": "out", "type": "OUTPUT", "inputs": {"IN": False}, "outputs": {}},
+    ],
+    "wires": [
+        {"src_id": "a", "src_pin": "OUT", "dst_id": "and", "dst_pin": "A"},
+        {"src_id": "b", "src_pin": "OUT", "dst_id": "and", "dst_pin": "B"},
+        {"src_id": "and", "src_pin": "OUT", "dst_id": "not", "dst_pin": "IN"},
+        {"src_id": "not", "src_pin": "OUT", "dst_id": "out", "dst_pin": "IN"},
+    ],
+}
+
+
+def xor_definition(nand: SubcircuitDefinition) -> SubcircuitDefinition:
+    """
+    XOR out of four NAND instances, plus an output port wired straight
+    through from input a
+    """
+    circuit = Circuit()
+    for cid in ("a", "b"):
+        circuit.add_component(InputComponent(cid))
+    for cid in ("n1", "n2", "n3", "n4"):
+        circuit.add_component(SubcircuitComponent(cid, nand))
+    for cid in ("xor", "echo"):
+        circuit.add_component(OutputComponent(cid))
+
+    for src, dst, pin in [("a", "n1", "a"), ("b", "n1", "b"), ("a", "n2", "a"),
+                          ("n1", "n2", "b"), ("n1", "n3", "a"), ("b", "n3", "b"),
+                          ("n2", "n4", "a"), ("n3", "n4", "b")]:
+        circuit.add_wire(Wire(src, "out" if src.startswith("n") else "OUT", dst, pin))
+    circuit.add_wire(Wire("n4", "out", "xor", "IN"))
+    circuit.add_wire(Wire("a", "OUT", "echo", "IN"))
+
+    return SubcircuitDefinition("XOR", circuit, ["a", "b"], ["xor", "echo"])
+
+
+class TestSubcircuits(unittest.TestCase):
+    def setUp(self):
+        self.nand: SubcircuitDefinition = definition_from_json(NAND_DATA)
+        self.xor: SubcircuitDefinition = xor_definition(self.nand)
+
+        self.circuit: Circuit = Circuit()
+        self.inputs: List[InputComponent] = [InputComponent(f"in_{i}") for i in range(3)]
+        for component in self.inputs:
+            self.circuit.add_component(component)
+
+        # (in_0 xor in_1) xor in_2, using the echo port to pass in_0 along
+        self.circuit.add_component(SubcircuitComponent("x1", self.xor))
+        self.circuit.add_component(SubcircuitComponent("x2", self.xor))
+        self.circuit.add_component(OutputComponent("parity"))
+        self.circuit.add_component(OutputComponent("echo"))
+        for wire in [Wire("in_0", "OUT", "x1", "a"), Wire("in_1", "OUT", "x1", "b"),
+                     Wire("x1", "xor", "x2", "a"), Wire("in_2", "OUT", "x2", "b"),
+                     Wire("x2", "xor", "parity", "IN"), Wire("x1", "echo", "echo", "IN")]:
+            self.circuit.add_wire(wire)
+
+    def test_definition_evaluates(self):
+        for a, b in itertools.product([False, True], repeat=2):
+            self.assertEqual(self.nand.evaluate((a, b)), (not (a and b),))
+            self.assertEqual(self.xor.evaluate((a, b)), (a != b, a))
+
+    def test_hierarchical_evaluate(self):
+        for vector in itertools.product([False, True], repeat=3):
+            self.assertEqual(evaluate_vector(self.circuit, list(vector)),
+                             [vector[0] ^ vector[1] ^ vector[2], vector[0]])
+
+    def test_flattened_matches_evaluate(self):
+        flat: Circuit = self.circuit.flattened()
+        self.assertFalse(any(comp.type == "SUBCIRCUIT" for comp in flat.components.values()))
+        self.assertEqual(sum(comp.type == "NOT" for comp in flat.components.values()), 8)
+
+        compiled = self.circuit.compile()
+        for vector in itertools.product([False, True], repeat=3):
+            self.assertEqual(list(compiled(vector)), evaluate_vector(self.circuit, list(vector)))
+
+    def test_definition_shared(self):
+        with tempfile.TemporaryDirectory() as folder:
+            # a copy, loading writes the cache next to the file
+            path = shutil.copy(os.path.join(COMPONENTS_DIR, "test.json"), folder)
+            definition = load_definition(path)
+            self.assertIs(load_definition(path), definition)
+
+        self.assertEqual(definition.name, "NAND")
+        self.assertEqual(definition.inputs, ["comp_3", "comp_4"])
+        for a, b in itertools.product([False, True], repeat=2):
+            self.assertEqual(definition.evaluate((a, b)), (a and b, a and b))
+
+    def test_serializer_round_trip(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "nand.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(NAND_DATA, f)
+            saved = load_definition(path)
+            self.circuit.add_component(SubcircuitComponent("saved", saved))
+            self.circuit.add_component(OutputComponent("nand"))
+            self.circuit.add_wire(Wire("in_0", "OUT", "saved", "a"))
+            self.circuit.add_wire(Wire("in_2", "OUT", "saved", "b"))
+            self.circuit.add_wire(Wire("saved", "out", "nand", "IN"))
+
+            data = json.loads(json.dumps(circuit_to_json(self.circuit)))
+            loaded = circuit_from_json(data)
+
+        self.assertIs(loaded.components["saved"].definition, saved)
+        self.assertIs(loaded.components["x1"].definition, loaded.components["x2"].definition)
+        self.assertEqual(loaded.to_dict(), self.circuit.to_dict())
+        compiled = loaded.compile()
+        for vector in itertools.product([False, True], repeat=3):
+            expected = evaluate_vector(self.circuit, list(vector))
+            self.assertEqual(evaluate_vector(loaded, list(vector)), expected)
+            self.assertEqual(list(compiled(vector)), expected)
+
+    def test_lookup_table(self):
+        table = self.xor.lut()
+        self.assertEqual(len(table), 4)
+        self.assertEqual(table[0b01], (True, True))
+        self.assertIs(self.xor.lut(), table)
+
+        self.xor.circuit.delete_component(self.xor.circuit.components["n4"])
+        self.assertEqual(self.xor.lut()[0b01], (False, True))
+
+    def test_reload_when_file_changes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "gate.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(NAND_DATA, f)
+            definition = load_definition(path)
+            self.assertEqual(definition.evaluate((True, True)), (False,))
+
+            data = json.loads(json.dumps(NAND_DATA))
+            data["wires"][3]["src_id"] = "and"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.utime(path, (0, 0))
+
+            self.assertIs(load_definition(path), definition)
+            self.assertEqual(definition.evaluate((True, True)), (True,))
+
+    def test_reload_reaches_parent_circuits(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "gate.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(NAND_DATA, f)
+
+            circuit = Circuit()
+            for component in (InputComponent("a"), InputComponent("b"),
+                              SubcircuitComponent("gate", load_definition(path)),
+                              OutputComponent("out")):
+                circuit.add_component(component)
+            for wire in (Wire("a", "OUT", "gate", "a"), Wire("b", "OUT", "gate", "b"),
+                         Wire("gate", "out", "out", "IN")):
+                circuit.add_wire(wire)
+            self.assertEqual(list(circuit.compile()((True, True))), [False])
+            self.assertEqual(circuit.interpreter().run((True, True)), (False,))
+            self.assertEqual(evaluate_vector(circuit, [True, True]), [False])
+
+            data = json.loads(json.dumps(NAND_DATA))
+            data["wires"][3]["src_id"] = "and"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.utime(path, (0, 0))
+            load_definition(path)
+
+            self.assertEqual(list(circuit.compile()((True, True))), [True])
+            self.assertEqual(circuit.interpreter().run((True, True)), (True,))
+            flat = circuit.flattened()
+            self.assertEqual(sum(comp.type == "NOT" for comp in flat.components.values()), 1)
+            self.assertEqual(evaluate_vector(circuit, [True, True]), [True])
+
+    def test_reload_with_other_ports(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "gate.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(NAND_DATA, f)
+            definition = load_definition(path)
+
+            data = json.loads(json.dumps(NAND_DATA))
+            data["components"][1]["cid"] = "c"
+            data["wires"][1]["src_id"] = "c"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.utime(path, (0, 0))
+
+            with self.assertRaises(ValueError):
+                load_definition(path)
+            self.assertEqual(definition.inputs, ["a", "b"])
+            self.assertEqual(definition.evaluate((True, True)), (False,))
+
+
+class _Foreign:  # pylint: disable=too-few-public-methods
+    """
+    Unpickles by deleting a file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __reduce__(self):
+        return os.remove, (self.path,)
+
+
+class TestDefinitionCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path: str = os.path.join(self.folder.name, "gate.json")
+        self.save(NAND_DATA)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def save(self, data) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        # old enough for its hash to be remembered
+        stamp = time.time() - 60 + len(os.listdir(self.folder.name))
+        os.utime(self.path, (stamp, stamp))
+
+    def new_session(self) -> None:
+        library._definitions.clear()  # pylint: disable=protected-access
+        library._hashes.clear()  # pylint: disable=protected-access
+
+    def cache_entries(self) -> List[str]:
+        names = os.listdir(os.path.join(self.folder.name, ".cache"))
+        return [name for name in names if name.endswith(".pickle")]
+
+    def test_unchanged_file_is_not_parsed(self):
+        parsed = load_definition(self.path)
+        self.new_session()
+        with mock.patch.object(library, "read_circuit_file", side_effect=AssertionError("parsed")):
+            with mock.patch("hashlib.file_digest", side_effect=AssertionError("hashed")):
+                cached = load_definition(self.path)
+
+        self.assertIsNot(cached, parsed)
+        self.assertEqual((cached.name, cached.inputs, cached.outputs),
+                         (parsed.name, parsed.inputs, parsed.outputs))
+        self.assertEqual(cached.lut(), parsed.lut())
+        self.assertIs(cached.circuit.components["and"].layout,
+                      parsed.circuit.components["and"].layout)
+
+    def test_changed_file_replaces_entry(self):
+        load_definition(self.path)
+        [old_entry] = self.cache_entries()
+
+        data = json.loads(json.dumps(NAND_DATA))
+        data["wires"][3]["src_id"] = "and"
+        self.save(data)
+        self.new_session()
+        self.assertEqual(load_definition(self.path).evaluate((True, True)), (True,))
+        self.assertNotIn(old_entry, self.cache_entries())
+        self.assertEqual(len(self.cache_entries()), 1)
+
+    def test_old_versions_pruned(self):
+        load_definition(self.path)
+        [entry] = self.cache_entries()
+        cache = os.path.join(self.folder.name, ".cache")
+        for version in range(1, library.CACHE_VERSION):
+            stale = entry.replace(f".v{library.CACHE_VERSION}.", f".v{version}.")
+            shutil.copy(os.path.join(cache, entry), os.path.join(cache, stale))
+
+        self.save({**NAND_DATA, "name": "NAND2"})
+        self.new_session()
+        self.assertEqual(load_definition(self.path).name, "NAND2")
+        self.assertEqual(len(self.cache_entries()), 1)
+
+    def test_unreadable_entry_is_parsed_again(self):
+        load_definition(self.path)
+        [entry] = self.cache_entries()
+        with open(os.path.join(self.folder.name, ".cache", entry), "wb") as f:
+            f.write(b"not a pickle")
+
+        self.new_session()
+        self.assertEqual(load_definition(self.path).evaluate((True, True)), (False,))
+
+    def test_foreign_entry_is_not_loaded(self):
+        load_definition(self.path)
+        [entry] = self.cache_entries()
+        victim = os.path.join(self.folder.name, "victim.txt")
+        with open(victim, "w", encoding="utf-8") as f:
+            f.write("still here")
+
+        # well-formed pickles that are not made of model classes
+        for payload in (_Foreign(victim), {"definition": _Foreign(victim)}, mock.sentinel.value):
+            with open(os.path.join(self.folder.name, ".cache", entry), "wb") as f:
+                pickle.dump(payload, f)
+            self.new_session()
+            read = library.read_circuit_file
+            with mock.patch.object(library, "read_circuit_file", wraps=read) as parse:
+                self.assertEqual(load_definition(self.path).evaluate((True, True)), (False,))
+            parse.assert_called_once()
+            self.assertTrue(os.path.exists(victim))
+
+    def test_entry_referring_outside_the_folder(self):
+        with tempfile.TemporaryDirectory() as elsewhere:
+            outside = os.path.join(elsewhere, "gate.json")
+            with open(outside, "w", encoding="utf-8") as f:
+                json.dump(NAND_DATA, f)
+            load_definition(self.path)
+            [entry] = self.cache_entries()
+
+            class Pickler(pickle.Pickler):
+                def persistent_id(self, obj):
+                    return outside if obj == "gate" else None
+
+            with open(os.path.join(self.folder.name, ".cache", entry), "wb") as f:
+                Pickler(f).dump("gate")
+            self.new_session()
+            self.assertEqual(load_definition(self.path).evaluate((True, True)), (False,))
+            # pylint: disable-next=protected-access
+            self.assertNotIn(os.path.realpath(outside), library._definitions)
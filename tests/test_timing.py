@@ -0,0 +1,94 @@
+"""
+test_timing.py
+
+Test module for the timing-wheel event simulator.
+"""
+
+import json
+import random
+import unittest
+from model.wire import Wire
+from model.circuit import Circuit
+from model.component import (AndComponent, InputComponent, NotComponent, OutputComponent,
+                             SubcircuitComponent)
+from model.library import definition_from_json
+from simulation.timing import TimingSimulator
+from tests.circuit_builders import random_circuit, input_ids, output_ids
+from tests.test_subcircuit import NAND_DATA
+
+
+class TestTimingSimulator(unittest.TestCase):
+    def setUp(self):
+        # a and not a: the AND output pulses for one NOT delay on a rising edge
+        self.circuit: Circuit = Circuit()
+        for component in (InputComponent("a"), NotComponent("not"), AndComponent("and"),
+                          OutputComponent("out")):
+            self.circuit.add_component(component)
+        self.circuit.add_wire(Wire("a", "OUT", "not", "IN"))
+        self.circuit.add_wire(Wire("a", "OUT", "and", "A"))
+        self.circuit.add_wire(Wire("not", "OUT", "and", "B"))
+        self.circuit.add_wire(Wire("and", "OUT", "out", "IN"))
+
+    def test_glitch_in_trace(self):
+        simulator = TimingSimulator(self.circuit, delays={"NOT": 3}, record=True)
+        simulator.reset()
+        start = simulator.now
+        result = simulator.set_input("a", True)
+
+        self.assertTrue(result.stable)
+        self.assertEqual(result.time, 4)
+        pulses = [(time - start, value) for time, cid, _, value in simulator.trace if cid == "and"]
+        self.assertEqual(pulses, [(1, True), (4, False)])
+        self.assertFalse(self.circuit.components["out"].inputs["IN"])
+
+    def test_settled_state_matches_evaluate(self):
+        circuit = random_circuit(5, n_inputs=6, n_gates=200)
+        simulator = TimingSimulator(circuit)
+        rng = random.Random(5)
+        for _ in range(30):
+            cid = rng.choice(input_ids(circuit))
+            self.assertTrue(simulator.set_input(cid, rng.random() < 0.5).stable)
+            settled = [circuit.components[out].inputs["IN"] for out in output_ids(circuit)]
+
+            circuit.evaluate()
+            evaluated = [circuit.components[out].inputs["IN"] for out in output_ids(circuit)]
+            self.assertEqual(settled, evaluated)
+
+    def test_ring_oscillator_hits_budget(self):
+        circuit = Circuit()
+        circuit.add_component(InputComponent("en"))
+        circuit.add_component(AndComponent("gate"))
+        for cid in ("n1", "n2", "n3"):
+            circuit.add_component(NotComponent(cid))
+        circuit.add_wire(Wire("en", "OUT", "gate", "A"))
+        circuit.add_wire(Wire("gate", "OUT", "n1", "IN"))
+        circuit.add_wire(Wire("n1", "OUT", "n2", "IN"))
+        circuit.add_wire(Wire("n2", "OUT", "n3", "IN"))
+        circuit.add_wire(Wire("n3", "OUT", "gate", "B"))
+
+        simulator = TimingSimulator(circuit, budget=1000)
+        self.assertTrue(simulator.reset().stable)
+        self.assertFalse(simulator.set_input("en", True).stable)
+        self.assertTrue(simulator.set_input("en", False).stable)
+
+    def test_reset_after_definition_reloaded(self):
+        definition = definition_from_json(NAND_DATA)
+        circuit = Circuit()
+        for component in (InputComponent("a"), InputComponent("b"),
+                          SubcircuitComponent("gate", definition), OutputComponent("out")):
+            circuit.add_component(component)
+        circuit.add_wire(Wire("a", "OUT", "gate", "a"))
+        circuit.add_wire(Wire("b", "OUT", "gate", "b"))
+        circuit.add_wire(Wire("gate", "out", "out", "IN"))
+
+        simulator = TimingSimulator(circuit)
+        simulator.set_input("a", True)
+        simulator.set_input("b", True)
+        self.assertFalse(circuit.components["out"].inputs["IN"])
+
+        # the same file saved as an AND gate
+        data = json.loads(json.dumps(NAND_DATA))
+        data["wires"][3]["src_id"] = "and"
+        definition.replace(definition_from_json(data))
+        simulator.set_input("a", True)
+        self.assertTrue(circuit.components["out"].inputs["IN"])
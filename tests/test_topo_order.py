@@ -0,0 +1,58 @@
+"""
+test_topo_order.py
+
+Test module for the incrementally maintained topological order.
+"""
+
+import random
+import unittest
+from utils.topo_order import TopologicalOrder
+
+
+class TestTopologicalOrder(unittest.TestCase):
+    def assert_valid(self, order: TopologicalOrder, edges):
+        position = {node: i for i, node in enumerate(order.order())}
+        for src, dst in edges:
+            self.assertLess(position[src], position[dst])
+
+    def test_back_edge_reorders(self):
+        order = TopologicalOrder()
+        for node in "abcd":
+            order.add_node(node)
+
+        self.assertTrue(order.add_edge("d", "a"))
+        self.assertTrue(order.add_edge("c", "d"))
+        self.assert_valid(order, [("d", "a"), ("c", "d")])
+
+    def test_cycle_rejected(self):
+        order = TopologicalOrder()
+        self.assertTrue(order.add_edge("a", "b"))
+        self.assertTrue(order.add_edge("b", "c"))
+
+        self.assertFalse(order.add_edge("c", "a"))
+        self.assertFalse(order.add_edge("a", "a"))
+
+        order.remove_edge("b", "c")
+        self.assertTrue(order.add_edge("c", "a"))
+
+    def test_random_edits_stay_sorted(self):
+        rng = random.Random(7)
+        order = TopologicalOrder()
+        edges = []
+        for node in range(60):
+            order.add_node(node)
+
+        for _ in range(400):
+            src, dst = rng.randrange(60), rng.randrange(60)
+            if order.add_edge(src, dst):
+                edges.append((src, dst))
+            if edges and rng.random() < 0.2:
+                edge = edges.pop(rng.randrange(len(edges)))
+                order.remove_edge(*edge)
+            self.assert_valid(order, edges)
+
+        for node in range(0, 60, 2):
+            order.remove_node(node)
+        edges = [(s, d) for s, d in edges if s % 2 and d % 2]
+        self.assertEqual(len(order.order()), 30)
+        self.assert_valid(order, edges)
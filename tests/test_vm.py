@@ -0,0 +1,105 @@
+"""
+test_vm.py
+
+Test module for the instruction array interpreter.
+"""
+
+import itertools
+import random
+import unittest
+from model.wire import Wire
+from model.component import (AndComponent, DffComponent, NotComponent, OrComponent, OutputComponent,
+                             SubcircuitComponent)
+from model.library import definition_from_json
+from tests.circuit_builders import random_circuit, evaluate_vector, input_ids
+from tests.test_subcircuit import NAND_DATA
+
+
+class _Recorder:
+    def __init__(self):
+        self.events = []
+
+    def __getattr__(self, event):
+        return lambda *args: self.events.append((event, *args))
+
+
+class TestCircuitVM(unittest.TestCase):
+    def assert_matches(self, circuit, vm):
+        self.assertEqual(vm.inputs, input_ids(circuit))
+        for vector in itertools.product([False, True], repeat=len(vm.inputs)):
+            self.assertEqual(list(vm.run(vector)), evaluate_vector(circuit, list(vector)))
+
+    def test_matches_evaluate(self):
+        circuit = random_circuit(4, n_inputs=5)
+        self.assert_matches(circuit, circuit.interpreter())
+
+    def test_patched_through_edits(self):
+        rng = random.Random(11)
+        circuit = random_circuit(6, n_inputs=4, n_gates=30)
+        vm = circuit.interpreter()
+        code = vm.code
+
+        for step in range(150):
+            components = list(circuit.components.values())
+            choice = rng.random()
+            if choice < 0.3:
+                kind = rng.choice([AndComponent, OrComponent, NotComponent, OutputComponent])
+                circuit.add_component(kind(f"new_{step}"))
+            elif choice < 0.7:
+                src = rng.choice([c for c in components if c.outputs])
+                dst = rng.choice([c for c in components if c.inputs])
+                circuit.add_wire(Wire(src.id, "OUT", dst.id, rng.choice(list(dst.inputs))))
+            elif choice < 0.85 and circuit.wires:
+                circuit.delete_wire(rng.choice(circuit.wires))
+            else:
+                victim = rng.choice(components)
+                if victim.type != "INPUT":
+                    circuit.delete_component(victim)
+
+            if step % 15 == 0:
+                self.assert_matches(circuit, vm)
+
+        self.assert_matches(circuit, vm)
+        self.assertIs(vm.code, code)
+
+    def test_components_without_opcode(self):
+        circuit = random_circuit(8, n_inputs=3, n_gates=20)
+        vm = circuit.interpreter()
+        recorder = _Recorder()
+        circuit.add_listener(recorder)
+        inputs = input_ids(circuit)
+
+        flip_flop = DffComponent("ff")
+        circuit.add_component(flip_flop)
+        self.assertEqual(recorder.events[-1], ("component_added", flip_flop))
+        circuit.add_component(OutputComponent("q"))
+        circuit.add_wire(Wire(inputs[0], "OUT", "ff", "D"))
+        circuit.add_wire(Wire("ff", "Q", "q", "IN"))
+        circuit.clock()
+        self.assert_matches(circuit, vm)
+
+        # running leaves what the circuit shows alone
+        circuit.set_input(inputs[0], True)
+        shown = circuit.to_dict()
+        vm.run((False,) * len(vm.inputs))
+        self.assertEqual(circuit.to_dict(), shown)
+        circuit.set_input(inputs[0], False)
+        propagated = circuit.to_dict()
+        circuit.evaluate()
+        self.assertEqual(circuit.to_dict(), propagated)
+
+        circuit.delete_component(flip_flop)
+        nand = SubcircuitComponent("nand", definition_from_json(NAND_DATA))
+        circuit.add_component(nand)
+        self.assertEqual(recorder.events[-1], ("component_added", nand))
+        circuit.add_wire(Wire(inputs[1], "OUT", "nand", "a"))
+        circuit.add_wire(Wire(inputs[2], "OUT", "nand", "b"))
+        circuit.add_wire(Wire("nand", "out", "q", "IN"))
+        self.assert_matches(circuit, vm)
+
+        circuit.add_wire(Wire("nand", "out", "q", "IN"))
+        circuit.delete_wire(circuit.fanin("nand")[0])
+        self.assert_matches(circuit, vm)
+
+        circuit.delete_component(nand)
+        self.assert_matches(circuit, vm)
@@ -28,6 +28,7 @@
 
 import unittest
 from model.circuit import Circuit
+from model.component import AndComponent
 from model.pin import Pin
 from controller.wire_controller import WireController
 from controller.event_bus import event_bus
@@ -57,6 +58,20 @@ class TestWireCreation(unittest.TestCase):
     self.assertEqual(wire.src_pin, "OUT")
     self.assertEqual(wire.dst_id, "comp2")
     self.assertEqual(wire.dst_pin, "IN")
+
+  def test_loop_reported(self):
+    """
+    Test a wire closing a loop is reported with the commit
+    """
+    committed = []
+    event_bus.subscribe("wire_committed", committed.append)
+    for src, dst in (("comp1", "comp2"), ("comp2", "comp1")):
+      self.circuit.add_component(AndComponent(src))
+      self.controller.handle_pin_clicked({'pin': Pin(src, "OUT", value=False, is_input=False)})
+      self.controller.handle_pin_clicked({'pin': Pin(dst, "A", value=False, is_input=True)})
+
+    self.assertEqual([payload["acyclic"] for payload in committed], [True, False])
+    self.assertIs(committed[1]["wire"], self.circuit.wires[1])
   
 class TestWireInvalidStart(unittest.TestCase):
   """
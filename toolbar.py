@@ -1,9 +1,11 @@
 """Module to define toolbar gui aspects and buttons"""
 
 import tkinter as tk
-from tkinter import ttk
+from tkinter import messagebox, simpledialog, ttk
+from controller.journal import attach_journal, recover_file
 from file_loader import FileLoader
 from file_saver import FileSaver
+from model.library_index import LibraryIndex, check_file_name
 
 
 class Toolbar:
@@ -15,6 +17,13 @@ class Toolbar:
 
         self.window = window  # reference to main window logic if needed
 
+        # saved circuits, only the index is read here
+        self.library = LibraryIndex()
+        self.current_file = None
+        self.current_name = None
+        # edits to the current file, for autosave and crash recovery
+        self.journal = None
+
         style = ttk.Style()
         style.theme_use("default")
 
@@ -60,7 +69,10 @@ class Toolbar:
             foreground="#1897d6",
         )
         self.file_menu.add_command(label="New File", command=self.new_file)
-        self.file_menu.add_command(label="Open...", command=self.open_file)
+        self.open_menu = tk.Menu(
+            self.file_menu, tearoff=0, postcommand=self.fill_open_menu
+        )
+        self.file_menu.add_cascade(label="Open", menu=self.open_menu)
         self.file_menu.add_command(label="Save", command=self.save_file)
 
     def show_file_menu(self):
@@ -76,13 +88,78 @@ class Toolbar:
         # Reset all the lookup dicts and other bullshit
         print("New file")
 
-    def open_file(self):
-        """Logic when open_file pressed"""
-        FileLoader("test.json", self.window.circuit, self.window.canvas, self.window)
+    def fill_open_menu(self):
+        """List the library parts in the open menu"""
+        self.library.refresh()
+        self.open_menu.delete(0, "end")
+        for entry in self.library:
+            self.open_menu.add_command(
+                label=f"{entry.name}  ({len(entry.inputs)} in, {len(entry.outputs)} out, "
+                f"{entry.gates} gates)",
+                command=lambda file=entry.file: self.open_file(file),
+            )
+
+    def open_file(self, file_name):
+        """Logic when a file is picked from the open menu"""
+        self.close_journal()
+        # edits journaled before the app last stopped without saving
+        recover_file(self.library.path(file_name))
+        loader = FileLoader(
+            file_name,
+            self.window.circuit,
+            self.window.canvas,
+            self.window,
+            self.library.directory,
+        )
+        self.current_file = file_name
+        self.current_name = loader.circuit_name
+        self.attach_journal()
 
     def save_file(self):
         """Logic when save_file pressed"""
-        FileSaver("test.json", self.window.circuit, "NAND")
+        name = simpledialog.askstring(
+            "Save", "Circuit name:", initialvalue=self.current_name or ""
+        )
+        if not name:
+            return
+
+        file_name = self.current_file
+        if name != self.current_name or file_name is None:
+            file_name = f"{name}.json"
+        try:
+            check_file_name(file_name)
+        except ValueError:
+            # the name becomes the file name, it must stay in the library
+            messagebox.showerror("Save", f"{name!r} can not be used as a file name")
+            return
+
+        self.current_file = file_name
+        self.current_name = name
+        # a file saved over is written whole below, one left behind under
+        # its old name keeps the edits made since it was opened
+        self.close_journal(
+            compact=self.journal is not None
+            and self.journal.path != self.library.path(self.current_file)
+        )
+        FileSaver(
+            self.current_file, self.window.circuit, name, self.library.directory
+        )
+        self.attach_journal()
+        self.library.refresh()
+
+    def attach_journal(self):
+        """Journals edits to the circuit into the current file"""
+        self.journal = attach_journal(
+            self.library.path(self.current_file),
+            self.window.circuit,
+            name=self.current_name,
+        )
+
+    def close_journal(self, compact=True):
+        """Stops journaling, by default folding the journal into its file"""
+        if self.journal is not None:
+            self.journal.close(compact=compact)
+            self.journal = None
 
     def place_and(self):
         """Logic to place and block"""
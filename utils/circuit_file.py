@@ -0,0 +1,338 @@
+"""
+circuit_file.py
+
+Reading and writing saved circuits. JSON stays the interchange format, files
+ending in .lgb use a versioned binary format instead:
+
+  header      magic, version, section counts and offsets, and the string
+              holding any other top-level keys as JSON
+  strings     offset table into one utf-8 blob, every id, type and pin
+              name is stored once
+  lists       pin name lists as runs of string indices, shared by every
+              component with the same pins
+  components  fixed-width records: id, type, position and list indices
+  wires       fixed-width records: endpoint ids and pins, path location
+  paths       coordinates in half units, each point stored as the delta
+              from the previous one in 16 bit ints where they fit
+
+Files are read through mmap and records are only decoded when asked for, so
+opening a large design does not parse it up front. stream_circuit_file hands
+out records one at a time from either format.
+"""
+
+import json
+import mmap
+import os
+import struct
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Tuple
+from utils.json_stream import stream_object
+
+BINARY_EXTENSION = ".lgb"
+
+MAGIC = b"LGCB"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHH12I")
+# version 1 files have no extra keys string
+_HEADER_V1 = struct.Struct("<4sHH11I")
+_NO_EXTRA = 0xFFFFFFFF
+# top-level keys with sections of their own
+_SECTIONS = ("name", "components", "wires")
+_SPAN = struct.Struct("<II")
+_COMPONENT = struct.Struct("<IIddIIII")
+_WIRE = struct.Struct("<IIIIII")
+
+# the top bits of a wire's path count tell how the path is stored: deltas in
+# half units as 16 or 32 bit ints, or raw doubles for paths off that grid
+_PATH_COUNT = (1 << 30) - 1
+_PATH_WIDE = 1 << 30
+_PATH_RAW = 2 << 30
+
+
+def write_circuit_file(path: str, data: Dict[str, Any], sync: bool = False) -> None:
+  """
+  Save circuit data as written by the gui, the extension picks the format.
+  With sync the data is written to disk first and then replaces the file in
+  one step, a crash leaves either the old file or the new one
+  """
+  target = path + ".tmp" if sync else path
+  if path.endswith(BINARY_EXTENSION):
+    with open(target, "wb") as f:
+      f.write(encode(data))
+      if sync:
+        f.flush()
+        os.fsync(f.fileno())
+  else:
+    with open(target, "w", encoding="utf-8") as f:
+      json.dump(data, f, indent=2)
+      if sync:
+        f.flush()
+        os.fsync(f.fileno())
+  if sync:
+    os.replace(target, path)
+
+
+def read_circuit_file(path: str) -> Dict[str, Any]:
+  """
+  Load circuit data saved by write_circuit_file
+  """
+  if path.endswith(BINARY_EXTENSION):
+    with BinaryCircuitFile(path) as circuit_file:
+      return circuit_file.to_dict()
+  with open(path, "r", encoding="utf-8") as f:
+    return json.load(f)
+
+
+def stream_circuit_file(path: str) -> Iterator[Tuple[str, Any]]:
+  """
+  Circuit data as (key, value) pairs in file order, with every entry of the
+  components and wires lists as a pair of its own, so records can be used
+  while the rest of the file is still being read
+  """
+  if path.endswith(BINARY_EXTENSION):
+    with BinaryCircuitFile(path) as circuit_file:
+      yield "name", circuit_file.name
+      yield from circuit_file.extra.items()
+      for index in range(circuit_file.component_count):
+        yield "components", circuit_file.component(index)
+      for index in range(circuit_file.wire_count):
+        yield "wires", circuit_file.wire(index)
+    return
+
+  with open(path, "r", encoding="utf-8") as f:
+    yield from stream_object(f, ("components", "wires"))
+
+
+def encode(data: Dict[str, Any]) -> bytes:
+  """
+  Binary image of gui circuit data
+  """
+  strings: Dict[str, int] = {}
+  lists: Dict[Tuple[int, ...], int] = {}
+
+  def string(value: str) -> int:
+    return strings.setdefault(value, len(strings))
+
+  def pin_list(values: List[str]) -> int:
+    return lists.setdefault(tuple(string(value) for value in values), len(lists))
+
+  name = string(data.get("name", ""))
+  extra = {key: value for key, value in data.items() if key not in _SECTIONS}
+  extra_index = string(json.dumps(extra, separators=(",", ":"))) if extra else _NO_EXTRA
+
+  components = bytearray()
+  for comp in data["components"]:
+    x, y = comp["pos"]
+    components += _COMPONENT.pack(
+        string(comp["id"]), string(comp["type"]), x, y,
+        pin_list(comp["inputs"]), pin_list(comp["outputs"]),
+        pin_list(comp["connections"]), pin_list(comp["connected_wires"]))
+
+  wires = bytearray()
+  paths = bytearray()
+  for wire in data["wires"]:
+    offset = len(paths)
+    count = _encode_path(paths, wire["path"])
+    wires += _WIRE.pack(string(wire["src_id"]), string(wire["src_pin"]),
+                        string(wire["dst_id"]), string(wire["dst_pin"]), offset, count)
+
+  blob = bytearray()
+  string_spans = bytearray()
+  for value in strings:
+    encoded = value.encode("utf-8")
+    string_spans += _SPAN.pack(len(blob), len(encoded))
+    blob += encoded
+
+  list_spans = bytearray()
+  items = []
+  for members in lists:
+    list_spans += _SPAN.pack(len(items), len(members))
+    items += members
+
+  sections = [string_spans, list_spans, struct.pack(f"<{len(items)}I", *items),
+              components, wires, paths, blob]
+  offsets = []
+  position = _HEADER.size
+  for section in sections:
+    offsets.append(position)
+    position += len(section)
+
+  # the string index section directly follows the list spans, so its offset
+  # is not stored
+  header = _HEADER.pack(MAGIC, VERSION, 0, name, extra_index, len(strings), len(lists),
+                        len(data["components"]), len(data["wires"]), *offsets[:2], *offsets[3:])
+  return header + b"".join(sections)
+
+
+class BinaryCircuitFile:
+  """
+  Memory-mapped binary circuit. Strings and records are decoded on access
+  """
+
+  name: str
+  extra: Dict[str, Any]
+  component_count: int
+  wire_count: int
+
+  def __init__(self, path: str):
+    with open(path, "rb") as f:
+      if os.fstat(f.fileno()).st_size < _HEADER_V1.size:
+        raise ValueError(f"{path} is not a binary circuit file")
+      self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version = struct.unpack_from("<4sH", self._map)
+    if magic != MAGIC:
+      self.close()
+      raise ValueError(f"{path} is not a binary circuit file")
+    if version > VERSION:
+      self.close()
+      raise ValueError(f"{path} uses binary format version {version}, newer than {VERSION}")
+
+    if version == 1:
+      fields = list(_HEADER_V1.unpack_from(self._map))
+      fields.insert(4, _NO_EXTRA)
+    else:
+      fields = _HEADER.unpack_from(self._map)
+    (_, _, _, name, extra, _, list_count, self.component_count, self.wire_count,
+     self._strings, self._lists, self._components, self._wires, self._paths,
+     self._blob) = fields
+
+    self._items = self._lists + _SPAN.size * list_count
+    self._decoded: Dict[int, str] = {}
+    self.name = self.string(name)
+    self.extra = json.loads(self.string(extra)) if extra != _NO_EXTRA else {}
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def close(self) -> None:
+    """
+    Unmap the file
+    """
+    self._map.close()
+
+  def string(self, index: int) -> str:
+    """
+    Entry of the string table
+    """
+    value = self._decoded.get(index)
+    if value is None:
+      start, length = _SPAN.unpack_from(self._map, self._strings + _SPAN.size * index)
+      start += self._blob
+      value = self._decoded[index] = str(self._map[start:start + length], "utf-8")
+    return value
+
+  def pin_list(self, index: int) -> List[str]:
+    """
+    Entry of the pin list table
+    """
+    start, count = _SPAN.unpack_from(self._map, self._lists + _SPAN.size * index)
+    members = struct.unpack_from(f"<{count}I", self._map, self._items + 4 * start)
+    return [self.string(member) for member in members]
+
+  def component(self, index: int) -> Dict[str, Any]:
+    """
+    Component record as the gui saves it
+    """
+    cid, comp_type, x, y, inputs, outputs, connections, connected = _COMPONENT.unpack_from(
+        self._map, self._components + _COMPONENT.size * index)
+    return {
+        "id": self.string(cid),
+        "pos": [_number(x), _number(y)],
+        "type": self.string(comp_type),
+        "inputs": self.pin_list(inputs),
+        "outputs": self.pin_list(outputs),
+        "connections": self.pin_list(connections),
+        "connected_wires": self.pin_list(connected),
+    }
+
+  def wire(self, index: int) -> Dict[str, Any]:
+    """
+    Wire record as the gui saves it
+    """
+    src_id, src_pin, dst_id, dst_pin, offset, count = _WIRE.unpack_from(
+        self._map, self._wires + _WIRE.size * index)
+    return {
+        "src_id": self.string(src_id),
+        "src_pin": self.string(src_pin),
+        "dst_id": self.string(dst_id),
+        "dst_pin": self.string(dst_pin),
+        "path": _decode_path(self._map, self._paths + offset, count),
+    }
+
+  def to_dict(self) -> Dict[str, Any]:
+    """
+    Whole circuit in the same shape as the JSON format. Sections are decoded
+    in bulk rather than record by record
+    """
+    buffer = self._map
+    strings = [
+        str(buffer[self._blob + start:self._blob + start + length], "utf-8")
+        for start, length in _SPAN.iter_unpack(buffer[self._strings:self._lists])
+    ]
+    spans = list(_SPAN.iter_unpack(buffer[self._lists:self._items]))
+    item_count = (self._components - self._items) // 4
+    items = [strings[index] for index in struct.unpack_from(f"<{item_count}I", buffer, self._items)]
+    lists = [items[start:start + count] for start, count in spans]
+
+    components = [{
+        "id": strings[cid],
+        "pos": [_number(x), _number(y)],
+        "type": strings[comp_type],
+        "inputs": list(lists[inputs]),
+        "outputs": list(lists[outputs]),
+        "connections": list(lists[connections]),
+        "connected_wires": list(lists[connected]),
+    } for cid, comp_type, x, y, inputs, outputs, connections, connected in _COMPONENT.iter_unpack(
+        buffer[self._components:self._wires])]
+
+    wires = [{
+        "src_id": strings[src_id],
+        "src_pin": strings[src_pin],
+        "dst_id": strings[dst_id],
+        "dst_pin": strings[dst_pin],
+        "path": _decode_path(buffer, self._paths + offset, count),
+    } for src_id, src_pin, dst_id, dst_pin, offset, count in _WIRE.iter_unpack(
+        buffer[self._wires:self._paths])]
+
+    return {"name": self.name, **self.extra, "components": components, "wires": wires}
+
+
+def _number(value: float) -> int | float:
+  return int(value) if value.is_integer() else value
+
+
+def _encode_path(out: bytearray, path: List[List[float]]) -> int:
+  """
+  Append a path, returns its point count tagged with the encoding used
+  """
+  values = [value for point in path for value in point]
+  halves = [2 * value for value in values]
+  if not all(float(value).is_integer() for value in halves):
+    out += struct.pack(f"<{len(values)}d", *values)
+    return len(path) | _PATH_RAW
+
+  deltas = [int(value) for value in halves]
+  for i in range(len(deltas) - 1, 1, -1):
+    deltas[i] -= deltas[i - 2]
+  if all(-0x8000 <= delta < 0x8000 for delta in deltas):
+    out += struct.pack(f"<{len(deltas)}h", *deltas)
+    return len(path)
+  out += struct.pack(f"<{len(deltas)}i", *deltas)
+  return len(path) | _PATH_WIDE
+
+
+def _decode_path(buffer, offset: int, count: int) -> List[List[int | float]]:
+  kind, count = count & ~_PATH_COUNT, count & _PATH_COUNT
+  if kind == _PATH_RAW:
+    values = struct.unpack_from(f"<{2 * count}d", buffer, offset)
+    return [[_number(values[i]), _number(values[i + 1])] for i in range(0, 2 * count, 2)]
+
+  deltas = struct.unpack_from(f"<{2 * count}{'i' if kind == _PATH_WIDE else 'h'}", buffer, offset)
+  xs = accumulate(deltas[0::2])
+  ys = accumulate(deltas[1::2])
+  return [[x / 2 if x & 1 else x >> 1, y / 2 if y & 1 else y >> 1] for x, y in zip(xs, ys)]
@@ -1,14 +1,28 @@
 """
 component_factory.py
 """
-from typing import Tuple, Dict
-from model.component import AndComponent, NotComponent, OrComponent, SubcircuitComponent
-from model.circuit import Circuit
+from typing import Tuple
+from model.component import (AddComponent, AndComponent, BitwiseComponent, CompareComponent,
+                             CounterComponent, DffComponent, InputComponent, MergeComponent,
+                             MuxComponent, NotComponent, OrComponent, OutputComponent,
+                             RegisterComponent, SplitComponent, SubcircuitComponent)
 
-def build_component(component_type: str, position: Tuple[int, int], comp_id: str, # pylint: disable=unused-argument
-                    sub_circuit: Circuit = None, interface_map: Dict[str, Tuple[str, str]] = None):
+WORD_COMPONENTS = {
+    "ADD": AddComponent,
+    "MUX": MuxComponent,
+    "COMPARE": CompareComponent,
+    "SPLIT": SplitComponent,
+    "MERGE": MergeComponent,
+}
+
+
+# pylint: disable-next=unused-argument,too-many-return-statements
+def build_component(component_type: str, position: Tuple[int, int], comp_id: str,
+                    definition=None, width: int = 8):
   """
-  Builds components based on type and id, arguments for subcircuits not neeeded
+  Builds components based on type and id, the definition is only needed for subcircuits
+  and the width for registers, counters and word-level components. Returns None for
+  unknown types
   """
 
   #TODO do something about position, either include it or something idk
@@ -18,7 +32,21 @@ def build_component(component_type: str, position: Tuple[int, int], comp_id: str
     return NotComponent(comp_id)
   if component_type == "OR":
     return OrComponent(comp_id)
+  if component_type == "INPUT":
+    return InputComponent(comp_id)
+  if component_type == "OUTPUT":
+    return OutputComponent(comp_id)
   if component_type == "SUBCIRCUIT":
-    return SubcircuitComponent(component_type, sub_circuit, interface_map)
+    return SubcircuitComponent(comp_id, definition)
+  if component_type == "DFF":
+    return DffComponent(comp_id)
+  if component_type == "REGISTER":
+    return RegisterComponent(comp_id, width)
+  if component_type == "COUNTER":
+    return CounterComponent(comp_id, width)
+  if component_type in WORD_COMPONENTS:
+    return WORD_COMPONENTS[component_type](comp_id, width)
+  if component_type.startswith("BUS_") and component_type[4:] in BitwiseComponent.OPERATIONS:
+    return BitwiseComponent(comp_id, component_type[4:], width)
 
   return None
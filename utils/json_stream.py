@@ -0,0 +1,149 @@
+"""
+json_stream.py
+
+Incremental reading of a JSON object from a text file. The file is read a
+chunk at a time and chosen top-level arrays are handed out one element at a
+time, so memory stays at about one chunk plus the largest element no matter
+how long the arrays are. Elements are parsed with the standard json decoder,
+only the surrounding object and array punctuation is scanned here.
+"""
+
+import json
+from typing import Any, Collection, Iterator, TextIO, Tuple
+
+_WHITESPACE = " \t\n\r"
+# characters a number can go on with
+_NUMBER = "0123456789.eE+-"
+
+
+def stream_object(file: TextIO, streamed: Collection[str],
+                  chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+  """
+  Members of the top-level object as (key, value) pairs in file order. The
+  arrays under the keys in streamed are yielded as one (key, element) pair
+  per element instead of whole
+  """
+  reader = _Reader(file, chunk_size)
+  reader.expect("{")
+  if reader.peek() == "}":
+    reader.advance()
+    return
+
+  while True:
+    key = reader.value()
+    if not isinstance(key, str):
+      raise reader.error("expected an object key")
+    reader.expect(":")
+
+    if key in streamed and reader.peek() == "[":
+      reader.advance()
+      if reader.peek() == "]":
+        reader.advance()
+      else:
+        while True:
+          yield key, reader.value()
+          if reader.separator("]"):
+            break
+    else:
+      yield key, reader.value()
+
+    if reader.separator("}"):
+      return
+
+
+class _Reader:
+  """
+  Sliding window over the file, consumed text is dropped as it is passed
+  """
+
+  def __init__(self, file: TextIO, chunk_size: int):
+    self.file = file
+    self.chunk_size = chunk_size
+    self.buffer = ""
+    self.pos = 0
+    # characters dropped from the front of the buffer, for error offsets
+    self.dropped = 0
+    self.eof = False
+    self.decoder = json.JSONDecoder()
+
+  def more(self, size: int = 0) -> bool:
+    """
+    Read at least the next chunk, returns False at the end of the file
+    """
+    if self.eof:
+      return False
+    chunk = self.file.read(max(size, self.chunk_size))
+    if not chunk:
+      self.eof = True
+      return False
+
+    if self.pos:
+      self.dropped += self.pos
+      self.buffer = self.buffer[self.pos:]
+      self.pos = 0
+    self.buffer += chunk
+    return True
+
+  def peek(self) -> str:
+    """
+    Next character that is not whitespace, empty at the end of the file
+    """
+    while True:
+      buffer = self.buffer
+      pos = self.pos
+      while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+      self.pos = pos
+      if pos < len(buffer):
+        return buffer[pos]
+      if not self.more():
+        return ""
+
+  def advance(self) -> None:
+    """
+    Step over the character returned by peek
+    """
+    self.pos += 1
+
+  def expect(self, char: str) -> None:
+    """
+    Step over char, raises ValueError if something else comes next
+    """
+    if self.peek() != char:
+      raise self.error(f"expected '{char}'")
+    self.advance()
+
+  def separator(self, close: str) -> bool:
+    """
+    Step over a comma or the closing bracket, returns True at the bracket
+    """
+    char = self.peek()
+    if char not in (",", close):
+      raise self.error(f"expected ',' or '{close}'")
+    self.advance()
+    return char == close
+
+  def value(self) -> Any:
+    """
+    Decode the next complete value, reading further chunks until it is. The
+    read size doubles with every retry so a large value is not decoded over
+    and over
+    """
+    self.peek()
+    while True:
+      try:
+        value, end = self.decoder.raw_decode(self.buffer, self.pos)
+      except json.JSONDecodeError as e:
+        if not self.more(len(self.buffer) - self.pos):
+          raise self.error(e.msg) from e
+        continue
+      # a number cut off by the end of the buffer decodes as a shorter one,
+      # "1." reads as 1, so it is only complete once something else follows
+      cut_off = end == len(self.buffer) or self.buffer[end] in _NUMBER
+      if isinstance(value, (int, float)) and cut_off and self.more():
+        continue
+      self.pos = end
+      return value
+
+  def error(self, message: str) -> ValueError:
+    return ValueError(f"{message} at offset {self.dropped + self.pos}")
@@ -0,0 +1,155 @@
+"""
+topo_order.py
+
+Dynamic topological order (Pearce-Kelly). Adding an edge only reorders the
+nodes between its endpoints instead of re-running Kahn's algorithm over the
+whole graph, and edges that would close a cycle are refused.
+"""
+
+from typing import Dict, Hashable, List
+
+
+class TopologicalOrder:
+  """
+  Keeps a topological order of a directed graph up to date as nodes and
+  edges are added and removed
+  """
+
+  def __init__(self):
+    self._pos: Dict[Hashable, int] = {}
+    self._slots: List[Hashable | None] = []
+    self._succ: Dict[Hashable, Dict[Hashable, int]] = {}
+    self._pred: Dict[Hashable, Dict[Hashable, int]] = {}
+    self._holes = 0
+    self._order: List[Hashable] | None = None
+
+  def __contains__(self, node: Hashable) -> bool:
+    return node in self._pos
+
+  def __len__(self) -> int:
+    return len(self._pos)
+
+  def order(self) -> List[Hashable]:
+    """
+    Nodes in topological order. Cached until the order changes
+    """
+    if self._order is None:
+      self._order = [node for node in self._slots if node is not None]
+    return self._order
+
+  def position(self, node: Hashable) -> int:
+    """
+    Sort key of a node, only meaningful relative to other nodes
+    """
+    return self._pos[node]
+
+  def add_node(self, node: Hashable) -> None:
+    """
+    Add a node at the end of the order, does nothing if already present
+    """
+    if node in self._pos:
+      return
+    self._pos[node] = len(self._slots)
+    self._slots.append(node)
+    self._succ[node] = {}
+    self._pred[node] = {}
+    self._order = None
+
+  def remove_node(self, node: Hashable) -> None:
+    """
+    Remove a node and every edge touching it
+    """
+    if node not in self._pos:
+      return
+    for succ in self._succ.pop(node):
+      del self._pred[succ][node]
+    for pred in self._pred.pop(node):
+      del self._succ[pred][node]
+
+    self._slots[self._pos.pop(node)] = None
+    self._holes += 1
+    self._order = None
+
+    if self._holes > 32 and self._holes * 2 > len(self._slots):
+      self._compact()
+
+  def add_edge(self, src: Hashable, dst: Hashable) -> bool:
+    """
+    Add an edge src -> dst. Returns False and leaves the graph untouched
+    if the edge would create a cycle
+    """
+    self.add_node(src)
+    self.add_node(dst)
+
+    succ = self._succ[src]
+    if dst in succ:
+      succ[dst] += 1
+      self._pred[dst][src] += 1
+      return True
+
+    if src == dst:
+      return False
+
+    lower, upper = self._pos[dst], self._pos[src]
+    if lower < upper:
+      forward = self._reach(dst, self._succ, lambda pos: pos <= upper, src)
+      if forward is None:
+        return False
+      backward = self._reach(src, self._pred, lambda pos: pos >= lower, None)
+      self._reorder(forward, backward)
+
+    succ[dst] = 1
+    self._pred[dst][src] = 1
+    return True
+
+  def remove_edge(self, src: Hashable, dst: Hashable) -> None:
+    """
+    Remove one src -> dst edge. Removing edges never invalidates the order
+    """
+    succ = self._succ.get(src)
+    if succ is None or dst not in succ:
+      return
+    succ[dst] -= 1
+    self._pred[dst][src] -= 1
+    if succ[dst] == 0:
+      del succ[dst]
+      del self._pred[dst][src]
+
+  def _reach(self, start, edges, in_window, target) -> List[Hashable] | None:
+    """
+    Nodes reachable from start whose position lies inside the affected
+    window. Returns None if target is reached
+    """
+    seen = {start}
+    stack = [start]
+    while stack:
+      node = stack.pop()
+      for nxt in edges[node]:
+        if nxt == target:
+          return None
+        if nxt not in seen and in_window(self._pos[nxt]):
+          seen.add(nxt)
+          stack.append(nxt)
+    return list(seen)
+
+  def _reorder(self, forward: List[Hashable], backward: List[Hashable]) -> None:
+    """
+    Move everything that reaches the new edge's source in front of
+    everything reachable from its destination, reusing their positions
+    """
+    pos = self._pos
+    forward.sort(key=pos.__getitem__)
+    backward.sort(key=pos.__getitem__)
+    nodes = backward + forward
+    slots = sorted(pos[node] for node in nodes)
+
+    for slot, node in zip(slots, nodes):
+      pos[node] = slot
+      self._slots[slot] = node
+    self._order = None
+
+  def _compact(self) -> None:
+    self._slots = list(self.order())
+    self._pos = {node: i for i, node in enumerate(self._slots)}
+    self._holes = 0
+    self._order = None